@@ -0,0 +1,660 @@
+"""Throughput benchmarks for the geocoding pipeline.
+
+A change to parse_address(), normalize_street_name() or the tier SQL of geocode_addresspoints() is
+as likely to make matching slower as faster, and nothing in the test suite would say which. These
+benchmarks time each stage of the pipeline -- building the index, parsing, and each match tier --
+on a synthetic address point database and query corpus, and compare the result with a baseline
+saved from an earlier run.
+
+Everything runs offline. The database and the corpus are generated from a seed, and the same seed
+and sizes give the same data on any machine and under any version of the code being measured, so
+that two runs differ only in the code. query_geocoder() is timed against a mock of the
+morpc-geocoder service on this machine, which answers at once, so that its own overhead is what is
+measured.
+
+From a shell:
+
+    python -m morpc.benchmark --output baseline.json
+    (change something)
+    python -m morpc.benchmark --baseline baseline.json
+
+which exits with status 1 if any stage has regressed.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+# The stages benchmark_geocoding() times, in the order it times them. The match tiers are those of
+# geocode_addresspoints(), each timed on addresses that resolve at that tier, so that a tier that
+# slows down shows as itself rather than diluted in a mix.
+CONST_BENCHMARK_STAGES = ["build", "parse_address", "parse_address_series", "normalize_street_name",
+                          "exact", "components", "number_name", "route_number", "interpolated", "fuzzy",
+                          "unmatched", "mixed", "mixed_columnar", "query_geocoder"]
+
+CONST_BENCHMARK_TIERS = ["exact", "components", "number_name", "route_number", "interpolated", "fuzzy",
+                         "unmatched"]
+
+# The share of the query corpus drawn for each tier. Exact matches dominate real input.
+CONST_BENCHMARK_TIER_WEIGHTS = {"exact": 0.4, "components": 0.1, "number_name": 0.1, "route_number": 0.1,
+                                "interpolated": 0.1, "fuzzy": 0.1, "unmatched": 0.1}
+
+# The synthetic region: counties, and the cities and ZIP codes in each, with a point near its centre.
+CONST_BENCHMARK_COUNTIES = {
+    "Franklin": [("COLUMBUS", "43215"), ("WESTERVILLE", "43081"), ("GROVE CITY", "43123"),
+                 ("HILLIARD", "43026")],
+    "Delaware": [("DELAWARE", "43015"), ("OSTRANDER", "43061"), ("POWELL", "43065")],
+    "Licking": [("NEWARK", "43055"), ("HEATH", "43056")],
+    "Fairfield": [("LANCASTER", "43130"), ("PICKERINGTON", "43147")],
+    "Union": [("MARYSVILLE", "43040")],
+    "Knox": [("MOUNT VERNON", "43050"), ("FREDERICKTOWN", "43019")],
+    "Logan": [("BELLEFONTAINE", "43311")],
+    "Madison": [("LONDON", "43140")],
+}
+CONST_BENCHMARK_CENTRES = {"Franklin": (-82.99, 39.96), "Delaware": (-83.07, 40.30), "Licking": (-82.48, 40.09),
+                           "Fairfield": (-82.60, 39.71), "Union": (-83.37, 40.24), "Knox": (-82.48, 40.39),
+                           "Logan": (-83.77, 40.36), "Madison": (-83.45, 39.89)}
+
+# Street types and directionals by their canonical form, with the spellings the source and the
+# queries write them in. Fixed here rather than taken from morpc.geocode, so that the data does not
+# change when the normalization being measured does.
+CONST_BENCHMARK_STREET_TYPES = {"ST": ["Street", "ST", "St."], "AVE": ["Avenue", "AVE", "Ave"],
+                                "RD": ["Road", "RD", "Rd."], "DR": ["Drive", "DR", "Dr"],
+                                "LN": ["Lane", "LN"], "CT": ["Court", "CT"], "BLVD": ["Boulevard", "BLVD"],
+                                "PL": ["Place", "PL"], "CIR": ["Circle", "CIR"], "PKWY": ["Parkway", "PKWY"]}
+CONST_BENCHMARK_DIRECTIONALS = {"N": ["North", "N", "N."], "S": ["South", "S", "S."], "E": ["East", "E", "E."],
+                                "W": ["West", "W", "W."]}
+CONST_BENCHMARK_ROUTES = [("STATE ROUTE", "SR"), ("US ROUTE", "US"), ("COUNTY ROAD", "CR"),
+                          ("TOWNSHIP ROAD", "TR")]
+CONST_BENCHMARK_SYLLABLES = ["AL", "BER", "CAM", "DEN", "EL", "FAR", "GLEN", "HAR", "IN", "KEN", "LIN", "MAR",
+                             "NOR", "OAK", "PEN", "RAV", "SHER", "TAN", "VAL", "WIL", "WOOD", "BROOK", "DALE",
+                             "FORD", "HAM", "LEY", "MONT", "TON", "VIEW", "WICK"]
+CONST_BENCHMARK_UNITS = ["APT {}", "#{}", "UNIT {}", "STE {}"]
+
+
+def _synthetic_streets(points, seed):
+    """The streets of the synthetic region, as dicts, holding `points` address points between them.
+
+    Each street lies in one city of one county and runs straight from a random start, with even
+    numbers on one side and odd on the other, ten apart. Some buildings carry several units, each a
+    point of its own a few metres from the others. A tenth of the streets are numbered routes, half
+    of which are published without their class, as some counties publish them.
+    """
+    import math
+    import random
+
+    generator = random.Random(seed)
+    counties = sorted(CONST_BENCHMARK_COUNTIES)
+    names = set()
+    routes = generator.sample(range(1, 1000), 999)
+    ordinals = list(range(1, 100))
+    streets = []
+    total = 0
+    while total < points:
+        county = generator.choice(counties)
+        city, zipcode = generator.choice(CONST_BENCHMARK_COUNTIES[county])
+        street = {"county": county, "city": city, "zip": zipcode, "prefix": None, "suffix": None,
+                  "type": None, "route": None}
+        kind = generator.random()
+        if kind < 0.1 and routes:
+            number = routes.pop()
+            spelled, abbreviation = generator.choice(CONST_BENCHMARK_ROUTES)
+            street["route"] = (spelled, abbreviation, str(number))
+            street["name"] = str(number) if generator.random() < 0.5 else "{} {}".format(spelled, number)
+        else:
+            if kind < 0.15 and ordinals:
+                number = ordinals.pop(0)
+                suffix = "TH" if 10 <= number % 100 <= 20 else {1: "ST", 2: "ND", 3: "RD"}.get(number % 10, "TH")
+                name = "{}{}".format(number, suffix)
+            else:
+                name = None
+                while name is None or name in names:
+                    name = "".join(generator.choice(CONST_BENCHMARK_SYLLABLES)
+                                   for _ in range(generator.choice([2, 2, 3, 3, 4])))
+            names.add(name)
+            street["name"] = name
+            street["type"] = generator.choice(sorted(CONST_BENCHMARK_STREET_TYPES))
+            if generator.random() < 0.2:
+                street["prefix"] = generator.choice(sorted(CONST_BENCHMARK_DIRECTIONALS))
+            elif generator.random() < 0.05:
+                street["suffix"] = generator.choice(sorted(CONST_BENCHMARK_DIRECTIONALS))
+
+        centreLon, centreLat = CONST_BENCHMARK_CENTRES[county]
+        lon = centreLon + generator.uniform(-0.15, 0.15)
+        lat = centreLat + generator.uniform(-0.15, 0.15)
+        bearing = generator.uniform(0, 2 * math.pi)
+        # About fifteen metres between houses, and ten either side of the centre line.
+        stepLon, stepLat = 0.00018 * math.cos(bearing), 0.000135 * math.sin(bearing)
+        sideLon, sideLat = -0.00012 * math.sin(bearing), 0.00009 * math.cos(bearing)
+        base = 100 * generator.randint(1, 50)
+        houses = []
+        for position in range(generator.randint(5, 60)):
+            for side in (0, 1):
+                if total >= points:
+                    break
+                units = generator.choice([2, 3, 4]) if generator.random() < 0.05 else 1
+                houseLon = lon + position * stepLon + (side - 0.5) * 2 * sideLon
+                houseLat = lat + position * stepLat + (side - 0.5) * 2 * sideLat
+                houses.append((base + 10 * position + side,
+                               [(houseLon + unit * 0.00002, houseLat + unit * 0.00002) for unit in range(units)]))
+                total += units
+        street["houses"] = houses
+        streets.append(street)
+    return streets
+
+
+def synthetic_addresspoints(directory, points=100000, seed=0):
+    """Write a synthetic address point database in the shape of morpc-addresspoints-standardize.
+
+    The records are written raw, as the counties publish them: street types and directionals spelled
+    out or abbreviated, house numbers with leading zeros, ZIP codes with decimal points or ZIP+4, and
+    a few records with no street name or no location, so that build_geocode_index() has the same
+    normalization to do as it has on the real data. The same `points` and `seed` always write the
+    same records.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to write the database and its resource file to. A database already written
+        there for the same `points` and `seed` is kept rather than written again.
+    points : int
+        Optional. The number of address points. Defaults to 100,000.
+    seed : int
+        Optional. The seed the region is generated from. Defaults to 0.
+
+    Returns
+    -------
+    str
+        The path to the Frictionless resource file describing the database, for build_geocode_index().
+    """
+    import json
+    import os
+    import random
+    import sqlite3
+    import shapely
+
+    name = "addresspoints-{}-{}".format(points, seed)
+    resourcePath = os.path.join(directory, "{}.resource.json".format(name))
+    if os.path.exists(resourcePath):
+        return resourcePath
+
+    generator = random.Random(seed + 1)
+    rows = []
+    for street in _synthetic_streets(points, seed):
+        for number, locations in street["houses"]:
+            for lon, lat in locations:
+                spelled = generator.random()
+                streetaddr = "0{}".format(number) if spelled < 0.02 else str(number)
+                zipcode = street["zip"] + (".0" if spelled < 0.1 else "-1234" if spelled < 0.15 else "")
+                rows.append((
+                    streetaddr,
+                    street["name"].title() if generator.random() < 0.5 else street["name"],
+                    generator.choice(CONST_BENCHMARK_STREET_TYPES[street["type"]]) if street["type"] else None,
+                    generator.choice(CONST_BENCHMARK_DIRECTIONALS[street["prefix"]]) if street["prefix"] else None,
+                    generator.choice(CONST_BENCHMARK_DIRECTIONALS[street["suffix"]]) if street["suffix"] else None,
+                    street["city"].title(), zipcode, street["county"], shapely.Point(lon, lat).wkb))
+    # Records that cannot be indexed, which the build has to skip: copies of others with no street name
+    # or no location, so that every address the corpus writes is still there to be matched.
+    for row in generator.sample(rows, len(rows) // 100):
+        rows.append(row[:1] + (None,) + row[2:] if generator.random() < 0.5 else row[:-1] + (None,))
+
+    databasePath = os.path.join(directory, "{}.sqlite".format(name))
+    buildPath = "{}.{}.building".format(databasePath, os.getpid())
+    connection = sqlite3.connect(buildPath)
+    connection.execute("""create table points (streetaddr text, streetname text, streettype text,
+        prefixdir text, suffixdir text, city text, zip text, county text, GEOMETRY blob)""")
+    connection.executemany("insert into points values (?,?,?,?,?,?,?,?,?)", rows)
+    connection.commit()
+    connection.close()
+    os.replace(buildPath, databasePath)
+
+    with open(resourcePath, "w") as file:
+        json.dump({"name": name, "path": os.path.basename(databasePath), "format": "sqlite",
+                   "hash": "synthetic-{}-{}".format(points, seed), "dialect": {"sql": {"table": "points"}}}, file)
+    logger.info("Wrote {:,} synthetic address points to {}".format(len(rows), databasePath))
+    return resourcePath
+
+
+def synthetic_addresses(queries=20000, points=100000, seed=0):
+    """Generate a query corpus for the synthetic address points of the same `points` and `seed`.
+
+    Each address is written to resolve at a known tier of geocode_addresspoints(), in the shares of
+    CONST_BENCHMARK_TIER_WEIGHTS:
+
+    exact        : an address as published, in any of its spellings
+    components   : the wrong street type
+    number_name  : the wrong street type and the ZIP code of another city
+    route_number : a route published without its class, written with it
+    interpolated : a house number between two published ones on the same side of the street
+    fuzzy        : a street name misspelled by one letter
+    unmatched    : a house number the street does not have, or none at all
+
+    Some carry a unit ("APT 2", "#300") and some a trailing city, state and ZIP, which do not change
+    the tier. The same arguments always generate the same corpus.
+
+    Parameters
+    ----------
+    queries : int
+        Optional. The number of addresses. Defaults to 20,000.
+    points : int
+        Optional. The `points` of the database to match against. Defaults to 100,000.
+    seed : int
+        Optional. The `seed` of the database to match against. Defaults to 0.
+
+    Returns
+    -------
+    pandas.DataFrame
+        With columns address, zipcode (None where the address has none) and tier, the tier it is
+        written to resolve at.
+    """
+    import random
+    import string
+    import pandas as pd
+
+    streets = _synthetic_streets(points, seed)
+    generator = random.Random(seed + 2)
+    named = [street for street in streets if street["route"] is None]
+    spelled = [street for street in named if len(street["name"]) >= 8 and street["name"].isalpha()]
+    bare = [street for street in streets if street["route"] is not None and street["name"] == street["route"][2]]
+    names = {street["name"] for street in streets}
+    # Pairs of numbers on the same side of a street, ten apart, with nothing published between them.
+    gaps = [(street, number) for street in streets for (number, _), (following, _)
+            in zip(street["houses"], street["houses"][2:]) if following == number + 10]
+    zipcodes = sorted({zipcode for cities in CONST_BENCHMARK_COUNTIES.values() for _, zipcode in cities})
+
+    def spell(street, name=None, streetType=None):
+        words = []
+        if street["prefix"]:
+            words.append(generator.choice(CONST_BENCHMARK_DIRECTIONALS[street["prefix"]]))
+        words.append(name or street["name"])
+        if streetType or street["type"]:
+            words.append(generator.choice(CONST_BENCHMARK_STREET_TYPES[streetType or street["type"]]))
+        if street["suffix"]:
+            words.append(generator.choice(CONST_BENCHMARK_DIRECTIONALS[street["suffix"]]))
+        return " ".join(words)
+
+    def decorate(address, street):
+        if generator.random() < 0.15:
+            address += " " + generator.choice(CONST_BENCHMARK_UNITS).format(generator.randint(1, 400))
+        if generator.random() < 0.15:
+            address += ", {}, OH {}".format(street["city"].title(), street["zip"])
+        return address
+
+    def otherType(street):
+        return generator.choice([streetType for streetType in sorted(CONST_BENCHMARK_STREET_TYPES)
+                                 if streetType != street["type"]])
+
+    rows = []
+    tiers = sorted(CONST_BENCHMARK_TIER_WEIGHTS)
+    weights = [CONST_BENCHMARK_TIER_WEIGHTS[tier] for tier in tiers]
+    for tier in generator.choices(tiers, weights, k=queries):
+        zipcode = None
+        if tier == "exact":
+            street = generator.choice(streets)
+            number = generator.choice(street["houses"])[0]
+            address = "{} {}".format(number, spell(street))
+            zipcode = street["zip"] if generator.random() < 0.8 else None
+        elif tier == "components":
+            street = generator.choice(named)
+            address = "{} {}".format(generator.choice(street["houses"])[0], spell(street, streetType=otherType(street)))
+            zipcode = street["zip"]
+        elif tier == "number_name":
+            street = generator.choice(named)
+            address = "{} {}".format(generator.choice(street["houses"])[0], spell(street, streetType=otherType(street)))
+            zipcode = generator.choice([other for other in zipcodes if other != street["zip"]])
+        elif tier == "route_number" and bare:
+            street = generator.choice(bare)
+            address = "{} {} {}".format(generator.choice(street["houses"])[0],
+                                        generator.choice(street["route"][:2]), street["route"][2])
+            zipcode = street["zip"]
+        elif tier == "interpolated" and gaps:
+            street, number = generator.choice(gaps)
+            address = "{} {}".format(number + 4, spell(street))
+            zipcode = street["zip"]
+        elif tier == "fuzzy" and spelled:
+            street = generator.choice(spelled)
+            misspelled = street["name"]
+            while misspelled in names:
+                position = generator.randrange(1, len(street["name"]))
+                misspelled = (street["name"][:position] + generator.choice(string.ascii_uppercase)
+                              + street["name"][position + 1:])
+            address = "{} {}".format(generator.choice(street["houses"])[0], spell(street, name=misspelled))
+            zipcode = street["zip"] if generator.random() < 0.7 else None
+        else:
+            tier = "unmatched"
+            street = generator.choice(named)
+            if generator.random() < 0.5:
+                address = "{} {}".format(99990 + generator.randint(0, 9), spell(street))
+            else:
+                address = spell(street)
+            zipcode = street["zip"] if generator.random() < 0.5 else None
+        rows.append((decorate(address, street), zipcode, tier))
+    return pd.DataFrame(rows, columns=["address", "zipcode", "tier"], dtype=object)
+
+
+def _mock_geocoder_server(host="127.0.0.1", port=0):
+    """A stand-in for the morpc-geocoder service that answers POST /geocode/batch at once.
+
+    Every address is matched, at a location derived from its text, so that query_geocoder() has a
+    full result to assemble for each. Returns the server listening but not yet serving, as
+    morpc.geocoder_server() does.
+    """
+    import http.server
+    import json
+    import zlib
+
+    def result(request):
+        code = zlib.crc32(str(request.get("address")).encode())
+        return {"matched": True, "longitude": -83.5 + (code % 10000) / 10000,
+                "latitude": 39.5 + (code // 10000 % 10000) / 10000, "confidence": 1.0, "layer": "address",
+                "label": request.get("address"), "housenumber": None, "note": None}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            body = json.dumps({"results": [result(request) for request in payload["addresses"]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("{} {}".format(self.address_string(), format % args))
+
+    class Server(http.server.ThreadingHTTPServer):
+        daemon_threads = True
+
+    return Server((host, port), Handler)
+
+
+def _measure(run, records, repeat, memory):
+    """Time `run`, a function of no arguments, over `repeat` runs and keep the fastest, and measure the
+    peak memory of one more run if `memory`. Returns the figures of one stage of benchmark_geocoding().
+    What `run` returns from its last run is kept as the stage's `result`, for checking."""
+    import time
+    import tracemalloc
+
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    peak = None
+    if memory:
+        # Traced in a run of its own, since tracing slows the Python it traces.
+        tracemalloc.start()
+        try:
+            result = run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"records": records, "seconds": seconds, "rate": records / seconds if seconds else None,
+            "peak": peak, "result": result}
+
+
+def benchmark_geocoding(points=100000, queries=20000, seed=0, repeat=3, memory=True, stages=None,
+                        directory=None, workers=1):
+    """Measure the throughput of each stage of the geocoding pipeline on synthetic data.
+
+    The address points of synthetic_addresspoints() are indexed by build_geocode_index(), and the
+    addresses of synthetic_addresses() are parsed and matched against the index. Each stage is run
+    `repeat` times and the fastest kept, which is the least disturbed by whatever else the machine
+    was doing. Its rate is records a second: address points for the build, addresses for the rest.
+
+    The stages are those of CONST_BENCHMARK_STAGES:
+
+    build                   : build_geocode_index(), with the street name index for the fuzzy tier
+    parse_address           : parse_address() over the corpus, an address at a time
+    parse_address_series    : parse_address_series() over the corpus
+    normalize_street_name   : normalize_street_name() over the street names the corpus writes
+    exact ... unmatched     : geocode_addresspoints() over the addresses written for that tier, with
+                              interpolation on
+    mixed                   : geocode_addresspoints() over the whole corpus
+    mixed_columnar          : the same with the columnar engine, its columns already loaded
+    query_geocoder          : query_geocoder() over the whole corpus, against a mock of the service
+
+    The peak memory of a stage is that of the Python heap, which includes NumPy's and pandas's
+    arrays, over one further run under tracemalloc. SQLite's own page cache is not counted.
+
+    Parameters
+    ----------
+    points : int
+        Optional. The number of synthetic address points. Defaults to 100,000.
+    queries : int
+        Optional. The number of synthetic addresses. Defaults to 20,000.
+    seed : int
+        Optional. The seed the data is generated from. Defaults to 0.
+    repeat : int
+        Optional. The number of timed runs of each stage. Defaults to 3.
+    memory : bool
+        Optional. Measure the peak memory of each stage. Defaults to True.
+    stages : list of str
+        Optional. The stages to run, from CONST_BENCHMARK_STAGES. Defaults to None, which runs all of
+        them. The index is built whether or not "build" is among them.
+    directory : str
+        Optional. Where to write the synthetic database and its index, which are kept there and reused
+        by later runs with the same `points` and `seed`. Defaults to None, which writes them to a
+        temporary directory removed afterwards.
+    workers : int
+        Optional. Passed to build_geocode_index(). Defaults to 1, since the memory of worker processes
+        is not measured.
+
+    Returns
+    -------
+    dict
+        {"meta": {...}, "stages": {stage: {"records", "seconds", "rate", "peak"}}}, where "meta"
+        records the arguments and the versions the figures were measured with, and a match stage also
+        carries "tiershare", the share of its addresses that resolved at the tier they were written
+        for. Suitable for json.dump(), and for compare_benchmarks().
+    """
+    import os
+    import platform
+    import shutil
+    import sqlite3
+    import tempfile
+    import threading
+    import morpc
+
+    if stages is None:
+        stages = list(CONST_BENCHMARK_STAGES)
+    unknown = [stage for stage in stages if stage not in CONST_BENCHMARK_STAGES]
+    if unknown:
+        logger.error("Unknown benchmark stages: {}. Choose from {}.".format(
+            ", ".join(unknown), ", ".join(CONST_BENCHMARK_STAGES)))
+        raise ValueError
+    if repeat < 1:
+        logger.error("repeat must be at least 1.")
+        raise ValueError
+
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix="morpc-benchmark-")
+    results = {"meta": {"points": points, "queries": queries, "seed": seed, "repeat": repeat,
+                        "morpc": morpc.__version__, "python": platform.python_version(),
+                        "sqlite": sqlite3.sqlite_version, "machine": platform.machine(),
+                        "cpus": os.cpu_count()},
+               "stages": {}}
+
+    def record(stage, figures, tier=None):
+        result = figures.pop("result")
+        if tier is not None:
+            resolved = ~result["matched"] if tier == "unmatched" else result["matchtier"] == tier
+            figures["tiershare"] = float(resolved.mean()) if len(result) else None
+        results["stages"][stage] = figures
+        logger.info("{}: {:,.0f} records/s{}".format(
+            stage, figures["rate"] or 0,
+            "" if figures["peak"] is None else ", peak {:,.1f} MB".format(figures["peak"] / 2 ** 20)))
+
+    try:
+        resourcePath = synthetic_addresspoints(directory, points, seed)
+        indexPath = os.path.join(directory, "addresspoints-{}-{}.geocodeindex.sqlite".format(points, seed))
+        source = sqlite3.connect(resourcePath.replace(".resource.json", ".sqlite"))
+        sourceRecords = source.execute("select count(*) from points").fetchone()[0]
+        source.close()
+        if "build" in stages:
+            record("build", _measure(lambda: morpc.build_geocode_index(resourcePath, indexPath, force=True,
+                                                                       workers=workers, fuzzy=True),
+                                     sourceRecords, repeat, memory))
+        else:
+            morpc.build_geocode_index(resourcePath, indexPath, workers=workers, fuzzy=True)
+
+        corpus = synthetic_addresses(queries, points, seed)
+        addresses = corpus["address"].tolist()
+        zipcodes = corpus["zipcode"].tolist()
+        if "parse_address" in stages:
+            record("parse_address", _measure(lambda: [morpc.parse_address(address) for address in addresses],
+                                             len(addresses), repeat, memory))
+        if "parse_address_series" in stages:
+            record("parse_address_series", _measure(lambda: morpc.parse_address_series(addresses),
+                                                    len(addresses), repeat, memory))
+        if "normalize_street_name" in stages:
+            # The words of each address between its house number and its street type, as a registry
+            # would publish its street name field.
+            names = [" ".join(address.split(",")[0].split()[1:-1]) or address for address in addresses]
+            record("normalize_street_name", _measure(lambda: [morpc.normalize_street_name(name) for name in names],
+                                                     len(names), repeat, memory))
+
+        def match(selection, **options):
+            return lambda: morpc.geocode_addresspoints(
+                [addresses[position] for position in selection], None,
+                zipcodes=[zipcodes[position] for position in selection], indexPath=indexPath,
+                interpolate=True, **options)
+
+        for tier in CONST_BENCHMARK_TIERS:
+            if tier in stages:
+                selection = corpus.index[corpus["tier"] == tier].tolist()
+                record(tier, _measure(match(selection), len(selection), repeat, memory), tier)
+        everything = list(range(len(addresses)))
+        if "mixed" in stages:
+            record("mixed", _measure(match(everything), len(everything), repeat, memory))
+        if "mixed_columnar" in stages:
+            morpc.load_geocode_columns(indexPath)
+            record("mixed_columnar", _measure(match(everything, engine="columnar"), len(everything), repeat,
+                                              memory))
+
+        if "query_geocoder" in stages:
+            server = _mock_geocoder_server()
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                endpoint = "http://{}:{}".format(*server.server_address[:2])
+                record("query_geocoder", _measure(lambda: morpc.query_geocoder(addresses, endpoint,
+                                                                               zipcodes=zipcodes),
+                                                  len(addresses), repeat, memory))
+            finally:
+                server.shutdown()
+                server.server_close()
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def compare_benchmarks(results, baseline, tolerance=0.1):
+    """Compare the results of benchmark_geocoding() with those of an earlier run.
+
+    A stage has regressed if its rate has fallen, or its peak memory grown, by more than `tolerance`
+    of the baseline's. Each regression is logged as a warning. Stages the two do not share are left
+    out. Runs of different sizes or seeds measure different data, so comparing them is warned of too.
+
+    Parameters
+    ----------
+    results : dict or str
+        The results, or the path to a JSON file of them.
+    baseline : dict or str
+        The results of the earlier run, or the path to a JSON file of them.
+    tolerance : float
+        Optional. The share of the baseline a figure may move by before it is a regression. Timings
+        on a shared machine vary by several percent from run to run. Defaults to 0.1.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by stage, in the order of CONST_BENCHMARK_STAGES, with the columns rate,
+        baselinerate, ratechange, peak, baselinepeak, peakchange (changes as a share of the baseline,
+        NaN where there is no figure to compare) and regressed.
+    """
+    import json
+    import pandas as pd
+
+    def load(value):
+        if isinstance(value, str):
+            with open(value) as file:
+                return json.load(file)
+        return value
+
+    results = load(results)
+    baseline = load(baseline)
+    if tolerance < 0:
+        logger.error("tolerance must not be negative.")
+        raise ValueError
+    different = [key for key in ("points", "queries", "seed")
+                 if results["meta"].get(key) != baseline["meta"].get(key)]
+    if different:
+        logger.warning("The results and the baseline were measured on different data ({}), so their rates "
+                       "are not comparable.".format(", ".join(different)))
+
+    rows = []
+    for stage in CONST_BENCHMARK_STAGES:
+        if stage not in results["stages"] or stage not in baseline["stages"]:
+            continue
+        current, previous = results["stages"][stage], baseline["stages"][stage]
+        row = {"stage": stage, "rate": current["rate"], "baselinerate": previous["rate"],
+               "peak": current["peak"], "baselinepeak": previous["peak"]}
+        row["ratechange"] = (row["rate"] / row["baselinerate"] - 1
+                             if row["rate"] is not None and row["baselinerate"] else None)
+        row["peakchange"] = (row["peak"] / row["baselinepeak"] - 1
+                             if row["peak"] is not None and row["baselinepeak"] else None)
+        row["regressed"] = ((row["ratechange"] is not None and row["ratechange"] < -tolerance)
+                            or (row["peakchange"] is not None and row["peakchange"] > tolerance))
+        if row["regressed"]:
+            logger.warning("{} has regressed: {:,.0f} records/s against {:,.0f}, peak {} against {}.".format(
+                stage, row["rate"] or 0, row["baselinerate"] or 0,
+                *["{:,.1f} MB".format(peak / 2 ** 20) if peak is not None else "unmeasured"
+                  for peak in (row["peak"], row["baselinepeak"])]))
+        rows.append(row)
+    columns = ["stage", "rate", "baselinerate", "ratechange", "peak", "baselinepeak", "peakchange", "regressed"]
+    comparison = pd.DataFrame(rows, columns=columns).set_index("stage")
+    return comparison.astype({column: float for column in columns[1:-1]}).astype({"regressed": bool})
+
+
+def main(arguments=None):
+    """Run benchmark_geocoding() from the command line. Returns 1 if a stage regressed against the
+    baseline, and 0 otherwise."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog="python -m morpc.benchmark", description=main.__doc__.split(".")[0])
+    parser.add_argument("--points", type=int, default=100000, help="synthetic address points (100,000)")
+    parser.add_argument("--queries", type=int, default=20000, help="synthetic addresses (20,000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data (0)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each stage (3)")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure peak memory")
+    parser.add_argument("--stages", nargs="+", choices=CONST_BENCHMARK_STAGES, help="stages to run (all)")
+    parser.add_argument("--directory", help="where to keep the synthetic data between runs")
+    parser.add_argument("--workers", type=int, default=1, help="processes to build the index in (1)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="change counted as a regression (0.1)")
+    options = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = benchmark_geocoding(options.points, options.queries, options.seed, options.repeat,
+                                  not options.no_memory, options.stages, options.directory, options.workers)
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if options.baseline is None:
+        return 0
+    comparison = compare_benchmarks(results, options.baseline, options.tolerance)
+    print(comparison.to_string(float_format=lambda value: "{:,.3f}".format(value)))
+    return 1 if comparison["regressed"].any() else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
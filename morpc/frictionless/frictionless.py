@@ -19,6 +19,20 @@ import dateutil
 
 logger = logging.getLogger(__name__)
 
+# The strings pandas.read_csv() reads as null by default. The pyarrow CSV reader has its own, shorter list,
+# so it is given this one to keep the two engines in agreement.
+CONST_CSV_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                         '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# The comparison operators accepted in the where argument of load_data(), and their SQL equivalents.
+CONST_WHERE_OPERATORS = {"==": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN", "not in": "NOT IN"}
+
+# The default limit on the total size of the Parquet files in a load_data() cache directory. See load_data().
+CONST_LOAD_DATA_CACHE_MAX_BYTES = 2 * 1024**3
+
+# The suffix of the files in a load_data() cache directory. Only files with it are ever evicted or cleared.
+CONST_LOAD_DATA_CACHE_SUFFIX = ".morpc-cache.parquet"
+
 @contextlib.contextmanager
 def tempWorkingDirectory(dir):
     cwd = getcwd()
@@ -186,177 +200,280 @@ def cast_field_types(df, schema, forceInteger:bool=False, forceInt64:bool=False,
         A copy of the input dataframe with the field types cast according to the schema.
 
     """
-    import morpc
-    import frictionless
-    import pandas as pd
-    import shapely
-    import json
-    import numpy as np
-    import re
-    import math
-    outDF = df.copy()
+    return compile_cast_plan(schema, forceInteger=forceInteger, forceInt64=forceInt64, forceNumber=forceNumber, forceDateTime=forceDateTime,
+                             nullBoolValue=nullBoolValue, handleMissingFields=handleMissingFields,
+                             handleMissingValues=handleMissingValues).apply(df, logLevel=logLevel)
 
-    # If the user has specified an override for the logging level, tell the logger to use that level.
-    # Preserve the original log level so we can restore it later.
-    originalLogLevel = None
-    if logLevel != None:
-        originalLogLevel = logger.level
-        logger.setLevel(logLevel)
 
-    if handleMissingValues:
-        logger.info(f"handleMissingValues set to True, converting {schema.missing_values} to np.nan")
-        for nullValue in schema.missing_values:
-            outDF = outDF.replace(nullValue, None)
+def compile_cast_plan(schema, forceInteger:bool=False, forceInt64:bool=False, forceNumber:bool=False, forceDateTime:Literal['coerce','error']='coerce', nullBoolValue=False, handleMissingFields="error", handleMissingValues=True):
+    """
+    Compile a Frictionless Schema object into a CastPlan that casts any number of dataframes to the data types
+    specified in the schema, with the same results as cast_field_types().
 
-    for field in schema.fields:
-        fieldName = field.name
-        fieldType = field.type 
-        if(not fieldName in df.columns):
-            if(handleMissingFields == "ignore"):
-                logger.info("Skipping field {} which is not present in dataframe".format(fieldName))
-                continue
-            elif(handleMissingFields == "add"):
-                logger.info("Adding field {} which is not present in dataframe".format(fieldName))
-                add_missing_fields(df, schema, fieldNames=fieldName)
-                continue
-            else:
-                logger.error("Field {} is not present in dataframe. To handle missing fields, see argument handleMissingFields.".format(fieldName))
-                raise RuntimeError
-   
-        logger.debug("Casting field {} as type {}.".format(fieldName, fieldType))
-        # The following section is necessary because the pandas "int" type does not support null values.  If null values are present,
-        # the field must be cast as "Int64" instead.
-        if((fieldType == "int") or (fieldType == "integer")):
-            try:
-                if(forceInt64 == True):
-                    # Cast all integer fields as Int64 whether this is necessary or not.  This is useful when trying to merge
-                    # dataframes with mixed int32 and Int64 values.
-                    outDF[fieldName] = outDF[fieldName].astype("Int64")
-                else:
-                    # Try to cast the field as an "int".  This will fail if nulls are present.
-                    outDF[fieldName] = outDF[fieldName].astype("int")
-            except:
-                try:
-                    # Try to cast as "Int64", which supports nulls. This will fail if the fractional part is non-zero.
-                    logger.info("Failed conversion of fieldname {} to type 'int'.  Trying type 'Int64' instead.".format(fieldName))
-                    outDF[fieldName] = outDF[fieldName].astype("Int64")
-                except:
-                    if(forceInteger == True):
-                        # If the user has allowed coercion of the values to integers, then round the values to the ones place prior to 
-                        # converting to "Int64"
-                        logger.warning("Failed conversion of fieldname {} to type 'Int64'.  Trying to round first.".format(fieldName))
-                        outDF[fieldName] = pd.to_numeric(outDF[fieldName], errors='coerce').round(0).astype("Int64")
-                    else:
-                        # If the user has not allow coercion of the values to integers, then throw an error.
-                        logger.error("Unable to coerce value to Int64 type.  Ensure that fractional part of values is zero, or set forceInteger=True")
-                        raise RuntimeError   
-        # If number convert to float          
-        elif(fieldType == "number"):
-            try:
-                outDF[fieldName] = outDF[fieldName].astype("float")
-            except Exception as e:
-                # If conversion fails either force the conversion 
-                if forceNumber == True:
-                    logger.debug(f"forceNumber is set to True, Coercing {fieldName} to numeric.")
-                    outDF[fieldName] = pd.to_numeric(outDF[fieldName], errors='coerce').astype("float")
-                # Or error.
-                else:
-                    logger.error(f"Unable to set {fieldName} to number. Set forceNumber as True to coerce. {e}")
-                    raise ValueError
-        # If date or datetime convert to datetime
-        elif(fieldType == "date" or fieldType == "datetime"):
-            try:
-                # outDF[fieldName] = outDF[fieldName].astype('datetime64[ms]')
-                outDF[fieldName] = [morpc.utils.datetime_from_string(x, errors=forceDateTime) for x in outDF[fieldName]]
-                # outDF[fieldName] = pd.to_datetime(outDF[fieldName], errors='coerce')
-            except Exception as e:
-                logger.error(f"Unable to parse date. {e}")
-                raise ValueError
+    cast_field_types() works out how to handle each field every time it is called. A plan does that once, so
+    it is the better choice when the same schema is applied repeatedly, e.g. to each chunk of a large file.
+
+    Parameters:
+    ----------
+    schema : frictionless.Schema
+        The Frictionless Schema object which defines the desired data types for each field.
 
-        elif(fieldType == "year"):
-            outDF[fieldName] = [pd.to_datetime(x, format='%Y').year if re.match(r'[0-9]{4}',str(x)) else None for x in outDF[fieldName]]
+    forceInteger, forceInt64, forceNumber, forceDateTime, nullBoolValue, handleMissingFields, handleMissingValues
+        Optional. As for cast_field_types().
 
-        elif(fieldType == "geojson"):
-            if not str(outDF[fieldName].dtype) == 'geometry':
-                try:
-                    logger.info(f"Fieldname {fieldName} as geojson. Attempting to convert to geometry.")
-                    outDF[fieldName] = [shapely.geometry.shape(json.loads(x)) for x in outDF[fieldName]]
-                except RuntimeError as r:
-                    logger.error(f"Unable to convert to geometry. {r}")
-                finally:
-                    logger.info(f"Field {fieldName} cast as geometry.")
-
-        elif(fieldType == "boolean"): 
-            if(outDF[fieldName].dtype == "bool"):
-                logger.warning("Field {} already cast as boolean type. Skipping casting for this field.".format(fieldName))
-                continue
-            elif(pd.api.types.is_numeric_dtype(outDF[fieldName])):
-                logger.warning("Field {} is numeric type. Using standard numeric boolean associations. Nulls will be interpreted as {}. To change this, set nullBoolValue.".format(fieldName, nullBoolValue))
-                if(nullBoolValue == True):
-                    outDF[fieldName] = outDF[fieldName].fillna(1)
-                else:
-                    outDF[fieldName] = outDF[fieldName].fillna(0)
-                outDF[fieldName] = outDF[fieldName].astype("bool")
-            elif((outDF[fieldName].dtype == "string") | (outDF[fieldName].dtype == "object")):
-                # If the field is object type, make sure we can interpret it as a string
-                if(outDF[fieldName].dtype == "object"):
-                    try:
-                        outDF[fieldName] = outDF[fieldName].astype("string")
-                    except:
-                        print("morpc.frictionless.cast_field_types | ERROR | Failed to convert field {} from object type to string type prior to interpretation of boolean values.".format(fieldName))
-                        raise RuntimeError
+    Returns:
+    -------
+    plan : CastPlan
+        The compiled plan. Call plan.apply(df) to cast a dataframe.
 
-                print("morpc.frictionless.cast_field_types | WARNING | Field {} is string type. Will interpret using truth values specified in schema (or Frictionless defaults). Nulls will be interpreted as {}. To change this, set nullBoolValue.".format(fieldName, nullBoolValue))
+    """
+    return CastPlan(schema, forceInteger=forceInteger, forceInt64=forceInt64, forceNumber=forceNumber, forceDateTime=forceDateTime,
+                    nullBoolValue=nullBoolValue, handleMissingFields=handleMissingFields, handleMissingValues=handleMissingValues)
+
+
+class CastPlan:
+    """A Frictionless schema compiled for casting dataframes. See compile_cast_plan().
+
+    Each field is resolved to one casting step when the plan is compiled, along with the pandas dtype that
+    step produces (where there is a single one) and, for boolean fields, the map of truth values. Applying
+    the plan then needs no exception-driven probing for the common cases:
+
+      - An integer field is only tried as "int" if it has no nulls, since "int" cannot hold them. Otherwise it
+        goes straight to "Int64".
+      - A column that already has the dtype its step would produce is left as it is.
+
+    The dtypes produced by the most recent apply() are kept in the dtypes attribute.
+    """
+
+    def __init__(self, schema, forceInteger=False, forceInt64=False, forceNumber=False, forceDateTime='coerce', nullBoolValue=False,
+                 handleMissingFields="error", handleMissingValues=True):
+        import pandas as pd
+
+        self.schema = schema
+        self.forceInteger = forceInteger
+        self.forceInt64 = forceInt64
+        self.forceNumber = forceNumber
+        self.forceDateTime = forceDateTime
+        self.nullBoolValue = nullBoolValue
+        self.handleMissingFields = handleMissingFields
+        self.handleMissingValues = handleMissingValues
+        self.missingValues = list(schema.missing_values)
+        self.dtypes = {}
+
+        # Each step is (field, kind, target dtype or None, extra). The target dtype is the one casting would
+        # produce from any input, so a column that already has it can be skipped.
+        self.steps = []
+        for field in schema.fields:
+            fieldType = field.type
+            if((fieldType == "int") or (fieldType == "integer")):
+                step = (field, "integer", pd.api.types.pandas_dtype("Int64" if forceInt64 else "int"), None)
+            elif(fieldType == "number"):
+                step = (field, "number", pd.api.types.pandas_dtype("float"), None)
+            elif(fieldType == "date" or fieldType == "datetime"):
+                step = (field, "datetime", None, None)
+            elif(fieldType == "year"):
+                step = (field, "year", None, None)
+            elif(fieldType == "geojson"):
+                step = (field, "geojson", None, None)
+            elif(fieldType == "boolean"):
                 # The field definition in the schema may contain properties trueValues and/or falseValues which specify what values
                 # represent True and False, respectively. If trueVales or falseValues are unspecified, Frictionless recognizes the 
                 # following values by default:
                 #   trueValues: ['true', 'True', 'TRUE', '1']
                 #   falseValues: ['false', 'False', 'FALSE', '0']
-                trueValues = field.true_values
-                falseValues = field.false_values
-
-                # Map each of the true and false values to the appropriate Python boolean values
                 truthMap = {}
-                for value in trueValues:
+                for value in field.true_values:
                     truthMap[value] = True
-                for value in falseValues:
+                for value in field.false_values:
                     truthMap[value] = False
-
-                # Compare the values found in the field to the set of valid true and false values.  If there are values in the
-                # data that are among the valid values, throw an error.
-                validValuesSet = set(list(truthMap.keys()))
-                foundValuesSet = set(outDF[fieldName].unique())
-                if(foundValuesSet > validValuesSet):
-                    logger.error("Fieldname {0} contains values that are not recognized as true or false: {1}".format(fieldName, ", ".join(list(foundValuesSet-validValuesSet))))
+                step = (field, "boolean", None, truthMap)
+            elif(fieldType == 'any'):
+                step = (field, "any", pd.api.types.pandas_dtype("string"), None)
+            else:
+                step = (field, "astype", None, None)
+            self.steps.append(step)
+
+    def apply(self, df, logLevel=None):
+        """Return a copy of df with the field types cast according to the schema, exactly as cast_field_types() would.
+
+        Parameters:
+        ----------
+        df : pandas.Dataframe
+            The dataframe to apply the data types to.
+
+        logLevel : str or int as defined by logging package.
+            Optional. Temporarily override the default log level, as for cast_field_types().
+
+        Returns:
+        -------
+        outDF : pandas.Dataframe
+            A copy of the input dataframe with the field types cast according to the schema.
+        """
+        # If the user has specified an override for the logging level, tell the logger to use that level.
+        # Preserve the original log level so we can restore it later.
+        originalLogLevel = None
+        if logLevel != None:
+            originalLogLevel = logger.level
+            logger.setLevel(logLevel)
+        try:
+            outDF = self._apply(df)
+        finally:
+            # Restore the original log level, if necessary
+            if(originalLogLevel != None):
+                logger.setLevel(originalLogLevel)
+        return outDF
+
+    def _apply(self, df):
+        import morpc
+        import pandas as pd
+        import shapely
+        import json
+        import re
+
+        outDF = df.copy()
+
+        if self.handleMissingValues:
+            logger.info(f"handleMissingValues set to True, converting {self.missingValues} to np.nan")
+            for nullValue in self.missingValues:
+                outDF = outDF.replace(nullValue, None)
+
+        for (field, kind, targetDtype, truthMap) in self.steps:
+            fieldName = field.name
+            fieldType = field.type
+            if(not fieldName in df.columns):
+                if(self.handleMissingFields == "ignore"):
+                    logger.info("Skipping field {} which is not present in dataframe".format(fieldName))
+                    continue
+                elif(self.handleMissingFields == "add"):
+                    logger.info("Adding field {} which is not present in dataframe".format(fieldName))
+                    add_missing_fields(df, self.schema, fieldNames=fieldName)
+                    continue
+                else:
+                    logger.error("Field {} is not present in dataframe. To handle missing fields, see argument handleMissingFields.".format(fieldName))
                     raise RuntimeError
 
-                # Now that we are confident that all of the values are valid in string form, map them to actual boolean values
-                outDF[fieldName] = outDF[fieldName].map(truthMap)
+            logger.debug("Casting field {} as type {}.".format(fieldName, fieldType))
+            if(targetDtype != None and outDF[fieldName].dtype == targetDtype):
+                # Casting would leave the column as it is.
+                pass
+            elif(kind == "integer"):
+                outDF[fieldName] = self._cast_integer(outDF[fieldName], fieldName)
+            elif(kind == "number"):
+                try:
+                    outDF[fieldName] = outDF[fieldName].astype("float")
+                except Exception as e:
+                    # If conversion fails either force the conversion 
+                    if self.forceNumber == True:
+                        logger.debug(f"forceNumber is set to True, Coercing {fieldName} to numeric.")
+                        outDF[fieldName] = pd.to_numeric(outDF[fieldName], errors='coerce').astype("float")
+                    # Or error.
+                    else:
+                        logger.error(f"Unable to set {fieldName} to number. Set forceNumber as True to coerce. {e}")
+                        raise ValueError
+            elif(kind == "datetime"):
+                try:
+                    outDF[fieldName] = [morpc.utils.datetime_from_string(x, errors=self.forceDateTime) for x in outDF[fieldName]]
+                except Exception as e:
+                    logger.error(f"Unable to parse date. {e}")
+                    raise ValueError
+            elif(kind == "year"):
+                outDF[fieldName] = [pd.to_datetime(x, format='%Y').year if re.match(r'[0-9]{4}',str(x)) else None for x in outDF[fieldName]]
+            elif(kind == "geojson"):
+                if not str(outDF[fieldName].dtype) == 'geometry':
+                    try:
+                        logger.info(f"Fieldname {fieldName} as geojson. Attempting to convert to geometry.")
+                        outDF[fieldName] = [shapely.geometry.shape(json.loads(x)) for x in outDF[fieldName]]
+                    except RuntimeError as r:
+                        logger.error(f"Unable to convert to geometry. {r}")
+                    finally:
+                        logger.info(f"Field {fieldName} cast as geometry.")
+            elif(kind == "boolean"):
+                if(outDF[fieldName].dtype == "bool"):
+                    logger.warning("Field {} already cast as boolean type. Skipping casting for this field.".format(fieldName))
+                    self.dtypes[fieldName] = outDF[fieldName].dtype
+                    continue
+                outDF[fieldName] = self._cast_boolean(outDF[fieldName], field, truthMap)
+            elif(kind == "any"):
+                logger.info(f"Field {fieldName} as type 'any' in schema. This may be due to the schema being produced automatically frictionless.Schema.describe(). Converting to string. ")
+                outDF[fieldName] = outDF[fieldName].astype('string')
+            else:
+                outDF[fieldName] = outDF[fieldName].astype(fieldType)
+            self.dtypes[fieldName] = outDF[fieldName].dtype
+
+        return outDF
 
-                # Fill nulls will the first of the specified true values or false values, depending on the setting of nullBoolValue
-                if(nullBoolValue == True):
-                    outDF[fieldName] = outDF[fieldName].fillna(trueValues[0])
-                else:
-                    outDF[fieldName] = outDF[fieldName].fillna(falseValues[0])
-                outDF[fieldName] = outDF[fieldName].astype("bool")                
-                            
-                # Finally, make the change official by changing the pandas field type to "bool".
-                outDF[fieldName] = outDF[fieldName].astype("bool")
+    def _cast_integer(self, values, fieldName):
+        """Cast a column to "int", or to "Int64" where it has nulls or forceInt64 is set, rounding first if forceInteger is set."""
+        import pandas as pd
+
+        # The pandas "int" type does not support null values. If null values are present, the field must be cast as "Int64" instead.
+        if(not self.forceInt64 and not values.isna().any()):
+            try:
+                return values.astype("int")
+            except Exception:
+                pass
+        try:
+            if(not self.forceInt64):
+                logger.info("Failed conversion of fieldname {} to type 'int'.  Trying type 'Int64' instead.".format(fieldName))
+            # Try to cast as "Int64", which supports nulls. This will fail if the fractional part is non-zero.
+            return values.astype("Int64")
+        except Exception:
+            if(self.forceInteger == True):
+                # If the user has allowed coercion of the values to integers, then round the values to the ones place prior to 
+                # converting to "Int64"
+                logger.warning("Failed conversion of fieldname {} to type 'Int64'.  Trying to round first.".format(fieldName))
+                return pd.to_numeric(values, errors='coerce').round(0).astype("Int64")
             else:
-                logger.error("Field {} is a type that is not currently supported for casting to boolean. Convert it to boolean, numeric, or string types first.".format(fieldName))
+                # If the user has not allow coercion of the values to integers, then throw an error.
+                logger.error("Unable to coerce value to Int64 type.  Ensure that fractional part of values is zero, or set forceInteger=True")
                 raise RuntimeError
-            
-        elif(fieldType == 'any'):
-            logger.info(f"Field {fieldName} as type 'any' in schema. This may be due to the schema being produced automatically frictionless.Schema.describe(). Converting to string. ")
-            outDF[fieldName] = outDF[fieldName].astype('string')
-        else:
-            outDF[fieldName] = outDF[fieldName].astype(fieldType)
 
-    # Restore the original log level, if necessary
-    if(originalLogLevel != None):
-        logger.setLevel(originalLogLevel)
-            
-    return outDF
+    def _cast_boolean(self, values, field, truthMap):
+        """Cast a numeric or string column to "bool", interpreting strings with the field's true and false values."""
+        import pandas as pd
+
+        fieldName = field.name
+        nullBoolValue = self.nullBoolValue
+        if(pd.api.types.is_numeric_dtype(values)):
+            logger.warning("Field {} is numeric type. Using standard numeric boolean associations. Nulls will be interpreted as {}. To change this, set nullBoolValue.".format(fieldName, nullBoolValue))
+            if(nullBoolValue == True):
+                values = values.fillna(1)
+            else:
+                values = values.fillna(0)
+            return values.astype("bool")
+        elif((values.dtype == "string") | (values.dtype == "object")):
+            # If the field is object type, make sure we can interpret it as a string
+            if(values.dtype == "object"):
+                try:
+                    values = values.astype("string")
+                except:
+                    print("morpc.frictionless.cast_field_types | ERROR | Failed to convert field {} from object type to string type prior to interpretation of boolean values.".format(fieldName))
+                    raise RuntimeError
+
+            print("morpc.frictionless.cast_field_types | WARNING | Field {} is string type. Will interpret using truth values specified in schema (or Frictionless defaults). Nulls will be interpreted as {}. To change this, set nullBoolValue.".format(fieldName, nullBoolValue))
+
+            # Compare the values found in the field to the set of valid true and false values.  If there are values in the
+            # data that are among the valid values, throw an error.
+            validValuesSet = set(list(truthMap.keys()))
+            foundValuesSet = set(values.unique())
+            if(foundValuesSet > validValuesSet):
+                logger.error("Fieldname {0} contains values that are not recognized as true or false: {1}".format(fieldName, ", ".join(list(foundValuesSet-validValuesSet))))
+                raise RuntimeError
+
+            # Now that we are confident that all of the values are valid in string form, map them to actual boolean values
+            values = values.map(truthMap)
+
+            # Fill nulls will the first of the specified true values or false values, depending on the setting of nullBoolValue
+            if(nullBoolValue == True):
+                values = values.fillna(field.true_values[0])
+            else:
+                values = values.fillna(field.false_values[0])
+
+            # Finally, make the change official by changing the pandas field type to "bool".
+            return values.astype("bool")
+        else:
+            logger.error("Field {} is a type that is not currently supported for casting to boolean. Convert it to boolean, numeric, or string types first.".format(fieldName))
+            raise RuntimeError
 
 # Given a dataframe and the Frictionless Schema object (see load_schema), add any fields in the schema that
 # are missing in the dataframe.  If fieldNames == None, any fields missing from the schema will be added to the dataframe
@@ -949,7 +1066,501 @@ def resolve_data_path(resource, sourceDir, download=True):
     return os.path.join(sourceDir, resource.path)
 
 
-def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False, forceInt64=False, useSchema="default", sheetName=None, layerName=None, tableName=None, driverName=None, targetCRS=None, lineEnds: Literal['\n', '\b\n'] = '\b\n'):
+def _check_where(where):
+    """Raise if a where argument is not a list of (column, operator, value) conditions."""
+    for condition in where:
+        if(not isinstance(condition, (list, tuple)) or len(condition) != 3):
+            logger.error("Each where condition must be a (column, operator, value) tuple, not {}".format(condition))
+            raise ValueError
+        (column, operator, value) = condition
+        if(operator not in CONST_WHERE_OPERATORS):
+            logger.error("Unknown where operator '{}'. Use one of {}.".format(operator, list(CONST_WHERE_OPERATORS)))
+            raise ValueError
+        if(operator in ["in", "not in"] and (isinstance(value, str) or len(value) == 0)):
+            logger.error("The value for where operator '{}' must be a non-empty list, not {}".format(operator, value))
+            raise ValueError
+        if(value is None or (operator not in ["in", "not in"] and not isinstance(value, (str, int, float)))):
+            logger.error("Unsupported value in where condition {}".format(condition))
+            raise ValueError
+
+
+def _sql_literal(value):
+    """Return a string, number or boolean as a SQL literal."""
+    if(isinstance(value, bool)):
+        return "1" if value else "0"
+    if(isinstance(value, str)):
+        return "'{}'".format(value.replace("'", "''"))
+    return repr(value)
+
+
+def _where_to_sql(where):
+    """Return a list of (column, operator, value) conditions as a SQL WHERE clause that matches rows meeting all of
+    them. As in SQL, a null value meets no condition."""
+    clauses = []
+    for (column, operator, value) in where:
+        if(operator in ["in", "not in"]):
+            value = "({})".format(", ".join(_sql_literal(item) for item in value))
+        else:
+            value = _sql_literal(value)
+        clauses.append('"{}" {} {}'.format(column.replace('"', '""'), CONST_WHERE_OPERATORS[operator], value))
+    return " AND ".join(clauses)
+
+
+def _where_mask(data, where):
+    """Return a boolean array marking the rows of a DataFrame that meet every (column, operator, value) condition.
+    A null value meets no condition, which is how the conditions behave when evaluated in SQL."""
+    import numpy as np
+    import operator as op
+
+    comparisons = {"==": op.eq, "!=": op.ne, "<": op.lt, "<=": op.le, ">": op.gt, ">=": op.ge}
+    mask = np.ones(len(data), dtype=bool)
+    for (column, operator, value) in where:
+        if(column not in data.columns):
+            logger.error("Column {} in where condition is not present in the data.".format(column))
+            raise RuntimeError
+        values = data[column]
+        if(operator == "in"):
+            matches = values.isin(value)
+        elif(operator == "not in"):
+            matches = ~values.isin(value)
+        else:
+            matches = comparisons[operator](values, value)
+        mask &= matches.fillna(False).to_numpy(dtype=bool) & values.notna().to_numpy()
+    return mask
+
+
+def _where_mask_arrow(table, where):
+    """Return a pyarrow boolean array marking the rows of a pyarrow Table that meet every (column, operator, value)
+    condition, with the same null handling as _where_mask()."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    comparisons = {"==": pc.equal, "!=": pc.not_equal, "<": pc.less, "<=": pc.less_equal, ">": pc.greater, ">=": pc.greater_equal}
+    mask = None
+    for (column, operator, value) in where:
+        values = table.column(column)
+        if(operator == "in"):
+            matches = pc.is_in(values, value_set=pa.array(value, values.type))
+        elif(operator == "not in"):
+            matches = pc.invert(pc.is_in(values, value_set=pa.array(value, values.type)))
+        else:
+            matches = comparisons[operator](values, pa.scalar(value, values.type))
+        matches = pc.and_(pc.is_valid(values), pc.fill_null(matches, False))
+        mask = matches if mask is None else pc.and_(mask, matches)
+    return mask
+
+
+def _select_schema_fields(schema, names):
+    """Return a copy of a schema with only the named fields, in the order they appear in the schema."""
+    import frictionless
+
+    descriptor = schema.to_descriptor()
+    descriptor["fields"] = [field for field in descriptor["fields"] if field["name"] in names]
+    # Keys may refer to fields that are not selected.
+    descriptor.pop("primaryKey", None)
+    descriptor.pop("foreignKeys", None)
+    return frictionless.Schema.from_descriptor(descriptor)
+
+
+def _read_csv_pyarrow(path, schema, forceInteger=False, forceInt64=False, asArrow=False, columns=None, where=None):
+    """Read a CSV file with the multithreaded pyarrow CSV reader, casting each column straight to the type
+    its schema field declares.
+
+    Every column is read as strings and then cast in Arrow, so values never pass through Python string
+    objects. Integer, number, string and any fields are cast this way. A field of another type, or one whose
+    values Arrow refuses to cast (e.g. "1.0" in an integer field), falls back to cast_field_types() on just
+    that column, so the result is the same as reading with pandas.read_csv(dtype="str") and casting the whole
+    frame.
+
+    If columns is given, only those columns (and any named in where) are read, and only those columns are
+    returned, in that order. If where is given, only the rows meeting its conditions are returned. Where the
+    conditions are on columns cast in Arrow, the rows are selected before any column falls back to
+    cast_field_types().
+
+    Returns None if the file is one the pyarrow reader cannot read the way pandas does (e.g. an empty file,
+    duplicate column names or ragged rows), in which case the caller should read it with pandas instead.
+    Otherwise returns a pandas DataFrame, or a pyarrow Table if asArrow is True.
+    """
+    import csv
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv
+
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), [])
+    except (UnicodeDecodeError, csv.Error):
+        return None
+    if(len(header) == 0 or "" in header or len(set(header)) != len(header)):
+        return None
+    where = [] if where == None else where
+    if(columns != None or len(where) > 0):
+        wanted = set(header if columns == None else columns).union(condition[0] for condition in where)
+        header = [name for name in header if name in wanted]
+
+    nullValues = list(CONST_CSV_NULL_VALUES)
+    if(schema != None):
+        nullValues += [value for value in schema.missing_values if value not in nullValues]
+    try:
+        table = pyarrow.csv.read_csv(path,
+            read_options=pyarrow.csv.ReadOptions(use_threads=True),
+            parse_options=pyarrow.csv.ParseOptions(newlines_in_values=True),
+            convert_options=pyarrow.csv.ConvertOptions(column_types={name: pa.string() for name in header}, include_columns=header,
+                null_values=nullValues, strings_can_be_null=True, quoted_strings_can_be_null=True))
+    except pa.ArrowInvalid:
+        return None
+
+    stringDtype = pd.api.types.pandas_dtype("string")
+    fields = {} if schema == None else {field.name: field for field in schema.fields}
+    columnsCast = {}
+    fallback = []
+    for field in fields.values():
+        if(field.name not in header):
+            fallback.append(field)
+            continue
+        values = table.column(field.name)
+        try:
+            if(field.type in ["int", "integer"]):
+                columnsCast[field.name] = pc.cast(values, pa.int64())
+            elif(field.type == "number"):
+                columnsCast[field.name] = pc.cast(values, pa.float64())
+            elif(field.type in ["string", "any"]):
+                columnsCast[field.name] = values
+            else:
+                fallback.append(field)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            logger.debug("Field {} could not be cast as type {} by pyarrow. Casting it with cast_field_types().".format(field.name, field.type))
+            fallback.append(field)
+
+    if(len(where) > 0 and all(condition[0] in columnsCast for condition in where)):
+        try:
+            mask = _where_mask_arrow(pa.table({condition[0]: columnsCast[condition[0]] for condition in where}), where)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            # e.g. a string value compared with an integer column. Leave the comparison to pandas below.
+            mask = None
+        if(mask is not None):
+            table = table.filter(mask)
+            columnsCast = {name: values.filter(mask) for (name, values) in columnsCast.items()}
+            where = []
+
+    cast = None
+    if(len(fallback) > 0):
+        # A schema field missing from the file is passed along too, so cast_field_types() reports it as usual.
+        subSchema = frictionless.Schema.from_descriptor({"fields": [field.to_descriptor() for field in fallback],
+                                                         "missingValues": schema.missing_values})
+        present = [field.name for field in fallback if field.name in header]
+        cast = cast_field_types(table.select(present).to_pandas(), subSchema, forceInteger=forceInteger, forceInt64=forceInt64)
+
+    if(asArrow):
+        import shapely
+        arrays = []
+        for name in header:
+            if(cast is not None and name in cast.columns):
+                if(fields[name].type == "geojson"):
+                    arrays.append(pa.array(shapely.to_wkb(cast[name].to_numpy()), pa.binary()))
+                else:
+                    arrays.append(pa.Array.from_pandas(cast[name]))
+            else:
+                arrays.append(columnsCast.get(name, table.column(name)))
+        data = pa.table(arrays, names=header)
+        if(len(where) > 0):
+            data = data.filter(pa.array(_where_mask(data.select([condition[0] for condition in where if condition[0] in header]).to_pandas(), where)))
+        return data if columns == None else data.select([name for name in columns if name in header])
+
+    data = {}
+    for name in header:
+        if(cast is not None and name in cast.columns):
+            data[name] = cast[name]
+        elif(name in columnsCast and pa.types.is_int64(columnsCast[name].type)):
+            if(forceInt64 or columnsCast[name].null_count > 0):
+                data[name] = columnsCast[name].to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+            else:
+                data[name] = columnsCast[name].to_pandas()
+        elif(name in columnsCast and pa.types.is_string(columnsCast[name].type)):
+            data[name] = columnsCast[name].to_pandas(types_mapper={pa.string(): stringDtype}.get)
+        else:
+            data[name] = columnsCast.get(name, table.column(name)).to_pandas()
+    data = pd.DataFrame(data)
+    if(len(where) > 0):
+        data = data[_where_mask(data, where)].reset_index(drop=True)
+    return data if columns == None else data[[name for name in columns if name in header]]
+
+
+def _data_to_arrow(data):
+    """Return a DataFrame or GeoDataFrame as a pyarrow Table, with any geometry encoded as WKB."""
+    import pyarrow as pa
+    import geopandas as gpd
+
+    if(isinstance(data, pa.Table)):
+        return data
+    if(isinstance(data, gpd.GeoDataFrame)):
+        return pa.table(data.to_arrow(index=False, geometry_encoding="WKB"))
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def _load_data_cache_path(cacheDir, resource, dataPath, dataHash, schema, options):
+    """Return the path of the Parquet file that caches the cast data for a resource.
+
+    The file name is derived from a digest of everything that determines the cast data: the content of the
+    data file, the schema and the options that control reading and casting. Any change to one of them gives
+    a different file, so an entry never has to be checked for staleness. The resource name is kept as a
+    prefix so that clear_load_data_cache() can find the entries for one resource.
+    """
+    import os
+    import json
+    import hashlib
+    import morpc
+
+    if(dataHash == None):
+        dataHash = _compute_hash(dataPath)
+    key = {
+        "data": dataHash,
+        "bytes": os.path.getsize(dataPath),
+        "schema": None if schema == None else schema.to_descriptor(),
+        "options": options,
+        "version": morpc.__version__,
+    }
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cacheDir, "{}-{}{}".format(resource.name, digest, CONST_LOAD_DATA_CACHE_SUFFIX))
+
+
+def _load_data_cache_entry(name):
+    """Return the resource name of a load_data() cache entry given its file name, or None if the file is not one.
+
+    Only files named as _load_data_cache_path() names them are treated as entries, so that other files in the cache
+    directory are never evicted or cleared.
+    """
+    import re
+
+    match = re.fullmatch(r"(.+)-[0-9a-f]{32}" + re.escape(CONST_LOAD_DATA_CACHE_SUFFIX), name)
+    return None if match == None else match.group(1)
+
+
+def _read_load_data_cache(cachePath):
+    """Return the data cached at cachePath, or None if there is no usable entry."""
+    import os
+    import pandas as pd
+    import geopandas as gpd
+    import pyarrow.parquet
+
+    if(not os.path.exists(cachePath)):
+        return None
+    try:
+        metadata = pyarrow.parquet.read_schema(cachePath).metadata or {}
+        if(b"geo" in metadata):
+            data = gpd.read_parquet(cachePath, memory_map=True)
+        else:
+            data = pd.read_parquet(cachePath, memory_map=True)
+    except Exception as e:
+        logger.warning("Unable to read cached data at {}. Removing it. {}".format(cachePath, e))
+        os.remove(cachePath)
+        return None
+    # Eviction removes the least recently used entries first, so mark this one as used.
+    os.utime(cachePath)
+    return data
+
+
+def _write_load_data_cache(data, cachePath, cacheMaxBytes):
+    """Write cast data to the cache, then evict the least recently used entries until the cache fits in
+    cacheMaxBytes.
+
+    Object columns (e.g. "year" fields, or "geojson" fields outside a GeoDataFrame) do not come back from
+    Parquet with the dtype they were written with, so data with any such column is not cached.
+    """
+    import os
+    import pandas as pd
+    import geopandas as gpd
+
+    geometryColumns = list(data.columns[data.dtypes == "geometry"]) if isinstance(data, gpd.GeoDataFrame) else []
+    objectColumns = [column for column in data.columns if column not in geometryColumns and pd.api.types.is_object_dtype(data[column])]
+    if(len(objectColumns) > 0):
+        logger.info("Not caching data because column(s) {} would not be restored with the same type.".format(objectColumns))
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(cachePath)), exist_ok=True)
+    # Write to a temporary file and move it into place so that an interrupted write never leaves a
+    # truncated entry behind.
+    temporaryPath = "{}.{}.tmp".format(cachePath, os.getpid())
+    try:
+        data.to_parquet(temporaryPath, index=False)
+        os.replace(temporaryPath, cachePath)
+    except Exception as e:
+        logger.warning("Unable to cache data at {}. {}".format(cachePath, e))
+        if(os.path.exists(temporaryPath)):
+            os.remove(temporaryPath)
+        return
+    logger.info("Cached cast data at {}".format(cachePath))
+
+    entries = [os.path.join(os.path.dirname(cachePath), name) for name in os.listdir(os.path.dirname(cachePath)) if _load_data_cache_entry(name) != None]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    totalBytes = 0
+    for entry in entries:
+        totalBytes += os.path.getsize(entry)
+        if(totalBytes > cacheMaxBytes and entry != cachePath):
+            logger.info("Evicting cached data at {} to keep the cache under {} bytes.".format(entry, cacheMaxBytes))
+            os.remove(entry)
+
+
+def clear_load_data_cache(cacheDir, resourcePath=None):
+    """Remove cast data cached by load_data() from a cache directory.
+
+    Entries are never stale, since each is keyed by the content of the data, the schema and the casting
+    options, but removing them frees space or forces the data to be read from source again. Other files in the
+    directory are left alone.
+
+    Parameters
+    ----------
+    cacheDir : str
+        The cache directory that was given to load_data().
+    resourcePath : str
+        Optional. The path to a Frictionless Resource file. If specified, remove only the entries for that
+        resource. Otherwise, remove every entry in the directory.
+
+    Returns
+    -------
+    removed : int
+        The number of entries removed.
+    """
+    import os
+
+    if(not os.path.isdir(cacheDir)):
+        return 0
+    resourceName = None if resourcePath == None else load_resource(resourcePath).name
+    removed = 0
+    for name in os.listdir(cacheDir):
+        entryResourceName = _load_data_cache_entry(name)
+        if(entryResourceName != None and (resourceName == None or entryResourceName == resourceName)):
+            os.remove(os.path.join(cacheDir, name))
+            removed += 1
+    logger.info("Removed {} cached entries from {}".format(removed, cacheDir))
+    return removed
+
+
+def _sqlite_table_name(resource, tableName):
+    """Return the table to read from a SQLite resource: tableName if given, otherwise the table named in the
+    resource's SQL control."""
+    if(tableName == None):
+        # Fall back to the table name stored in the resource's SQL control, if present.
+        sqlControl = resource.dialect.get_control("sql") if resource.dialect.has_control("sql") else None
+        if(sqlControl != None and sqlControl.table != None):
+            tableName = sqlControl.table
+            logger.info("Table name not specified. Using table name from resource SQL control: {}".format(tableName))
+        else:
+            logger.error("No table name available. Specify tableName or include a SQL control with a table name in the resource.")
+            raise RuntimeError
+    return tableName
+
+
+def _select_sqlite_schema_fields(data, schema, tableName, geometryColumn):
+    """Return the columns of data read from a SQLite table that are described by the schema, named as in the schema.
+
+    SQLite stores column names in lowercase while Frictionless schemas often use camelCase. Once the data is loaded
+    (whether as a tabular DataFrame or a spatial GeoDataFrame), select only the fields described by the schema
+    (matching column names case-insensitively) and restore each column to the casing used in the schema. For
+    spatial data, the geometry column is retained and renamed to "geometry".
+    """
+    lowerToActual = {column.lower(): column for column in data.columns}
+    renameMap = {}
+    for field in schema.fields:
+        actualColumn = lowerToActual.get(field.name.lower())
+        if(actualColumn == None):
+            logger.error("Schema field '{}' not found in SQLite table '{}'.".format(field.name, tableName))
+            raise RuntimeError
+        renameMap[actualColumn] = field.name
+    keepColumns = list(renameMap.keys())
+    if(geometryColumn != None):
+        renameMap[geometryColumn] = "geometry"
+        keepColumns.append(geometryColumn)
+    data = data[keepColumns].rename(columns=renameMap)
+    if(geometryColumn != None):
+        data = data.set_geometry("geometry")
+    return data
+
+
+def _select_columns(data, columns):
+    """Return the named columns of a DataFrame, in that order, along with the geometry column of a GeoDataFrame.
+    A pyarrow Table is only checked, since the CSV reader has already selected its columns."""
+    import pandas as pd
+    import geopandas as gpd
+
+    available = list(data.columns) if isinstance(data, pd.DataFrame) else data.column_names
+    missingColumns = [column for column in columns if column not in available]
+    if(len(missingColumns) > 0):
+        logger.error("Column(s) {} are not present in the data.".format(missingColumns))
+        raise RuntimeError
+    if(isinstance(data, pd.DataFrame) and list(data.columns) != list(columns)):
+        keepColumns = list(columns)
+        if(isinstance(data, gpd.GeoDataFrame) and data.geometry.name not in keepColumns):
+            keepColumns.append(data.geometry.name)
+        data = data[keepColumns]
+    return data
+
+
+def _iter_data_chunks(path, dataFileExtension, tableName, schema, chunkSize, forceInteger=False, forceInt64=False, targetCRS=None,
+                      columns=None, readColumns=None, where=None, asArrow=False):
+    """Yield the data in a CSV file or SQLite table as schema-cast chunks of at most chunkSize rows.
+
+    CSV files are read with pandas.read_csv(dtype="str", chunksize=chunkSize) and SQLite tables with a chunked query,
+    and each chunk is cast with a plan compiled from the schema once (see compile_cast_plan()). The where conditions are evaluated in SQL for SQLite and on each
+    cast chunk for CSV, and chunks left with no rows are skipped. The index of each chunk continues from the last, so
+    concatenating the chunks gives the same rows as loading the data whole. Integer fields are cast to "Int64" in every chunk
+    regardless of forceInt64, so a field has the same dtype in each chunk.
+    """
+    import sqlite3
+    import pandas as pd
+    import geopandas as gpd
+
+    con = None
+    geometryColumn = None
+    if(dataFileExtension == ".csv"):
+        reader = pd.read_csv(path, dtype="str", chunksize=chunkSize, usecols=None if readColumns == None else (lambda column: column in readColumns))
+    else:
+        con = sqlite3.connect(path)
+        geometryColumn = _detect_sqlite_geometry_column(con, tableName)
+        if(readColumns == None):
+            selection = "*"
+        else:
+            selection = ", ".join('"{}"'.format(column) for column in readColumns + ([geometryColumn] if geometryColumn != None else []))
+        query = 'SELECT {} FROM "{}"'.format(selection, tableName)
+        if(where):
+            query = "{} WHERE {}".format(query, _where_to_sql(where))
+        if(geometryColumn != None):
+            logger.info("Detected geometry column '{}' in SQLite table '{}'. Loading as spatial data.".format(geometryColumn, tableName))
+            # As in morpc.load_spatial_data(), WKB geometry carries no CRS, so assume epsg:4326 on read.
+            reader = gpd.read_postgis(query, con, geom_col=geometryColumn, crs="epsg:4326", chunksize=chunkSize)
+        else:
+            reader = pd.read_sql_query(query, con, chunksize=chunkSize)
+
+    # Every chunk is cast with the same schema, so compile it once. Integer fields are always cast to "Int64", since whether a
+    # chunk has nulls would otherwise decide between "int" and "Int64" chunk by chunk.
+    castPlan = None if schema == None else compile_cast_plan(schema, forceInteger=forceInteger, forceInt64=True)
+    try:
+        rowsYielded = 0
+        for chunk in reader:
+            if(geometryColumn != None and targetCRS != None):
+                chunk = chunk.to_crs(targetCRS)
+            if(schema != None):
+                if(dataFileExtension == ".sqlite"):
+                    chunk = _select_sqlite_schema_fields(chunk, schema, tableName, geometryColumn)
+                chunk = castPlan.apply(chunk, logLevel="WARNING")
+            if(where and dataFileExtension == ".csv"):
+                chunk = chunk[_where_mask(chunk, where)]
+            if(columns != None):
+                chunk = _select_columns(chunk, columns)
+            if(len(chunk) == 0):
+                continue
+            chunk.index = pd.RangeIndex(rowsYielded, rowsYielded + len(chunk))
+            rowsYielded += len(chunk)
+            yield _data_to_arrow(chunk) if asArrow else chunk
+    finally:
+        if(dataFileExtension == ".csv"):
+            reader.close()
+        else:
+            con.close()
+
+
+def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False, forceInt64=False, useSchema="default", sheetName=None, layerName=None, tableName=None, driverName=None, targetCRS=None, lineEnds: Literal['\n', '\b\n'] = '\b\n', engine: Literal['pyarrow', 'pandas'] = 'pyarrow', asArrow=False, cacheDir=None, cacheMaxBytes=CONST_LOAD_DATA_CACHE_MAX_BYTES, columns=None, where=None, chunkSize=None):
     """Often we want to make a copy of some input data and work with the copy, for example to protect 
     the original data or to create an archival copy of it so that we can replicate the process later.  
     The `load_data()` function simplifies the process of reading the data and 
@@ -994,11 +1605,49 @@ def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False,
         "epsg:4326" on read. If None (the default), the data's native CRS is returned without reprojection. See morpc.load_spatial_data.
     lineEnds : ['\n', '\b\n']
         The type of line end separator to use for the data. If does not match, try to convert. Defaults to '\b\n'
+    engine : ['pyarrow', 'pandas']
+        Optional. The engine used to read CSV data. "pyarrow" (the default) reads the file with the multithreaded pyarrow CSV
+        reader and casts each column directly to the type declared in the schema, falling back to cast_field_types() for any
+        column it cannot cast. "pandas" reads every column as strings with pandas.read_csv() and then casts the whole frame
+        with cast_field_types(). Both produce the same data. Ignored for other formats.
+    asArrow : bool
+        Optional. If True, return the data as a pyarrow Table rather than a pandas DataFrame. Spatial data is returned with
+        its geometry encoded as WKB. Defaults to False.
+    cacheDir : str
+        Optional. The path to a directory in which to cache the cast data as Parquet (GeoParquet for spatial data). Later
+        calls with the same data, schema and options read the cached copy instead of reading and casting the source again.
+        The data is identified by the hash recorded in the resource when the file has been verified against it (i.e. a
+        downloaded or _cache copy) and otherwise by hashing the file. Data with object columns is not cached because they
+        are not restored with the same type. Entries are named "<resource name>-<digest>.morpc-cache.parquet", and no
+        other file in the directory is ever removed. Use clear_load_data_cache() to remove entries. If None (the default),
+        nothing is cached.
+    cacheMaxBytes : int
+        Optional. The total size to which the cache directory is held. When it is exceeded, the least recently used entries
+        are removed. Only cache entries count toward it. Defaults to CONST_LOAD_DATA_CACHE_MAX_BYTES (2 GiB).
+    columns : list of str
+        Optional. The names of the columns to load, in the order they should be returned. Only these columns are read where the
+        format allows it (SQLite, CSV, Excel and spatial files) and only their schema fields are cast. The geometry column of
+        spatial data is always included. If None (the default), all columns are loaded.
+    where : list of tuple
+        Optional. Conditions of the form (column, operator, value) that a row must all meet to be loaded, e.g.
+        [("county", "==", "Franklin"), ("units", ">", 0)]. The operator is one of "==", "!=", "<", "<=", ">", ">=", "in" and
+        "not in", the last two taking a list of values. For SQLite and spatial files the conditions are evaluated by the data
+        source in SQL; for CSV files they are evaluated on the cast columns, before any column is cast with cast_field_types()
+        where possible; for Excel files they are evaluated after casting. As in SQL, a null value meets no condition. The
+        columns named need not be among those in columns. If None (the default), all rows are loaded.
+    chunkSize : int
+        Optional. If specified, return an iterator over the data in chunks of at most this many rows rather than loading it
+        whole, for data too large to fit in memory. Supported for CSV and SQLite resources. The resource is resolved, verified,
+        archived and validated up front; the data is read and each chunk cast with cast_field_types() as the iterator is
+        consumed. The index of each chunk continues from the last. Integer fields are always "Int64" in chunk mode, as if
+        forceInt64 were set, so that a field has the same dtype in every chunk whether or not that chunk has nulls. Cannot be
+        combined with cacheDir. Defaults to None.
 
     Returns
     -------
-    data : pandas.core.frame.DataFrame or geopandas.geodataframe.GeoDataFrame
-        A pandas DataFrame or geopandas GeoDataframe constructed from the data at the location specified by sourcePath and layerName
+    data : pandas.core.frame.DataFrame, geopandas.geodataframe.GeoDataFrame, pyarrow.Table or iterator
+        A pandas DataFrame or geopandas GeoDataframe constructed from the data at the location specified by sourcePath and layerName,
+        or a pyarrow Table if asArrow is True. If chunkSize is specified, an iterator over such chunks.
     resource : frictionless.resources.table.TableResource
         A Frictionless TableResource object which describes the data
     schema : frictionless.schema.schema.Schema
@@ -1014,6 +1663,22 @@ def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False,
     import shutil
     import tempfile
 
+    if(engine not in ["pyarrow", "pandas"]):
+        logger.error("Unknown CSV engine: {}. Use 'pyarrow' or 'pandas'.".format(engine))
+        raise ValueError
+    if(isinstance(columns, str)):
+        logger.error("columns must be a list of column names, not a string.")
+        raise ValueError
+    if(where != None):
+        _check_where(where)
+    if(chunkSize != None):
+        if(not isinstance(chunkSize, int) or chunkSize < 1):
+            logger.error("chunkSize must be a positive number of rows, not {}.".format(chunkSize))
+            raise ValueError
+        if(cacheDir != None):
+            logger.error("Data loaded in chunks cannot be cached. Specify chunkSize or cacheDir, not both.")
+            raise ValueError
+
     # os.path.normpath() collapses "https://" to "https:/", which then fails to parse as a URL at
     # all -- skip it for a URL resourcePath (e.g. a RELEASE_URL env var pointing directly at a
     # released *.resource.yaml*, the shape morpc-addresspoints-geocoder's pin-then-redeploy .env
@@ -1120,11 +1785,58 @@ def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False,
             logger.error("Validation failed. Errors should be described above.")    
             raise RuntimeError
       
+    # Read the selected columns along with any the where conditions refer to, and cast only those. Where the data source
+    # can evaluate the conditions itself, pass them along as SQL so that only the matching rows are read.
+    readColumns = None
+    castSchema = schema
+    if(columns != None):
+        readColumns = list(dict.fromkeys([*columns, *[condition[0] for condition in where or []]]))
+        if(schema != None):
+            castSchema = _select_schema_fields(schema, readColumns)
+
+    if(chunkSize != None):
+        if(dataFileExtension == ".sqlite"):
+            tableName = _sqlite_table_name(resource, tableName)
+        elif(dataFileExtension != ".csv"):
+            logger.error("Loading data in chunks is supported for CSV and SQLite resources only, not {}.".format(dataFileExtension))
+            raise ValueError
+        logger.info("Loading data in chunks of up to {} rows.".format(chunkSize))
+        chunks = _iter_data_chunks(targetData, dataFileExtension, tableName, None if useSchema == None else castSchema, chunkSize,
+                                   forceInteger=forceInteger, forceInt64=forceInt64, targetCRS=targetCRS, columns=columns,
+                                   readColumns=readColumns, where=where, asArrow=asArrow)
+        return chunks, resource, schema
+
+    cachePath = None
+    if(cacheDir != None):
+        verified = resource.hash != None and os.path.abspath(sourceDataPath) != os.path.abspath(os.path.join(sourceDir, resource.path))
+        cacheOptions = {"forceInteger": forceInteger, "forceInt64": forceInt64, "sheetName": sheetName, "layerName": layerName,
+                        "tableName": tableName, "driverName": driverName, "targetCRS": targetCRS, "columns": columns, "where": where}
+        cachePath = _load_data_cache_path(cacheDir, resource, targetData, resource.hash if verified else None, schema, cacheOptions)
+        data = _read_load_data_cache(cachePath)
+        if(data is not None):
+            logger.info("Loaded cast data from cache at {}".format(cachePath))
+            return (_data_to_arrow(data) if asArrow else data), resource, schema
+
+    whereSQL = _where_to_sql(where) if where else None
+    filtered = not where
+
     logger.info("Loading data.")          
+    alreadyCast = False
     if(dataFileExtension == ".csv"):
-        data = pd.read_csv(targetData, dtype="str")
+        if(engine == "pyarrow"):
+            # A table read as Arrow is not cached, so read a DataFrame when caching and convert it afterward.
+            data = _read_csv_pyarrow(targetData, castSchema, forceInteger=forceInteger, forceInt64=forceInt64, asArrow=(asArrow and cachePath == None),
+                                     columns=columns, where=where)
+            if(data is None):
+                logger.info("Unable to read the CSV file with the pyarrow engine. Reading it with pandas instead.")
+            else:
+                # The columns have already been cast to the types in the schema and the rows selected.
+                alreadyCast = True
+                filtered = True
+        if(not alreadyCast):
+            data = pd.read_csv(targetData, dtype="str", usecols=None if readColumns == None else (lambda column: column in readColumns))
     elif(dataFileExtension == ".xlsx"):
-        data = pd.read_excel(targetData, sheet_name=sheetName)
+        data = pd.read_excel(targetData, sheet_name=sheetName, usecols=None if readColumns == None else (lambda column: column in readColumns))
     elif(dataFileExtension == ".gpkg"):
         if(layerName == None):
             # Fall back to the layer name stored in the resource's gpkg control, if present.
@@ -1132,20 +1844,14 @@ def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False,
             if(gpkgControl != None and gpkgControl.layer != None):
                 layerName = gpkgControl.layer
                 logger.info("Layer name not specified. Using layer name from resource gpkg control: {}".format(layerName))
-        data = morpc.load_spatial_data(targetData, layerName=layerName, driverName=driverName)
+        data = morpc.load_spatial_data(targetData, layerName=layerName, driverName=driverName, columns=readColumns, where=whereSQL)
+        filtered = True
     elif(dataFileExtension in [".shp",".geojson",".gdb"]):
-        data = morpc.load_spatial_data(targetData, layerName=layerName, driverName=driverName)
+        data = morpc.load_spatial_data(targetData, layerName=layerName, driverName=driverName, columns=readColumns, where=whereSQL)
+        filtered = True
     elif(dataFileExtension == ".sqlite"):
         import sqlite3
-        if(tableName == None):
-            # Fall back to the table name stored in the resource's SQL control, if present.
-            sqlControl = resource.dialect.get_control("sql") if resource.dialect.has_control("sql") else None
-            if(sqlControl != None and sqlControl.table != None):
-                tableName = sqlControl.table
-                logger.info("Table name not specified. Using table name from resource SQL control: {}".format(tableName))
-            else:
-                logger.error("No table name available. Specify tableName or include a SQL control with a table name in the resource.")
-                raise RuntimeError
+        tableName = _sqlite_table_name(resource, tableName)
         con = sqlite3.connect(targetData)
         try:
             # A spatial SQLite database stores geometry as raw WKB in a BLOB column with no metadata to
@@ -1157,43 +1863,42 @@ def load_data(resourcePath, archiveDir=None, validate=False, forceInteger=False,
 
         if(geometryColumn != None):
             logger.info("Detected geometry column '{}' in SQLite table '{}'. Loading as spatial data.".format(geometryColumn, tableName))
-            data = morpc.load_spatial_data(targetData, layerName=tableName, driverName="SQLite", geometryColumn=geometryColumn, targetCRS=targetCRS)
+            data = morpc.load_spatial_data(targetData, layerName=tableName, driverName="SQLite", geometryColumn=geometryColumn, targetCRS=targetCRS,
+                                           columns=readColumns, where=whereSQL)
         else:
+            selection = "*" if readColumns == None else ", ".join('"{}"'.format(column) for column in readColumns)
+            query = 'SELECT {} FROM "{}"'.format(selection, tableName)
+            if(whereSQL != None):
+                query = "{} WHERE {}".format(query, whereSQL)
             con = sqlite3.connect(targetData)
             try:
-                data = pd.read_sql_query('SELECT * FROM "{}"'.format(tableName), con)
+                data = pd.read_sql_query(query, con)
             finally:
                 con.close()
+        filtered = True
 
-        # SQLite stores column names in lowercase while Frictionless schemas often use camelCase. Now that
-        # the data is loaded (whether as a tabular DataFrame or a spatial GeoDataFrame), select only the
-        # fields described by the schema (matching column names case-insensitively) and restore each column
-        # to the casing used in the schema. For spatial data, the geometry column is retained and renamed
-        # to "geometry".
-        if(schema != None):
-            lowerToActual = {column.lower(): column for column in data.columns}
-            renameMap = {}
-            for field in schema.fields:
-                actualColumn = lowerToActual.get(field.name.lower())
-                if(actualColumn == None):
-                    logger.error("Schema field '{}' not found in SQLite table '{}'.".format(field.name, tableName))
-                    raise RuntimeError
-                renameMap[actualColumn] = field.name
-            keepColumns = list(renameMap.keys())
-            if(geometryColumn != None):
-                renameMap[geometryColumn] = "geometry"
-                keepColumns.append(geometryColumn)
-            data = data[keepColumns].rename(columns=renameMap)
-            if(geometryColumn != None):
-                data = data.set_geometry("geometry")
+        if(castSchema != None):
+            data = _select_sqlite_schema_fields(data, castSchema, tableName, geometryColumn)
     else:
         logger.error("Unknown data file extension: {}".format(dataFileExtension))
         raise RuntimeError
 
     if(useSchema == None):
         logger.info("Skipping casting of field types since we are ignoring schema.")
-    else:
-        data = cast_field_types(data, schema, forceInteger=forceInteger, forceInt64=forceInt64)
+    elif(not alreadyCast):
+        data = cast_field_types(data, castSchema, forceInteger=forceInteger, forceInt64=forceInt64)
+
+    if(not filtered):
+        data = data[_where_mask(data, where)].reset_index(drop=True)
+
+    if(columns != None):
+        data = _select_columns(data, columns)
+
+    if(cachePath != None):
+        _write_load_data_cache(data, cachePath, cacheMaxBytes)
+
+    if(asArrow):
+        data = _data_to_arrow(data)
 
     return data, resource, schema
 
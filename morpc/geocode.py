@@ -1,4 +1,6 @@
 import logging
+import re
+import threading
 logger = logging.getLogger(__name__)
 
 # Canonical USPS Publication 28 street type abbreviations, and the spelled-out forms and non-standard
@@ -124,6 +126,9 @@ CONST_ROUTE_PREFIX_ABBREV = {
     "INTERSTATE": "I", "I": "I",
 }
 
+# The canonical route classes.
+CONST_ROUTE_CLASSES = frozenset(CONST_ROUTE_PREFIX_ABBREV.values())
+
 # Unit designators that introduce a secondary address unit. A facility address often carries one
 # ("1234 E MAIN ST STE 200") where the address point record holds the unit in its own field, so the
 # designator and everything after it is split off before the street address is parsed.
@@ -133,6 +138,18 @@ CONST_UNIT_TYPES = frozenset([
     "STOP", "SUITE", "TRLR", "UNIT", "UPPR",
 ])
 
+# The patterns behind the normalization functions, compiled once rather than on every call. The
+# scalar functions and their Series counterparts share them, so that they cannot disagree.
+_HOUSE_NUMBER_SEPARATOR_PATTERN = re.compile(r"[,/]|(?<=\d)-(?=\d)")
+_FLOAT_TAIL_PATTERN = re.compile(r"\d+\.0+")
+_NAME_PUNCTUATION_PATTERN = re.compile(r"[.,\-]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# See _strip_postal_tail(). A city segment is optional so that ", OH 43223" is caught as well, but when
+# present it is a single comma-delimited run: the state is what confirms the tail, not the comma
+# before it.
+_POSTAL_TAIL_PATTERN = re.compile(
+    r",\s*(?:[^,]+,\s*)?(?:OH|OHIO)\b\.?(?:\s*\d{5}(?:-\d{4})?)?\s*(?:,.*)?$")
+
 
 def _clean(value):
     """Upper case a value and strip surrounding whitespace and periods, or return None if it is empty.
@@ -192,14 +209,12 @@ def normalize_house_number(value):
     Returns None for null, non-string, empty and non-numeric input, including the LBRS "-9" sentinel
     for "no house number".
     """
-    import re
-
     cleaned = _clean(value)
     if cleaned is None:
         return None
 
     # Only the first number of a list or a range can be placed on the map.
-    cleaned = re.split(r"[,/]|(?<=\d)-(?=\d)", cleaned)[0].strip()
+    cleaned = _HOUSE_NUMBER_SEPARATOR_PATTERN.split(cleaned, maxsplit=1)[0].strip()
 
     if cleaned in ("", "-9"):
         return None
@@ -207,7 +222,7 @@ def normalize_house_number(value):
         return None
 
     # A trailing ".0" is a float that was written as text; ".5" is a real fractional address.
-    if re.fullmatch(r"\d+\.0+", cleaned):
+    if _FLOAT_TAIL_PATTERN.fullmatch(cleaned):
         cleaned = cleaned.split(".")[0]
 
     # Zero padding is a Knox convention, not part of the number. Guard the all-zero case.
@@ -226,8 +241,6 @@ def normalize_street_name(value):
 
     Returns None for null, non-string and empty input.
     """
-    import re
-
     cleaned = _clean(value)
     if cleaned is None:
         return None
@@ -235,7 +248,7 @@ def normalize_street_name(value):
     # The hyphen in a compound street name is inconsistent in both directions: the registries write
     # "MARION-BUCYRUS ROAD" where Marion County publishes "MARION BUCYRUS", and "HAZELTON ETNA ROAD"
     # where Licking publishes "HAZELTON-ETNA". Treating it as a space settles the question one way.
-    cleaned = re.sub(r"[.,\-]", " ", cleaned)
+    cleaned = _NAME_PUNCTUATION_PATTERN.sub(" ", cleaned)
     cleaned = " ".join(cleaned.split())
     if not cleaned:
         return None
@@ -274,7 +287,7 @@ def route_number(name):
     tokens = cleaned.split()
     # normalize_street_name has already folded the class to its abbreviation, so a route name is
     # either "<CLASS> <number>..." or, for the counties that omit the class, "<number>" alone.
-    if len(tokens) > 1 and tokens[0] in set(CONST_ROUTE_PREFIX_ABBREV.values()) and tokens[1].isdigit():
+    if len(tokens) > 1 and tokens[0] in CONST_ROUTE_CLASSES and tokens[1].isdigit():
         return " ".join(tokens[1:])
     if tokens[0].isdigit():
         return cleaned
@@ -297,12 +310,7 @@ def _strip_postal_tail(value):
 
     Expects and returns the output of _clean(). Ohio only, which is the region this data covers.
     """
-    import re
-
-    # A city segment is optional so that ", OH 43223" is caught as well, but when present it is a
-    # single comma-delimited run: the state is what confirms the tail, not the comma before it.
-    return re.sub(r",\s*(?:[^,]+,\s*)?(?:OH|OHIO)\b\.?(?:\s*\d{5}(?:-\d{4})?)?\s*(?:,.*)?$",
-                  "", value).strip() or value
+    return _POSTAL_TAIL_PATTERN.sub("", value).strip() or value
 
 
 def parse_address(address):
@@ -395,7 +403,390 @@ def normalize_zip(value):
     return digits[:5] if len(digits) >= 5 and digits[:5].isdigit() else None
 
 
-def build_geocode_index(resourcePath, indexPath=None, force=False):
+# Series counterparts of the normalization functions, for normalizing a whole column at once. Each
+# returns exactly what applying its scalar function to every element would, in an object Series with
+# None for a null, on the same index as its input. They do the work once per distinct value, which
+# is where most of the saving lies: a million-row extract holds a few thousand distinct street names.
+# The string operations run on object Series, so that they are the str methods the scalar functions
+# call rather than Arrow's reading of them.
+
+def _series(values):
+    """Return `values` as an object Series, keeping its index if it is a Series already."""
+    import pandas as pd
+
+    if isinstance(values, pd.Series):
+        return values.astype(object)
+    return pd.Series(list(values), dtype=object)
+
+
+def _nulls_to_none(values):
+    """Return an object Series with None wherever `values` is null."""
+    values = values.astype(object)
+    return values.where(values.notna(), None)
+
+
+def _on_distinct(values, function):
+    """Apply `function`, which takes and returns an object Series, to each distinct value of `values` once.
+
+    Returns an object Series on the index of `values`, or, where `function` returns a DataFrame, a
+    DataFrame. A null input is null in every column of the output.
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = _series(values)
+    codes, distinct = pd.factorize(values, use_na_sentinel=True)
+    result = function(pd.Series(distinct, dtype=object))
+
+    if isinstance(result, pd.DataFrame):
+        columns = {}
+        for column in result.columns:
+            spread = np.append(_nulls_to_none(result[column]).to_numpy(), None)[codes]
+            columns[column] = pd.Series(spread, index=values.index, dtype=object)
+        return pd.DataFrame(columns, index=values.index)
+
+    spread = np.append(_nulls_to_none(result).to_numpy(), None)[codes]
+    return pd.Series(spread, index=values.index, dtype=object)
+
+
+def _clean_series(values):
+    """Series counterpart of _clean(), on values already made distinct by _on_distinct()."""
+    import pandas as pd
+
+    text = values.where(values.map(lambda value: isinstance(value, str)))
+    if text.isna().all():
+        return pd.Series(None, index=values.index, dtype=object)
+    cleaned = text.str.strip().str.strip(".").str.strip().str.upper()
+    return _nulls_to_none(cleaned.where(cleaned.str.len() > 0))
+
+
+def _is_digit(values):
+    """str.isdigit() over an object Series, False for a null."""
+    return values.str.isdigit() == True
+
+
+def normalize_street_type_series(values):
+    """Series counterpart of normalize_street_type()."""
+    def street_types(distinct):
+        cleaned = _clean_series(distinct)
+        mapped = cleaned.map(CONST_STREET_TYPE_ABBREV).astype(object)
+        return mapped.where(mapped.notna(), cleaned)
+
+    return _on_distinct(values, street_types)
+
+
+def normalize_directional_series(values):
+    """Series counterpart of normalize_directional()."""
+    return _on_distinct(values, lambda distinct: _clean_series(distinct).map(CONST_DIRECTIONAL_ABBREV).astype(object))
+
+
+def normalize_house_number_series(values):
+    """Series counterpart of normalize_house_number()."""
+    def house_numbers(distinct):
+        cleaned = _clean_series(distinct)
+        first = cleaned.str.split(_HOUSE_NUMBER_SEPARATOR_PATTERN, n=1).str[0].str.strip()
+        valid = ~first.isin(["", "-9"]) & _is_digit(first.str[:1])
+
+        floatTail = first.str.fullmatch(_FLOAT_TAIL_PATTERN) == True
+        first = first.where(~floatTail, first.str.split(".", n=1).str[0])
+
+        unpadded = first.str.lstrip("0")
+        unpadded = unpadded.where(unpadded != "", "0")
+        first = first.where(~_is_digit(first), unpadded)
+        return first.where(valid)
+
+    return _on_distinct(values, house_numbers)
+
+
+# For normalize_street_name_series(): a name split into its first one, two or three tokens, the token
+# after them, and whatever follows that, for reading a route prefix of that many tokens.
+_ROUTE_PREFIX_PATTERNS = [(length, re.compile(r"^(\S+(?: \S+){%d}) (\S+)(.*)$" % (length - 1)))
+                          for length in (3, 2, 1)]
+
+
+def normalize_street_name_series(values):
+    """Series counterpart of normalize_street_name()."""
+    def street_names(distinct):
+        cleaned = _clean_series(distinct)
+        cleaned = cleaned.str.replace(_NAME_PUNCTUATION_PATTERN, " ", regex=True)
+        cleaned = cleaned.str.replace(_WHITESPACE_PATTERN, " ", regex=True).str.strip()
+        cleaned = cleaned.where(cleaned.str.len() > 0)
+
+        # As in normalize_street_name(), the longest prefix followed by a route number wins.
+        result = cleaned.copy()
+        remaining = cleaned.notna()
+        for length, pattern in _ROUTE_PREFIX_PATTERNS:
+            parts = cleaned[remaining].str.extract(pattern)
+            folded = parts[0].isin(list(CONST_ROUTE_PREFIX_ABBREV)) & _is_digit(parts[1])
+            parts = parts[folded]
+            result[parts.index] = parts[0].map(CONST_ROUTE_PREFIX_ABBREV).astype(object) + " " + parts[1] + parts[2]
+            remaining[parts.index] = False
+        return result
+
+    return _on_distinct(values, street_names)
+
+
+def route_number_series(names):
+    """Series counterpart of route_number()."""
+    def route_numbers(distinct):
+        cleaned = normalize_street_name_series(distinct)
+        parts = cleaned.str.extract(r"^(\S+)(?: (.*))?$")
+        classed = parts[0].isin(list(CONST_ROUTE_CLASSES)) & _is_digit(parts[1].str.split(" ", n=1).str[0])
+        return parts[1].where(classed, cleaned.where(_is_digit(parts[0])))
+
+    return _on_distinct(names, route_numbers)
+
+
+def normalize_zip_series(values):
+    """Series counterpart of normalize_zip()."""
+    def zips(distinct):
+        digits = _clean_series(distinct).str.split(".", n=1).str[0].str.split("-", n=1).str[0].str.strip()
+        return digits.str[:5].where((digits.str.len() >= 5) & _is_digit(digits.str[:5]))
+
+    return _on_distinct(values, zips)
+
+
+# For parse_address_series(): an address split at its first unit designator after the first token,
+# into what precedes it, the designator, and what follows. A designator is read as parse_address()
+# reads it, from a token stripped of periods.
+_UNIT_DESIGNATOR_PATTERN = re.compile(
+    r"^(?P<head>\S+(?: \S+)*?) (?P<designator>\.*(?:{})\.*|\.*#\S*)(?: (?P<tail>.*))?$".format(
+        "|".join(sorted(CONST_UNIT_TYPES, key=len, reverse=True))))
+
+
+def parse_address_series(addresses):
+    """Series counterpart of parse_address().
+
+    Returns a DataFrame on the index of `addresses`, with a column for each key of the dict that
+    parse_address() returns. An address that parse_address() returns None for is None in every
+    column.
+    """
+    import pandas as pd
+
+    columns = ["streetaddr", "streetname", "streettype", "prefixdir", "suffixdir", "unitnum", "unittype"]
+
+    def parse(distinct):
+        if distinct.empty:
+            return pd.DataFrame(columns=columns, dtype=object)
+        cleaned = _clean_series(distinct)
+        # A postal tail begins with a comma, so only those addresses need searching for one.
+        tailed = cleaned[cleaned.str.contains(",", regex=False) == True]
+        stripped = tailed.str.replace(_POSTAL_TAIL_PATTERN, "", regex=True).str.strip()
+        cleaned[tailed.index] = stripped.where(stripped.str.len() > 0, tailed)
+        tokens = cleaned.str.replace(",", " ", regex=False)
+        tokens = tokens.str.replace(_WHITESPACE_PATTERN, " ", regex=True).str.strip()
+
+        # A unit designator ends the street address. "#" is written both joined to the number and
+        # apart.
+        unit = tokens.str.extract(_UNIT_DESIGNATOR_PATTERN)
+        designator = unit["designator"].str.strip(".")
+        hashed = designator.str.startswith("#") == True
+        hashNumber = designator.str[1:].where(hashed & (designator.str.len() > 1))
+        unitnum = unit["tail"].where(hashNumber.isna(),
+                                     hashNumber + (" " + unit["tail"]).where(unit["tail"].notna(), ""))
+        unittype = designator.where(~hashed, "#")
+        rest = unit["head"].where(designator.notna(), tokens)
+
+        # partition and rpartition split off the first or last token in one pass, with an empty
+        # separator where there is only one token to split.
+        first = rest.str.partition(" ")
+        streetaddr = normalize_house_number_series(first[0])
+        rest = rest.where(streetaddr.isna(), first[2])
+
+        # A trailing directional is a suffix only when a street name would remain without it.
+        last = rest.str.rpartition(" ")
+        suffixdir = normalize_directional_series(last[2]).where(last[1] == " ")
+        rest = rest.where(suffixdir.isna(), last[0])
+
+        # Likewise a trailing street type.
+        last = rest.str.rpartition(" ")
+        streettype = normalize_street_type_series(last[2])
+        streettype = streettype.where((last[1] == " ") & streettype.isin(list(CONST_STREET_TYPES)))
+        rest = rest.where(streettype.isna(), last[0])
+
+        # A leading directional is a prefix only when something other than a street type remains.
+        first = rest.str.partition(" ")
+        prefixdir = normalize_directional_series(first[0]).where(first[1] == " ")
+        rest = rest.where(prefixdir.isna(), first[2])
+
+        parsed = pd.DataFrame({"streetaddr": streetaddr, "streetname": normalize_street_name_series(rest),
+                               "streettype": streettype, "prefixdir": prefixdir, "suffixdir": suffixdir,
+                               "unitnum": unitnum, "unittype": unittype}, columns=columns)
+        return parsed.where(parsed["streetname"].notna(), axis=0)
+
+    return _on_distinct(addresses, parse)
+
+
+def _normalize_addresspoint_batch(batch):
+    """Normalize one batch of address point records into rows of the geocoding index.
+
+    `batch` is a list of (streetaddr, streetname, streettype, prefixdir, suffixdir, city, zip,
+    county, GEOMETRY) tuples as read from the source table. Returns the rows to insert and the
+    number of records skipped. A top-level function so that build_geocode_index() can run it in
+    worker processes.
+    """
+    import pandas as pd
+    import shapely
+
+    records = pd.DataFrame(batch, columns=["streetaddr", "streetname", "streettype", "prefixdir",
+                                           "suffixdir", "city", "zip", "county", "geometry"], dtype=object)
+    records["streetname"] = normalize_street_name_series(records["streetname"])
+    # A record with no street name or no location cannot be matched to or returned.
+    located = records["streetname"].notna() & records["geometry"].notna()
+    skipped = int((~located).sum())
+    records = records[located]
+
+    # Decoding the whole batch in one call rather than a point at a time.
+    points = shapely.from_wkb(records["geometry"].to_numpy())
+    rows = pd.DataFrame({
+        "streetaddr": normalize_house_number_series(records["streetaddr"]),
+        "streetname": records["streetname"],
+        "streettype": normalize_street_type_series(records["streettype"]),
+        "prefixdir": normalize_directional_series(records["prefixdir"]),
+        "suffixdir": normalize_directional_series(records["suffixdir"]),
+        "city": _on_distinct(records["city"], _clean_series),
+        "zip": normalize_zip_series(records["zip"]),
+        "county": records["county"],
+        "lon": shapely.get_x(points),
+        "lat": shapely.get_y(points),
+        "routenum": route_number_series(records["streetname"]),
+    })
+    return list(rows.itertuples(index=False, name=None)), skipped
+
+
+def _hash_partitions(batch, hashes):
+    """Fold a batch of source records into the running content hash of each county's partition.
+
+    `hashes` maps each county to a hashlib object and is updated in place. A county's hash covers
+    every column of every one of its records, in the order the source holds them.
+    """
+    import hashlib
+
+    for record in batch:
+        county = record[7]
+        if county not in hashes:
+            hashes[county] = hashlib.md5()
+        hashes[county].update(repr(record).encode())
+
+
+def _default_workers():
+    """Return the number of worker processes that workers=None stands for: one per CPU, but no more
+    than the 61 a process pool can wait on under Windows."""
+    import os
+
+    return min(os.cpu_count() or 1, 61)
+
+
+def _load_addresspoints(index, batches, workers, hashes=None):
+    """Normalize batches of source records into the addresspoints table of an index being built.
+
+    Returns the number of records written and the number skipped. Where `hashes` is given, each batch
+    is also folded into the partition hashes with _hash_partitions().
+    """
+    import concurrent.futures
+
+    written = 0
+    skipped = 0
+
+    def insert(result):
+        nonlocal written, skipped
+        rows, batchSkipped = result
+        index.executemany("insert into addresspoints values (?,?,?,?,?,?,?,?,?,?,?)", rows)
+        written += len(rows)
+        skipped += batchSkipped
+
+    if workers == 1:
+        for batch in batches:
+            if hashes is not None:
+                _hash_partitions(batch, hashes)
+            insert(_normalize_addresspoint_batch(batch))
+        return written, skipped
+
+    # Only a couple of batches per worker are read ahead of what has been written, which bounds
+    # memory to that rather than to the whole source.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        inFlight = []
+        for batch in batches:
+            inFlight.append(pool.submit(_normalize_addresspoint_batch, batch))
+            if hashes is not None:
+                _hash_partitions(batch, hashes)
+            if len(inFlight) >= 2 * workers:
+                insert(inFlight.pop(0).result())
+        for future in inFlight:
+            insert(future.result())
+    return written, skipped
+
+
+def _has_street_name_index(index):
+    """Whether a geocoding index carries the street name index of the "fuzzy" tier."""
+    return index.execute(
+        "select count(*) from sqlite_master where name = 'streetname_trigrams'").fetchone()[0] > 0
+
+
+def _index_street_names(index):
+    """(Re)build the index of the distinct street names of a geocoding index for the "fuzzy" tier.
+
+    Only the names are indexed, not the address points, so it is small: `streetnames` holds each name
+    once, keyed for looking a name up exactly; `streetname_trigrams` is a trigram full-text index over
+    the same rows, for looking up the names that contain a trigram; and `streetname_trigram_counts`
+    says how many names contain each one. The address points are then matched on the names found
+    through idx_number_name.
+    """
+    index.execute("drop table if exists streetname_trigram_counts")
+    index.execute("drop table if exists streetname_trigrams")
+    index.execute("drop table if exists streetnames")
+    index.execute("create table streetnames (streetname text primary key)")
+    index.execute("""insert into streetnames
+        select distinct streetname from addresspoints where streetname is not null""")
+    index.execute("""create virtual table streetname_trigrams using fts5(
+        streetname, content = 'streetnames', tokenize = 'trigram')""")
+    index.execute("""insert into streetname_trigrams(rowid, streetname)
+        select rowid, streetname from streetnames""")
+    index.execute("create virtual table streetname_trigram_counts using fts5vocab(streetname_trigrams, 'row')")
+
+
+def _has_house_numbers(index):
+    """Whether a geocoding index carries the house number table of the "interpolated" tier."""
+    return index.execute("select count(*) from sqlite_master where name = 'housenumbers'").fetchone()[0] > 0
+
+
+def _index_house_numbers(index):
+    """(Re)build the house number table of a geocoding index for the "interpolated" tier.
+
+    One row per numeric house number of each street and ZIP, at the centre of its address points,
+    keyed by street, ZIP, parity and number. The key is the table -- it is stored without a rowid -- so
+    the known numbers either side of one that is missing are each found by one descent of the B-tree.
+    Odd and even numbers are kept apart because they are usually on opposite sides of the street.
+    """
+    index.execute("drop table if exists housenumbers")
+    index.execute("""create table housenumbers (
+        streetname text, zip text, parity integer, number integer, lon real, lat real,
+        primary key (streetname, zip, parity, number)) without rowid""")
+    index.execute("""insert into housenumbers
+        select streetname, zip, number % 2, number, avg(lon), avg(lat)
+        from (select streetname, zip, cast(streetaddr as integer) as number, lon, lat from addresspoints
+              where streetaddr != '' and streetaddr not glob '*[^0-9]*'
+                and streetname is not null and zip is not null)
+        group by streetname, zip, number""")
+
+
+def _has_location_index(index):
+    """Whether a geocoding index carries the spatial index of reverse_geocode_addresspoints()."""
+    return index.execute(
+        "select count(*) from sqlite_master where name = 'addresspoint_locations'").fetchone()[0] > 0
+
+
+def _index_locations(index):
+    """(Re)build the R*Tree of the address point locations of a geocoding index, keyed by the rowid
+    of each point, for reverse_geocode_addresspoints()."""
+    index.execute("drop table if exists addresspoint_locations")
+    index.execute("create virtual table addresspoint_locations using rtree(id, minlon, maxlon, minlat, maxlat)")
+    index.execute("""insert into addresspoint_locations
+        select rowid, lon, lon, lat, lat from addresspoints where lon is not null and lat is not null""")
+
+
+def build_geocode_index(resourcePath, indexPath=None, force=False, workers=1, fuzzy=False,
+                        spatial=False):
     """Build the local index that geocode_addresspoints() matches against.
 
     The published address point database cannot be matched against directly. It carries no index on
@@ -408,6 +799,25 @@ def build_geocode_index(resourcePath, indexPath=None, force=False):
     same functions the query side uses, the geometry decoded to coordinates, and an index over the
     join. It is rebuilt automatically when the source it was derived from changes.
 
+    The index is partitioned by county, and records a hash of each county's source records. A new
+    release of the source usually changes only a few counties' auditor data, so when the
+    normalization is unchanged, only the counties whose hash has moved are rebuilt and the rest are
+    kept as they are. A change of CONST_GEOCODE_INDEX_VERSION rebuilds everything.
+
+    The index is written to a temporary file beside its destination and renamed into place only once
+    it is complete, so an interrupted build never leaves a partial index where a match would use it.
+    Because that file is disposable until the rename, it is written with journaling and synchronous
+    writes turned off.
+
+    Alongside the address points, the index carries a table of the known house numbers of each
+    street, which geocode_addresspoints() interpolates between in its "interpolated" tier.
+
+    With `fuzzy`, the index also carries a trigram full-text index of its distinct street names, which
+    geocode_addresspoints() uses to find a misspelled street name in its "fuzzy" tier. An index that
+    has one keeps it when it is refreshed or rebuilt for a new release, though not when it is rebuilt
+    with `force` unless `fuzzy` is passed again. With `spatial`, it carries an R*Tree of the address
+    point locations for reverse_geocode_addresspoints(), which is kept in the same way.
+
     Parameters
     ----------
     resourcePath : str
@@ -418,7 +828,20 @@ def build_geocode_index(resourcePath, indexPath=None, force=False):
         Optional. Where to write the index. Defaults to the source database path with a
         ".geocodeindex.sqlite" extension, which keeps it beside the data it was derived from.
     force : bool
-        Optional. Rebuild even if the existing index is current. Defaults to False.
+        Optional. Rebuild the whole index, even if the existing index is current or could be
+        refreshed county by county. Defaults to False.
+    workers : int
+        Optional. Number of processes to normalize the records in. None uses one per CPU, up to 61.
+        More than one starts a process pool, which on Windows and macOS re-imports the calling script
+        in each worker, so a script that asks for them must call this from under
+        `if __name__ == "__main__":`. Defaults to 1, which normalizes them in this process.
+    fuzzy : bool
+        Optional. Add the trigram index of street names for the "fuzzy" tier, to an existing index
+        that is otherwise current as well as to a new one. Requires SQLite's FTS5 extension, which the
+        SQLite bundled with Python includes. Defaults to False.
+    spatial : bool
+        Optional. Add the R*Tree of address point locations for reverse_geocode_addresspoints(), to an
+        existing index that is otherwise current as well as to a new one. Defaults to False.
 
     Returns
     -------
@@ -426,9 +849,9 @@ def build_geocode_index(resourcePath, indexPath=None, force=False):
         The path to the index.
     """
     import os
+    import shutil
     import sqlite3
     import frictionless
-    import shapely.wkb
     import morpc.frictionless
 
     resource = frictionless.Resource(resourcePath)
@@ -441,67 +864,750 @@ def build_geocode_index(resourcePath, indexPath=None, force=False):
 
     # An index is current only if it was built from this release of the data and by this version of
     # the normalization. Either one moving on leaves it matching against a vocabulary nothing uses.
+    # Where only the release has moved on, the counties it did not change can be kept.
+    partitions = None
     if os.path.exists(indexPath) and not force:
         try:
             existing = sqlite3.connect(indexPath)
             meta = dict(existing.execute("select key, value from meta").fetchall())
-            existing.close()
-            if (meta.get("sourcehash") == resource.hash
-                    and meta.get("version") == str(CONST_GEOCODE_INDEX_VERSION)):
+            current = (meta.get("sourcehash") == resource.hash
+                       and meta.get("version") == str(CONST_GEOCODE_INDEX_VERSION))
+            hadFuzzy = _has_street_name_index(existing)
+            hadSpatial = _has_location_index(existing)
+            fuzzy = fuzzy or hadFuzzy
+            spatial = spatial or hadSpatial
+            complete = hadFuzzy == fuzzy and hadSpatial == spatial and _has_house_numbers(existing)
+            if current and complete:
+                existing.close()
                 logger.info("Using existing geocoding index at {}".format(indexPath))
                 return indexPath
-            logger.info("Geocoding index at {} is out of date. Rebuilding.".format(indexPath))
+            if meta.get("version") == str(CONST_GEOCODE_INDEX_VERSION):
+                try:
+                    partitions = dict(existing.execute("select county, hash from partitions").fetchall())
+                except sqlite3.OperationalError:
+                    # Built before the index was partitioned, so there is nothing to compare with.
+                    pass
+            existing.close()
+            if current:
+                logger.info("Adding the tables it lacks to the geocoding index at {}.".format(indexPath))
+            else:
+                logger.info("Geocoding index at {} is out of date. Rebuilding.".format(indexPath))
         except sqlite3.DatabaseError:
             logger.warning("Geocoding index at {} is unreadable. Rebuilding.".format(indexPath))
 
-    logger.info("Building geocoding index at {} from {}".format(indexPath, sourcePath))
-    if os.path.exists(indexPath):
-        os.remove(indexPath)
+    if workers is None:
+        workers = _default_workers()
+
+    columns = "streetaddr, streetname, streettype, prefixdir, suffixdir, city, zip, county, GEOMETRY"
+    buildPath = "{}.{}.building".format(indexPath, os.getpid())
+    if os.path.exists(buildPath):
+        os.remove(buildPath)
 
     source = sqlite3.connect("file:{}?mode=ro".format(sourcePath), uri=True)
-    index = sqlite3.connect(indexPath)
-    index.execute("create table meta (key text primary key, value text)")
-    index.execute("""create table addresspoints (
-        streetaddr text, streetname text, streettype text, prefixdir text, suffixdir text,
-        city text, zip text, county text, lon real, lat real, routenum text)""")
-
-    read = source.execute("""select streetaddr, streetname, streettype, prefixdir, suffixdir,
-        city, zip, county, GEOMETRY from {}""".format(tableName))
-    written = 0
-    skipped = 0
-    while True:
-        batch = read.fetchmany(50000)
-        if not batch:
-            break
-        rows = []
-        for streetaddr, streetname, streettype, prefixdir, suffixdir, city, zip_, county, geometry in batch:
-            name = normalize_street_name(streetname)
-            if name is None or geometry is None:
-                # A record with no street name or no location cannot be matched to or returned.
-                skipped += 1
-                continue
-            point = shapely.wkb.loads(geometry)
-            rows.append((normalize_house_number(streetaddr), name, normalize_street_type(streettype),
-                         normalize_directional(prefixdir), normalize_directional(suffixdir),
-                         _clean(city), normalize_zip(zip_), county, point.x, point.y,
-                         route_number(name)))
-        index.executemany("insert into addresspoints values (?,?,?,?,?,?,?,?,?,?,?)", rows)
-        written += len(rows)
-    source.close()
-
-    index.execute("create index idx_number_name on addresspoints(streetaddr, streetname)")
-    index.execute("create index idx_route_number on addresspoints(streetaddr, routenum)")
-    index.execute("insert into meta values ('sourcehash', ?)", (resource.hash,))
-    index.execute("insert into meta values ('sourcepath', ?)", (resource.path,))
-    index.execute("insert into meta values ('version', ?)", (str(CONST_GEOCODE_INDEX_VERSION),))
-    index.commit()
-    index.close()
-    logger.info("Geocoding index holds {:,} records. {:,} were skipped for want of a street name "
+    index = None
+    try:
+        hashes = {}
+        if partitions is not None:
+            # Hashing the source is one read of it, which is far cheaper than normalizing it.
+            read = source.execute("select {} from {}".format(columns, tableName))
+            for batch in iter(lambda: read.fetchmany(50000), []):
+                _hash_partitions(batch, hashes)
+            hashes = {county: value.hexdigest() for county, value in hashes.items()}
+            stale = ([county for county in hashes if partitions.get(county) != hashes[county]]
+                     + [county for county in partitions if county not in hashes])
+            logger.info("Refreshing {} of {} counties in the geocoding index at {} from {}: {}".format(
+                len(stale), len(hashes), indexPath, sourcePath,
+                ", ".join(sorted(str(county) for county in stale)) or "none"))
+
+            shutil.copyfile(indexPath, buildPath)
+            index = sqlite3.connect(buildPath)
+            index.execute("pragma journal_mode = off")
+            index.execute("pragma synchronous = off")
+            if stale:
+                # One statement for all of them, so that the unindexed county column is scanned once rather than
+                # once per county. "is" rather than "in" so that records with no county are matched too.
+                matchStale = " or ".join(["county is ?"] * len(stale))
+                index.execute("delete from addresspoints where {}".format(matchStale), stale)
+                index.execute("delete from partitions where {}".format(matchStale), stale)
+
+            refreshed = [county for county in stale if county in hashes]
+            written, skipped = 0, 0
+            if refreshed:
+                # "is" rather than "in" so that records with no county can be selected too.
+                read = source.execute("select {} from {} where {}".format(
+                    columns, tableName, " or ".join(["county is ?"] * len(refreshed))), refreshed)
+                written, skipped = _load_addresspoints(index, iter(lambda: read.fetchmany(50000), []),
+                                                       workers)
+            index.executemany("insert into partitions values (?, ?)",
+                              [(county, hashes[county]) for county in refreshed])
+            index.execute("update meta set value = ? where key = 'sourcehash'", (resource.hash,))
+            index.execute("update meta set value = ? where key = 'sourcepath'", (resource.path,))
+            _index_house_numbers(index)
+            if fuzzy:
+                _index_street_names(index)
+            if spatial:
+                _index_locations(index)
+        else:
+            logger.info("Building geocoding index at {} from {}".format(indexPath, sourcePath))
+            index = sqlite3.connect(buildPath)
+            index.execute("pragma journal_mode = off")
+            index.execute("pragma synchronous = off")
+            index.execute("create table meta (key text primary key, value text)")
+            index.execute("create table partitions (county text, hash text)")
+            index.execute("""create table addresspoints (
+                streetaddr text, streetname text, streettype text, prefixdir text, suffixdir text,
+                city text, zip text, county text, lon real, lat real, routenum text)""")
+
+            read = source.execute("select {} from {}".format(columns, tableName))
+            written, skipped = _load_addresspoints(index, iter(lambda: read.fetchmany(50000), []),
+                                                   workers, hashes)
+
+            # The secondary indexes are built once the table is loaded, which is far cheaper than
+            # maintaining them through a million inserts.
+            index.execute("create index idx_number_name on addresspoints(streetaddr, streetname)")
+            index.execute("create index idx_route_number on addresspoints(streetaddr, routenum)")
+            index.executemany("insert into partitions values (?, ?)",
+                              [(county, value.hexdigest()) for county, value in hashes.items()])
+            index.execute("insert into meta values ('sourcehash', ?)", (resource.hash,))
+            index.execute("insert into meta values ('sourcepath', ?)", (resource.path,))
+            index.execute("insert into meta values ('version', ?)", (str(CONST_GEOCODE_INDEX_VERSION),))
+            _index_house_numbers(index)
+            if fuzzy:
+                _index_street_names(index)
+            if spatial:
+                _index_locations(index)
+        index.commit()
+        index.close()
+        source.close()
+    except BaseException:
+        source.close()
+        if index is not None:
+            index.close()
+        if os.path.exists(buildPath):
+            os.remove(buildPath)
+        raise
+
+    os.replace(buildPath, indexPath)
+    logger.info("Wrote {:,} records to the geocoding index. {:,} were skipped for want of a street name "
                 "or a location.".format(written, skipped))
     return indexPath
 
 
-def geocode_addresspoints(addresses, resourcePath, zipcodes=None, indexPath=None, tolerance=500):
+# Columnar copies of geocoding indexes already read by this process, keyed by the path of the file,
+# holding the modification time they were read at alongside the table.
+_GEOCODE_COLUMNS = {}
+
+
+def load_geocode_columns(indexPath):
+    """Load the address points of a geocoding index into memory as columns.
+
+    geocode_addresspoints(engine="columnar") matches against this rather than querying SQLite,
+    joining every address of a batch at once in pandas. The table is exported from the index once
+    and kept beside it as an uncompressed Feather file (".geocodeindex.feather"), which is read back
+    memory mapped; within a process it is read only once, so a warm process pays nothing to reuse it.
+
+    The Feather file carries the same sourcehash and version metadata as the index it was exported
+    from, and is exported again whenever they no longer agree. It is therefore exactly as current as
+    the index, which build_geocode_index() is responsible for.
+
+    Parameters
+    ----------
+    indexPath : str
+        Path to the geocoding index. See build_geocode_index().
+
+    Returns
+    -------
+    pandas.DataFrame
+        The addresspoints table of the index.
+    """
+    import os
+    import sqlite3
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.feather
+
+    columnsPath = os.path.splitext(indexPath)[0] + ".feather"
+
+    index = sqlite3.connect("file:{}?mode=ro".format(indexPath), uri=True)
+    try:
+        meta = dict(index.execute("select key, value from meta").fetchall())
+    except sqlite3.OperationalError:
+        # An index written without metadata is trusted as it is, but nothing can say whether a copy
+        # of it is current, so the copy is always refreshed.
+        meta = {}
+    stamp = {key.encode(): str(meta.get(key)).encode() for key in ("sourcehash", "version")}
+
+    fresh = False
+    if os.path.exists(columnsPath) and meta:
+        try:
+            existing = pyarrow.feather.read_table(columnsPath, memory_map=True).schema.metadata or {}
+            fresh = all(existing.get(key) == value for key, value in stamp.items())
+        except pa.ArrowInvalid:
+            logger.warning("Columnar geocoding index at {} is unreadable. Exporting it again."
+                           .format(columnsPath))
+
+    if not fresh:
+        logger.info("Exporting geocoding index at {} to {}".format(indexPath, columnsPath))
+        frame = pd.read_sql_query("select * from addresspoints", index)
+        table = pa.Table.from_pandas(frame, preserve_index=False).replace_schema_metadata(stamp)
+        # Written uncompressed, since a compressed file cannot be memory mapped, and swapped in whole,
+        # since another process may have the old one mapped and would fault on its being rewritten.
+        pyarrow.feather.write_feather(table, columnsPath + ".{}.tmp".format(os.getpid()),
+                                      compression="uncompressed")
+        os.replace(columnsPath + ".{}.tmp".format(os.getpid()), columnsPath)
+        _GEOCODE_COLUMNS.pop(columnsPath, None)
+    index.close()
+
+    modified = os.path.getmtime(columnsPath)
+    cached = _GEOCODE_COLUMNS.get(columnsPath)
+    if cached is None or cached[0] != modified:
+        table = pyarrow.feather.read_table(columnsPath, memory_map=True)
+        _GEOCODE_COLUMNS[columnsPath] = (modified, table.to_pandas())
+        logger.info("Loaded {:,} address points from {}".format(table.num_rows, columnsPath))
+    return _GEOCODE_COLUMNS[columnsPath][1]
+
+
+def _separation(minLon, maxLon, minLat, maxLat):
+    """Metres across the bounding box of a set of candidate points.
+
+    The diagonal of the box rather than the true furthest pair, which is the same number for the
+    two point case that matters and an upper bound otherwise, computed in one pass rather than
+    the n squared a common street name would cost.
+    """
+    import math
+
+    midLatitude = math.radians((minLat + maxLat) / 2)
+    northing = (maxLat - minLat) * 111320
+    easting = (maxLon - minLon) * 111320 * math.cos(midLatitude)
+    return math.hypot(northing, easting)
+
+
+# What _resolve_tier() needs of a tier's candidates, as SQL aggregates over them, so that a tier query
+# returns one row however many address points share a common street name.
+# The street of an address point `a`, as its directional, name, type and directional, for the street
+# and ZIP a match reports: those of the address points it found rather than of the query.
+CONST_GEOCODE_STREET = ("coalesce(a.prefixdir || ' ', '') || a.streetname || coalesce(' ' || a.streettype, '')"
+                        " || coalesce(' ' || a.suffixdir, '')")
+CONST_GEOCODE_TIER_SUMMARY = ("count(*), min(a.lon), max(a.lon), min(a.lat), max(a.lat), avg(a.lon), avg(a.lat), "
+                              "min({}), min(a.zip)".format(CONST_GEOCODE_STREET))
+
+
+def _resolve_tier(records, position, tier, summary, tolerance):
+    """Record at `position` of `records` the outcome of the first tier to find any address points for
+    the address there.
+
+    `summary` is (count, min lon, max lon, min lat, max lat, mean lon, mean lat, street, zip) of the
+    candidates, which is all that the decision needs; the street and ZIP are the first of theirs in
+    sort order, for where they differ. Every matcher goes through this, so that all of them apply the
+    same tolerance and the same ambiguity rule.
+    """
+    count, minLon, maxLon, minLat, maxLat, meanLon, meanLat, street, zipcode = summary
+    spread = _separation(minLon, maxLon, minLat, maxLat)
+    records.update(position, {"matchtier": tier, "matchcount": count, "matchspread": round(spread, 1)})
+    if spread > tolerance:
+        records.matchnote[position] = ("{} address points {:,.0f} m apart match equally well"
+                                       .format(count, spread))
+        return
+    # One address commonly matches many points -- the units of an apartment building, or the
+    # buildings of a hospital campus. They are one place, so the result is their centre.
+    records.update(position, {"matched": True, "lon": meanLon, "lat": meanLat, "matchstreet": street,
+                              "matchzip": zipcode})
+
+
+def _address_tiers(parsed, zipcode):
+    """The match tiers for one parsed address, as (tier, where clause, parameters), in the order tried."""
+    tiers = [
+        ("exact", "streetaddr=? and streetname=? and streettype is ? and prefixdir is ? and suffixdir is ?"
+                  + (" and zip=?" if zipcode else ""),
+         [parsed["streetaddr"], parsed["streetname"], parsed["streettype"],
+          parsed["prefixdir"], parsed["suffixdir"]] + ([zipcode] if zipcode else [])),
+        ("components", "streetaddr=? and streetname=?" + (" and zip=?" if zipcode else ""),
+         [parsed["streetaddr"], parsed["streetname"]] + ([zipcode] if zipcode else [])),
+        ("number_name", "streetaddr=? and streetname=?",
+         [parsed["streetaddr"], parsed["streetname"]]),
+    ]
+
+    # The counties disagree about whether a numbered route name carries its class, so a query
+    # normalized to "US 42" finds nothing where a county published "42". Matching on the number
+    # alone recovers those, but it cannot distinguish Logan's "CR 32" from its "TR 32", so it
+    # runs only after the full name has failed and is reported as its own tier.
+    number = route_number(parsed["streetname"])
+    if number is not None:
+        tiers.append(("route_number", "streetaddr=? and routenum=?" + (" and zip=?" if zipcode else ""),
+                      [parsed["streetaddr"], number] + ([zipcode] if zipcode else [])))
+    return tiers
+
+
+def _match_each(index, pending, records, tolerance):
+    """Match each pending address with its own query per tier. The reference for _match_batch()."""
+    for position, parsed, zipcode in pending:
+        for tier, where, parameters in _address_tiers(parsed, zipcode):
+            summary = index.execute("select {} from addresspoints a where {}".format(
+                CONST_GEOCODE_TIER_SUMMARY, where), parameters).fetchone()
+            if summary[0]:
+                _resolve_tier(records, position, tier, summary, tolerance)
+                break
+        else:
+            records.matchnote[position] = "no address point matches this house number and street name"
+
+
+# The tiers of _address_tiers() restated as joins between a table of queries `q` and the address
+# points `a`, for _match_batch(). A query with no ZIP carries a null one, which drops the ZIP
+# condition just as leaving "and zip=?" out does, and a query whose street is not a numbered route
+# carries a null route number, which joins to nothing just as skipping the tier does.
+CONST_GEOCODE_TIER_JOINS = [
+    ("exact", "a.streetaddr = q.streetaddr and a.streetname = q.streetname"
+              " and a.streettype is q.streettype and a.prefixdir is q.prefixdir"
+              " and a.suffixdir is q.suffixdir and (q.zip is null or a.zip = q.zip)"),
+    ("components", "a.streetaddr = q.streetaddr and a.streetname = q.streetname"
+                   " and (q.zip is null or a.zip = q.zip)"),
+    ("number_name", "a.streetaddr = q.streetaddr and a.streetname = q.streetname"),
+    ("route_number", "a.streetaddr = q.streetaddr and a.routenum = q.routenum"
+                     " and (q.zip is null or a.zip = q.zip)"),
+]
+
+
+def _match_batch(index, pending, records, tolerance):
+    """Match every pending address at once, with one join per tier.
+
+    The pending addresses are loaded into a temporary table, and each tier is one query joining it to
+    the address points. An address leaves the table as soon as a tier finds anything for it, so each
+    tier only sees what every earlier tier failed to find, exactly as the per-address loop would.
+    """
+    index.execute("""create temp table queries (
+        id integer primary key, streetaddr text, streetname text, streettype text, prefixdir text,
+        suffixdir text, zip text, routenum text)""")
+    index.executemany("insert into queries values (?,?,?,?,?,?,?,?)", [
+        (position, parsed["streetaddr"], parsed["streetname"], parsed["streettype"],
+         parsed["prefixdir"], parsed["suffixdir"], zipcode, route_number(parsed["streetname"]))
+        for position, parsed, zipcode in pending])
+
+    for tier, condition in CONST_GEOCODE_TIER_JOINS:
+        rows = index.execute("select q.id, {} from queries q join addresspoints a on {} group by q.id"
+                             .format(CONST_GEOCODE_TIER_SUMMARY, condition))
+        resolved = []
+        for position, *summary in rows:
+            _resolve_tier(records, position, tier, summary, tolerance)
+            resolved.append((position,))
+        index.executemany("delete from queries where id = ?", resolved)
+
+    for (position,) in index.execute("select id from queries").fetchall():
+        records.matchnote[position] = "no address point matches this house number and street name"
+    index.execute("drop table queries")
+
+
+# The tiers of _address_tiers() as the key columns of a hash join, for _match_columns(), along
+# with whether the ZIP joins too when the query has one. pandas joins a null key to a null key, which
+# is what the "is" comparisons of the exact tier ask for; the keys that must not be null on the query
+# side are filtered before joining.
+CONST_GEOCODE_TIER_KEYS = [
+    ("exact", ["streetaddr", "streetname", "streettype", "prefixdir", "suffixdir"], True),
+    ("components", ["streetaddr", "streetname"], True),
+    ("number_name", ["streetaddr", "streetname"], False),
+    ("route_number", ["streetaddr", "routenum"], True),
+]
+
+
+def _match_columns(points, pending, records, tolerance):
+    """Match every pending address at once against the columnar index, with hash joins in pandas.
+
+    The counterpart of _match_batch() for load_geocode_columns(): one join per tier, and an address
+    leaves the queries as soon as a tier finds anything for it.
+    """
+    import pandas as pd
+
+    fields = ["streetaddr", "streetname", "streettype", "prefixdir", "suffixdir", "zip", "routenum"]
+    queries = pd.DataFrame(
+        [(position, parsed["streetaddr"], parsed["streetname"], parsed["streettype"],
+          parsed["prefixdir"], parsed["suffixdir"], zipcode, route_number(parsed["streetname"]))
+         for position, parsed, zipcode in pending],
+        columns=["position"] + fields)
+    # The keys are joined in the types the index holds them in, so that a null on one side is the
+    # same null on the other.
+    queries = queries.astype({field: points[field].dtype for field in fields})
+    points = points[fields + ["lon", "lat"]]
+
+    for tier, keys, zipped in CONST_GEOCODE_TIER_KEYS:
+        candidates = queries.dropna(subset=["routenum"]) if "routenum" in keys else queries
+        withZip = candidates["zip"].notna() if zipped else pd.Series(False, index=candidates.index)
+        matches = pd.concat([
+            candidates.loc[withZip, ["position"] + keys + ["zip"]].merge(points, on=keys + ["zip"]),
+            candidates.loc[~withZip, ["position"] + keys].merge(points, on=keys),
+        ])
+        if matches.empty:
+            continue
+        matches["street"] = [" ".join(part for part in parts if pd.notna(part)) if pd.notna(parts[1]) else None
+                             for parts in zip(matches["prefixdir"], matches["streetname"], matches["streettype"],
+                                              matches["suffixdir"])]
+        summary = matches.groupby("position").agg(
+            count=("lon", "size"), minlon=("lon", "min"), maxlon=("lon", "max"),
+            minlat=("lat", "min"), maxlat=("lat", "max"), meanlon=("lon", "mean"),
+            meanlat=("lat", "mean"), street=("street", "min"), zip=("zip", "min"))
+        for position, *aggregates in summary.itertuples(name=None):
+            _resolve_tier(records, position, tier, aggregates, tolerance)
+        queries = queries[~queries["position"].isin(summary.index)]
+
+    unmatched = queries["position"].to_numpy(int)
+    records.matchnote[unmatched] = "no address point matches this house number and street name"
+
+
+# How many of the street names best ranked by the trigrams they share with a name that could not be
+# found are compared with it in the "fuzzy" tier. A misspelling within the edit budget shares most of
+# its trigrams, so the name it was meant to be ranks well inside this.
+CONST_GEOCODE_FUZZY_CANDIDATES = 100
+
+
+def _edit_distance(a, b, limit):
+    """Edit distance between two strings, or limit + 1 as soon as it must exceed `limit`.
+
+    Levenshtein distance with a swap of two adjacent characters counted as one edit rather than two
+    (the optimal string alignment distance), since a transposition is the commonest typing error.
+    Only the cells within `limit` of the diagonal are computed, since none further out can be within it.
+    """
+    beyond = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return beyond
+    before = None
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else beyond] + [beyond] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        # Each row follows from the two before it, so once both exceed the limit every later one does.
+        if min(current) > limit and min(previous) > limit:
+            return beyond
+        before, previous = previous, current
+    return min(previous[-1], beyond)
+
+
+def _nearest_street_names(index, name, maxEdits):
+    """The street names of the index nearest to `name`, a name it does not hold, within its edits.
+
+    A name may differ by at most one edit per four characters, up to `maxEdits`, so a short name is
+    never corrected at all; and never in its digits, so that "15TH" is not read as "16TH" nor "SR 661"
+    as "SR 61". Where several names are equally near, all of them are returned.
+    """
+    edits = min(maxEdits, len(name) // 4)
+    if edits == 0:
+        return []
+
+    def trigramsOf(value):
+        return {value[i:i + 3] for i in range(len(value) - 2)}
+
+    digits = re.sub(r"\D", "", name)
+    trigrams = trigramsOf(name)
+    # An edit changes at most three of a name's trigrams, and a transposition four, so a name within
+    # the edits lacks at most 4 * edits of them, and has at least one of any 4 * edits + 1 of them.
+    # Only the rarest that many are looked up, which reads the fewest names that could be the one.
+    shared = len(trigrams) - 4 * edits
+    if shared >= 1:
+        counts = dict(index.execute(
+            "select term, doc from streetname_trigram_counts where term in ({})".format(
+                ",".join("?" * len(trigrams))), [trigram.lower() for trigram in trigrams]).fetchall())
+        lookup = sorted(trigrams, key=lambda trigram: counts.get(trigram.lower(), 0))[:4 * edits + 1]
+    else:
+        lookup = trigrams
+    candidates = index.execute(
+        "select streetname from streetname_trigrams where streetname_trigrams match ? order by rank limit ?",
+        (" OR ".join("\"{}\"".format(trigram.replace("\"", "\"\"")) for trigram in lookup),
+         CONST_GEOCODE_FUZZY_CANDIDATES)).fetchall()
+    if len(trigrams) <= 4:
+        # One edit can change every trigram of a name this short, leaving none in common with the name
+        # it was meant to be ("HIHG" and "HIGH"), so the names that begin as it does, of about its
+        # length, are candidates too.
+        candidates += index.execute("""select streetname from streetnames
+            where streetname >= ? and streetname < ? and length(streetname) between ? and ?""",
+            (name[:2], name[:1] + chr(ord(name[1]) + 1), len(name) - edits, len(name) + edits)).fetchall()
+    distances = {candidate: _edit_distance(name, candidate, edits) for (candidate,) in set(candidates)
+                 if re.sub(r"\D", "", candidate) == digits and len(trigrams & trigramsOf(candidate)) >= shared}
+    nearest = min(distances.values(), default=edits + 1)
+    return [candidate for candidate, distance in distances.items() if distance == nearest <= edits]
+
+
+def _match_interpolated(index, pending, records, tolerance, maxGap):
+    """Place the pending addresses whose house number has no address point between the two nearest
+    numbers either side of it on the same side of the same street, in the same ZIP.
+
+    Run after whichever matcher matched the rest, for the addresses no tier found anything for. The
+    neighbours must be no more than `maxGap` numbers apart, and no more than `tolerance` metres, since
+    two numbers further apart than that are more likely on different stretches of the street than on
+    one. Each neighbour is one lookup in the house number table, logarithmic in its size.
+    """
+    if not maxGap or not _has_house_numbers(index):
+        return
+    for position, parsed, zipcode in pending:
+        # ASCII digits only, as the house number table holds: str.isdigit() would also pass a superscript
+        # such as "2794²", which int() cannot read.
+        if (records.matchtier[position] is not None or zipcode is None
+                or not re.fullmatch(r"[0-9]+", parsed["streetaddr"] or "")):
+            continue
+        number = int(parsed["streetaddr"])
+        key = (parsed["streetname"], zipcode, number % 2, number)
+        below = index.execute("""select number, lon, lat from housenumbers
+            where streetname = ? and zip = ? and parity = ? and number < ? order by number desc limit 1""",
+            key).fetchone()
+        above = index.execute("""select number, lon, lat from housenumbers
+            where streetname = ? and zip = ? and parity = ? and number > ? order by number limit 1""",
+            key).fetchone()
+        if below is None or above is None or above[0] - below[0] > maxGap:
+            continue
+        spread = _separation(min(below[1], above[1]), max(below[1], above[1]),
+                             min(below[2], above[2]), max(below[2], above[2]))
+        if spread > tolerance:
+            continue
+        share = (number - below[0]) / (above[0] - below[0])
+        street = index.execute("""select min({}) from addresspoints a
+            where streetaddr in (?, ?) and streetname = ? and zip = ?""".format(CONST_GEOCODE_STREET),
+            (str(below[0]), str(above[0]), parsed["streetname"], zipcode)).fetchone()[0]
+        records.update(position, {"matched": True, "matchtier": "interpolated", "matchcount": 2,
+                                  "matchspread": round(spread, 1), "matchnote": None,
+                                  "matchstreet": street, "matchzip": zipcode,
+                                  "lon": below[1] + share * (above[1] - below[1]),
+                                  "lat": below[2] + share * (above[2] - below[2])})
+
+
+def _match_fuzzy(index, pending, records, tolerance, maxEdits):
+    """Match the pending addresses that no tier found anything for on the street names nearest theirs.
+
+    The last resort, run after whichever matcher matched the rest, for a street name that is not in
+    the index at all -- most often a misspelling. The house number must still match exactly, and the
+    ZIP where there is one. It runs only against an index built with build_geocode_index(fuzzy=True).
+    """
+    if not maxEdits or not _has_street_name_index(index):
+        return
+    unresolved = [(position, parsed, zipcode) for position, parsed, zipcode in pending
+                  if records.matchtier[position] is None]
+
+    # A name the index holds is spelled as published, so it is not corrected to another.
+    nearest = {}
+    for name in {parsed["streetname"] for _, parsed, _ in unresolved}:
+        known = index.execute("select count(*) from streetnames where streetname = ?", (name,)).fetchone()[0]
+        nearest[name] = [] if known else _nearest_street_names(index, name, maxEdits)
+    queries = [(position, parsed["streetaddr"], candidate, zipcode)
+               for position, parsed, zipcode in unresolved for candidate in nearest[parsed["streetname"]]]
+    if not queries:
+        return
+
+    index.execute("create temp table fuzzyqueries (id integer, streetaddr text, streetname text, zip text)")
+    index.executemany("insert into fuzzyqueries values (?,?,?,?)", queries)
+    rows = index.execute("""select q.id, {} from fuzzyqueries q join addresspoints a
+        on a.streetaddr = q.streetaddr and a.streetname = q.streetname and (q.zip is null or a.zip = q.zip)
+        group by q.id""".format(CONST_GEOCODE_TIER_SUMMARY)).fetchall()
+    for position, *summary in rows:
+        records.matchnote[position] = None
+        _resolve_tier(records, position, "fuzzy", summary, tolerance)
+    index.execute("drop table fuzzyqueries")
+
+
+class GeocodeCache:
+    """An on-disk cache of geocoding results, shared by geocode_addresspoints(), query_geocoder() and
+    geocode().
+
+    Pass one as `cache` to any of them and an address already geocoded is answered from the cache,
+    so that only addresses not seen before reach the index or the service. Results are kept per
+    backend and per version of what produced them -- for the address points, the index version, the
+    release of the data and the tolerance; for a service, its endpoint -- so that a result is only
+    ever served by the backend and version that produced it. Results from an index built by an
+    earlier CONST_GEOCODE_INDEX_VERSION are deleted when the cache is opened.
+
+    Parameters
+    ----------
+    path : str
+        Path to the cache database. Created if it does not exist.
+    maxAge : float
+        Optional. Seconds after which a result is no longer served and is evicted. Defaults to None,
+        which keeps results indefinitely.
+    maxEntries : int
+        Optional. Number of results to keep. Beyond it, the least recently used are evicted. Defaults
+        to None, which keeps every result.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Lookups answered and not answered by the cache since it was opened. stats() reports the
+        totals across every session.
+    """
+
+    def __init__(self, path, maxAge=None, maxEntries=None):
+        import sqlite3
+
+        self.path = path
+        self.maxAge = maxAge
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""create table if not exists results (
+            backend text, version text, key text, value text, created real, used real,
+            primary key (backend, version, key))""")
+        self._connection.execute("create index if not exists idx_used on results(used)")
+        self._connection.execute("""create table if not exists stats (
+            backend text primary key, hits integer, misses integer)""")
+        purged = self._connection.execute(
+            "delete from results where backend = 'addresspoints' and version not like ?",
+            ("v{}:%".format(CONST_GEOCODE_INDEX_VERSION),)).rowcount
+        if purged:
+            logger.info("Removed {:,} cached results from an earlier geocoding index version.".format(purged))
+        self._connection.commit()
+        self.evict()
+
+    def get(self, backend, version, keys):
+        """Return a dict of the cached result for each of `keys` that has one.
+
+        Keys that are None are never cached and are neither looked up nor counted.
+        """
+        import json
+        import time
+
+        keys = list(dict.fromkeys(key for key in keys if key is not None))
+        found = {}
+        with self._lock:
+            cutoff = time.time() - self.maxAge if self.maxAge is not None else None
+            # SQLite bounds the number of parameters in a statement, so the keys are looked up in runs.
+            for start in range(0, len(keys), 500):
+                run = keys[start:start + 500]
+                found.update(self._connection.execute(
+                    "select key, value from results where backend = ? and version = ? and key in ({})"
+                    .format(",".join("?" * len(run)))
+                    + (" and created >= ?" if cutoff is not None else ""),
+                    [backend, version] + run + ([cutoff] if cutoff is not None else [])).fetchall())
+            now = time.time()
+            self._connection.executemany(
+                "update results set used = ? where backend = ? and version = ? and key = ?",
+                [(now, backend, version, key) for key in found])
+            self._connection.execute("""insert into stats values (?, ?, ?) on conflict(backend) do update
+                set hits = hits + excluded.hits, misses = misses + excluded.misses""",
+                (backend, len(found), len(keys) - len(found)))
+            self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def put(self, backend, version, results):
+        """Store `results`, a dict of a JSON-serializable result for each key, then evict as configured."""
+        import json
+        import time
+
+        now = time.time()
+        with self._lock:
+            self._connection.executemany("insert or replace into results values (?, ?, ?, ?, ?, ?)", [
+                (backend, version, key, json.dumps(value, default=lambda v: v.item()), now, now)
+                for key, value in results.items() if key is not None])
+            self._connection.commit()
+        self.evict()
+
+    def evict(self):
+        """Delete results older than maxAge, then the least recently used beyond maxEntries."""
+        import time
+
+        with self._lock:
+            if self.maxAge is not None:
+                self._connection.execute("delete from results where created < ?",
+                                         (time.time() - self.maxAge,))
+            if self.maxEntries is not None:
+                self._connection.execute("""delete from results where rowid in (
+                    select rowid from results order by used desc limit -1 offset ?)""", (self.maxEntries,))
+            self._connection.commit()
+
+    def clear(self, backend=None):
+        """Delete every cached result, or every result of one backend."""
+        with self._lock:
+            if backend is None:
+                self._connection.execute("delete from results")
+            else:
+                self._connection.execute("delete from results where backend = ?", (backend,))
+            self._connection.commit()
+
+    def stats(self):
+        """Return a DataFrame of the results held, hits and misses per backend, across every session."""
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query("""select backend, coalesce(entries, 0) as entries,
+                coalesce(hits, 0) as hits, coalesce(misses, 0) as misses
+                from (select backend from results union select backend from stats)
+                left join (select backend, count(*) as entries from results group by backend) using (backend)
+                left join stats using (backend) order by backend""", self._connection)
+
+    def close(self):
+        self._connection.close()
+
+
+def _cache_key(*values):
+    """Join the normalized values a result depends on into a cache key, or None if there are none."""
+    if all(value is None for value in values):
+        return None
+    return "|".join("" if value is None else str(value) for value in values)
+
+
+CONST_GEOCODE_MATCH_FIELDS = ["matched", "matchtier", "matchcount", "matchspread", "matchstreet", "matchzip",
+                              "matchnote", "lon", "lat"]
+
+
+class _MatchResults:
+    """The outcome of matching each of a list of addresses, as a preallocated column per field of
+    CONST_GEOCODE_MATCH_FIELDS rather than a dict per address. The matchers write to it by position;
+    _addresspoints_frame() takes the columns as they are."""
+
+    def __init__(self, size):
+        import numpy as np
+
+        self.matched = np.zeros(size, dtype=bool)
+        self.matchtier = np.full(size, None, dtype=object)
+        self.matchcount = np.zeros(size, dtype=np.int64)
+        # Rounded to a float where there is one and None where not, as the types of the result follow.
+        self.matchspread = np.full(size, None, dtype=object)
+        self.matchstreet = np.full(size, None, dtype=object)
+        self.matchzip = np.full(size, None, dtype=object)
+        self.matchnote = np.full(size, None, dtype=object)
+        self.lon = np.full(size, np.nan)
+        self.lat = np.full(size, np.nan)
+
+    def update(self, position, values):
+        """Set the fields in `values`, a dict, of the address at `position`."""
+        for field, value in values.items():
+            getattr(self, field)[position] = value
+
+    def get(self, position):
+        """Return the fields of the address at `position` as a dict of plain values, as GeocodeCache
+        stores them: a missing location is None."""
+        values = {field: getattr(self, field)[position] for field in CONST_GEOCODE_MATCH_FIELDS}
+        values.update({field: None if values[field] != values[field] else float(values[field])
+                       for field in ("lon", "lat")})
+        values.update({"matched": bool(values["matched"]), "matchcount": int(values["matchcount"])})
+        return values
+
+    def copy(self, positions, sources):
+        """Copy the fields of the addresses at `sources` to those at `positions`, two arrays."""
+        for field in CONST_GEOCODE_MATCH_FIELDS:
+            column = getattr(self, field)
+            column[positions] = column[sources]
+
+    def columns(self):
+        """Return the columns by field name."""
+        return {field: getattr(self, field) for field in CONST_GEOCODE_MATCH_FIELDS}
+
+
+def _first_occurrences(keys):
+    """Return, for each key, the position of the first occurrence of the same key. A key that is None
+    is never shared, and is its own first occurrence."""
+    first = {}
+    return [position if key is None else first.setdefault(key, position) for position, key in enumerate(keys)]
+
+
+def _free_text_key(value):
+    """Normalize a free-text address, city or state for a cache key: cleaned, with whitespace collapsed."""
+    cleaned = _clean(value)
+    return " ".join(cleaned.split()) if cleaned is not None else None
+
+
+def geocode_addresspoints(addresses, resourcePath, zipcodes=None, indexPath=None, tolerance=500,
+                          batch=True, engine="sqlite", cache=None, maxEdits=2, interpolate=False,
+                          maxGap=100, workers=1):
     """Geocode street addresses by matching them against MORPC's regional address points.
 
     This is the local alternative to geocode(), which calls Nominatim. It is offline, reproducible,
@@ -534,6 +1640,41 @@ def geocode_addresspoints(addresses, resourcePath, zipcodes=None, indexPath=None
         Defaults to 500, which is above the widest campus observed in the validation facilities
         (353 m across 133 points) and well below the closest genuine collision (two "BETHEL RD"
         addresses 75 km apart).
+    batch : bool
+        Optional. Match all of the addresses at once, with one join against the index per tier,
+        rather than with a query per address per tier. The results are the same either way; a batch
+        of thousands of addresses is much faster matched at once. Defaults to True.
+    engine : str
+        Optional. "sqlite" to match by querying the index, or "columnar" to match against an in-memory
+        copy of it with hash joins in pandas (see load_geocode_columns()). The results are the same.
+        The columnar copy is read once per process, so it suits a process geocoding many large
+        batches; it always matches in batch. Defaults to "sqlite".
+    cache : GeocodeCache
+        Optional. Answer addresses matched before from this cache, and add those that were not. A
+        result is reused only for the same house number, street, directionals and ZIP, against an
+        index of the same version built from the same release, with the same tolerance and options.
+    maxEdits : int
+        Optional. Most edits -- characters inserted, deleted or replaced -- by which the "fuzzy" tier
+        may correct a street name the index does not hold. A name may also differ by no more than one
+        edit per four characters, and never in its digits. 0 turns the tier off. It runs only against
+        an index built with build_geocode_index(fuzzy=True). Defaults to 2.
+    interpolate : bool
+        Optional. Where a house number has no address point, place it between the nearest known
+        numbers either side of it, on the same side of the same street in the same ZIP, in the
+        "interpolated" tier. Only for an address with a ZIP, and with a purely numeric house number.
+        The point is an estimate -- a lot is not always where its number suggests -- which is why this
+        is not done unless asked for. Defaults to False.
+    maxGap : int
+        Optional. Most house numbers apart the neighbours of an interpolated address may be. Defaults
+        to 100, a block in most of the region's numbering.
+    workers : int
+        Optional. Number of processes to match in. The addresses are split into shards, each parsed and
+        matched in a worker process over its own read-only connection to the index, and the results
+        put back in input order; they are the same as matching in one process. Worth it for tens of
+        thousands of addresses or more, below which starting the processes costs more than it saves.
+        None uses one per CPU, up to 61. As with build_geocode_index(), a script that asks for more
+        than one must call this from under `if __name__ == "__main__":`. Defaults to 1, which
+        matches in the calling process.
 
     Returns
     -------
@@ -545,115 +1686,532 @@ def geocode_addresspoints(addresses, resourcePath, zipcodes=None, indexPath=None
         matchtier   : "exact" (every component), "components" (house number, street name and ZIP),
                       "number_name" (house number and street name alone), "route_number" (house
                       number and route number, for the counties that publish a route without its
-                      class), or None.
-        matchcount  : number of address points the winning tier found.
+                      class), "interpolated" (between the nearest house numbers either side, with
+                      `interpolate`), "fuzzy" (house number and the nearest street name to a
+                      misspelled one, and the ZIP where there is one), or None.
+        matchcount  : number of address points the winning tier found. For an interpolated address,
+                      the two house numbers it was placed between.
         matchspread : metres between the furthest apart of them.
+        matchstreet : the street of the address points matched, as the index names it -- the
+                      corrected spelling, for a "fuzzy" match -- where a point was returned.
+        matchzip    : the ZIP code of the address points matched, where a point was returned.
         matchnote   : why an address was not matched, where it was not.
     """
-    import math
+    import concurrent.futures
+    import os
     import sqlite3
-    import pandas as pd
-    import geopandas as gpd
-    import shapely
+    import numpy as np
 
     if zipcodes is None:
         zipcodes = [None] * len(addresses)
     if len(zipcodes) != len(addresses):
         logger.error("zipcodes must be the same length as addresses.")
         raise ValueError
-
+    if engine not in ("sqlite", "columnar"):
+        logger.error("engine must be \"sqlite\" or \"columnar\".")
+        raise ValueError
+    if workers is None:
+        workers = _default_workers()
     if indexPath is None:
         indexPath = build_geocode_index(resourcePath)
+    options = {"tolerance": tolerance, "batch": batch, "engine": engine, "maxEdits": maxEdits,
+               "interpolate": interpolate, "maxGap": maxGap}
+
+    if workers == 1 or len(addresses) < 2:
+        index = sqlite3.connect("file:{}?mode=ro".format(indexPath), uri=True)
+        try:
+            version = (_addresspoints_cache_version(index, tolerance, maxEdits, interpolate, maxGap)
+                       if cache is not None else None)
+            results = _match_addresses(index, indexPath, addresses, zipcodes, cache=cache, version=version,
+                                       **options)
+        finally:
+            index.close()
+        return _addresspoints_frame(results)
+
+    # A few shards per worker, so that one left with slower addresses does not hold up the rest. The
+    # results come back as columns rather than frames and are assembled once, so that the types of
+    # the columns are those of a serial run whatever falls in each shard.
+    addresses = list(addresses)
+    zipcodes = list(zipcodes)
+    shards = min(4 * workers, len(addresses))
+    bounds = [len(addresses) * shard // shards for shard in range(shards + 1)]
+    cacheSettings = (cache.path, cache.maxAge, cache.maxEntries) if cache is not None else None
+    shardColumns = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_match_shard, indexPath, addresses[start:stop], zipcodes[start:stop], options,
+                               cacheSettings) for start, stop in zip(bounds, bounds[1:])]
+        for shard, future in enumerate(futures):
+            columns, hits, misses = future.result()
+            shardColumns.append(columns)
+            if cache is not None:
+                with cache._lock:
+                    cache.hits += hits
+                    cache.misses += misses
+            logger.info("Matched shard {:,} of {:,}.".format(shard + 1, shards))
+    return _addresspoints_frame({name: np.concatenate([columns[name] for columns in shardColumns])
+                                 for name in shardColumns[0]})
+
+
+def _match_shard(indexPath, addresses, zipcodes, options, cacheSettings):
+    """Match one shard of the addresses given to geocode_addresspoints(workers=...), in a worker
+    process, over a connection of its own. The cache, if any, is opened again from its settings.
+    Returns the columns of _match_addresses() and the cache hits and misses."""
+    import sqlite3
+
+    cache = GeocodeCache(*cacheSettings) if cacheSettings is not None else None
     index = sqlite3.connect("file:{}?mode=ro".format(indexPath), uri=True)
+    try:
+        version = (_addresspoints_cache_version(index, options["tolerance"], options["maxEdits"],
+                                                options["interpolate"], options["maxGap"])
+                   if cache is not None else None)
+        results = _match_addresses(index, indexPath, addresses, zipcodes, cache=cache, version=version,
+                                   **options)
+    finally:
+        index.close()
+        if cache is not None:
+            cache.close()
+    return results, (cache.hits if cache is not None else 0), (cache.misses if cache is not None else 0)
+
+
+def _addresspoints_cache_version(index, tolerance, maxEdits, interpolate, maxGap):
+    """Return the version under which results matched against `index` with these options are cached:
+    the index version, the release of the data it was built from, and every option that changes a
+    result, as it applies to this index."""
+    import sqlite3
 
-    def separation(candidates):
-        """Metres across the bounding box of the candidate points.
+    try:
+        sourcehash = index.execute("select value from meta where key = 'sourcehash'").fetchone()
+    except sqlite3.OperationalError:
+        sourcehash = None
+    return "v{}:{}:{}:{}:{}".format(
+        CONST_GEOCODE_INDEX_VERSION, sourcehash[0] if sourcehash else None, tolerance,
+        maxEdits if _has_street_name_index(index) else 0,
+        maxGap if interpolate and _has_house_numbers(index) else 0)
+
+
+# Addresses below which _match_addresses() parses them one at a time. The Series functions cost
+# tens of milliseconds however few addresses they are given, which would dominate the small batches
+# a Geocoder serves; TestSeriesParity holds the two to the same results.
+CONST_GEOCODE_SERIES_MINIMUM = 1000
+
+
+def _match_addresses(index, indexPath, addresses, zipcodes, tolerance, batch, engine, cache, version,
+                     maxEdits, interpolate, maxGap, columns=None):
+    """Match addresses as geocode_addresspoints() does, against an open connection to the index, which
+    it leaves open, with the cache version already worked out and, for the columnar engine, optionally
+    the columns already loaded. Returns the columns of the result, by name, as arrays in input order,
+    for _addresspoints_frame(). See geocode_addresspoints() and Geocoder."""
+    import numpy as np
+    import pandas as pd
 
-        The diagonal of the box rather than the true furthest pair, which is the same number for the
-        two point case that matters and an upper bound otherwise, computed in one pass rather than
-        the n squared a common street name would cost.
-        """
-        if len(candidates) < 2:
-            return 0.0
-        lons = [c[0] for c in candidates]
-        lats = [c[1] for c in candidates]
-        midLatitude = math.radians((min(lats) + max(lats)) / 2)
-        northing = (max(lats) - min(lats)) * 111320
-        easting = (max(lons) - min(lons)) * 111320 * math.cos(midLatitude)
-        return math.hypot(northing, easting)
+    if zipcodes is None:
+        zipcodes = [None] * len(addresses)
+    if len(zipcodes) != len(addresses):
+        logger.error("zipcodes must be the same length as addresses.")
+        raise ValueError
 
-    results = []
-    for address, zipcode in zip(addresses, zipcodes):
-        parsed = parse_address(address)
-        record = {"address": address, "matched": False, "matchtier": None, "matchcount": 0,
-                  "matchspread": None, "matchnote": None, "lon": None, "lat": None}
-
-        if parsed is None:
-            record["matchnote"] = "no street name could be parsed from the address"
-            results.append(record)
-            continue
-        record.update(parsed)
+    components = ["streetaddr", "streetname", "streettype", "prefixdir", "suffixdir", "unitnum", "unittype"]
+    if len(addresses) < CONST_GEOCODE_SERIES_MINIMUM:
+        empty = dict.fromkeys(components)
+        parsedAddresses = [parse_address(address) or empty for address in addresses]
+        parsedColumns = {component: np.array([values[component] for values in parsedAddresses], dtype=object)
+                         for component in components}
+        zipcodes = [normalize_zip(zipcode) for zipcode in zipcodes]
+    else:
+        parsedFrame = parse_address_series(addresses)
+        parsedColumns = {component: parsedFrame[component].to_numpy(dtype=object, copy=True)
+                         for component in components}
+        zipcodes = normalize_zip_series(zipcodes).tolist()
+
+    # Addresses that cannot be located are reported as such here. The rest are matched below.
+    results = _MatchResults(len(addresses))
+    named = pd.notna(parsedColumns["streetname"])
+    numbered = named & pd.notna(parsedColumns["streetaddr"])
+    results.matchnote[~named] = "no street name could be parsed from the address"
+    results.matchnote[named & ~numbered] = "address carries no house number, so it cannot be located"
+    pending = [(position, {component: parsedColumns[component][position] for component in components},
+                zipcodes[position]) for position in np.flatnonzero(numbered).tolist()]
+    # An address with no street name has no components to report, which comes out as missing (NaN).
+    for component in components:
+        parsedColumns[component][~named] = np.nan
+
+    # A match depends only on the parsed components and the ZIP, so each distinct combination is
+    # matched once and its result copied to the addresses that repeat it.
+    keys = {position: _cache_key(parsed["streetaddr"], parsed["prefixdir"], parsed["streetname"],
+                                 parsed["streettype"], parsed["suffixdir"], zipcode)
+            for position, parsed, zipcode in pending}
+    first = {}
+    for position, key in keys.items():
+        first.setdefault(key, position)
+    pending = [entry for entry in pending if first[keys[entry[0]]] == entry[0]]
+
+    if cache is not None:
+        cached = cache.get("addresspoints", version, first.keys())
+        for key, position in first.items():
+            if key in cached:
+                results.update(position, cached[key])
+        pending = [entry for entry in pending if keys[entry[0]] not in cached]
+
+    if engine == "columnar":
+        _match_columns(columns if columns is not None else load_geocode_columns(indexPath), pending, results,
+                       tolerance)
+    elif batch:
+        _match_batch(index, pending, results, tolerance)
+    else:
+        _match_each(index, pending, results, tolerance)
+    if interpolate:
+        _match_interpolated(index, pending, results, tolerance, maxGap)
+    _match_fuzzy(index, pending, results, tolerance, maxEdits)
 
-        if parsed["streetaddr"] is None:
-            record["matchnote"] = "address carries no house number, so it cannot be located"
-            results.append(record)
-            continue
+    if cache is not None:
+        cache.put("addresspoints", version, {keys[position]: results.get(position) for position, _, _ in pending})
+    repeats = np.array([position for position, key in keys.items() if first[key] != position], dtype=np.int64)
+    results.copy(repeats, np.array([first[keys[position]] for position in repeats.tolist()], dtype=np.int64))
 
-        zipcode = normalize_zip(zipcode)
-        tiers = [
-            ("exact", "streetaddr=? and streetname=? and streettype is ? and prefixdir is ? and suffixdir is ?"
-                      + (" and zip=?" if zipcode else ""),
-             [parsed["streetaddr"], parsed["streetname"], parsed["streettype"],
-              parsed["prefixdir"], parsed["suffixdir"]] + ([zipcode] if zipcode else [])),
-            ("components", "streetaddr=? and streetname=?" + (" and zip=?" if zipcode else ""),
-             [parsed["streetaddr"], parsed["streetname"]] + ([zipcode] if zipcode else [])),
-            ("number_name", "streetaddr=? and streetname=?",
-             [parsed["streetaddr"], parsed["streetname"]]),
-        ]
-
-        # The counties disagree about whether a numbered route name carries its class, so a query
-        # normalized to "US 42" finds nothing where a county published "42". Matching on the number
-        # alone recovers those, but it cannot distinguish Logan's "CR 32" from its "TR 32", so it
-        # runs only after the full name has failed and is reported as its own tier.
-        number = route_number(parsed["streetname"])
-        if number is not None:
-            tiers.append(("route_number", "streetaddr=? and routenum=?" + (" and zip=?" if zipcode else ""),
-                          [parsed["streetaddr"], number] + ([zipcode] if zipcode else [])))
-
-        for tier, where, parameters in tiers:
-            candidates = index.execute(
-                "select lon, lat from addresspoints where " + where, parameters).fetchall()
-            if not candidates:
-                continue
-            spread = separation(candidates)
-            record.update({"matchtier": tier, "matchcount": len(candidates),
-                           "matchspread": round(spread, 1)})
-            if spread > tolerance:
-                record["matchnote"] = ("{} address points {:,.0f} m apart match equally well"
-                                       .format(len(candidates), spread))
-                break
-            # One address commonly matches many points -- the units of an apartment building, or the
-            # buildings of a hospital campus. They are one place, so the result is their centre.
-            record.update({"matched": True,
-                           "lon": sum(c[0] for c in candidates) / len(candidates),
-                           "lat": sum(c[1] for c in candidates) / len(candidates)})
-            break
-        else:
-            record["matchnote"] = "no address point matches this house number and street name"
+    addressColumn = np.empty(len(addresses), dtype=object)
+    addressColumn[:] = list(addresses)
+    return dict({"address": addressColumn}, **results.columns(), **parsedColumns)
 
-        results.append(record)
 
-    index.close()
-    frame = pd.DataFrame(results)
-    geometry = [shapely.Point(lon, lat) if pd.notna(lon) else None
-                for lon, lat in zip(frame["lon"], frame["lat"])]
-    frame = frame.drop(columns=["lon", "lat"])
+def _addresspoints_frame(columns):
+    """Assemble the columns of _match_addresses() into what geocode_addresspoints() returns.
+
+    The columns are taken as they are, and the points made in one call. Columns of Python objects are
+    given the types pandas would infer for them, as it would for the same values a row at a time.
+    """
+    import numpy as np
+    import pandas as pd
+    import geopandas as gpd
+    import shapely
+
+    frame = pd.DataFrame({name: column for name, column in columns.items() if name not in ("lon", "lat")},
+                         copy=False).infer_objects()
+    located = ~np.isnan(columns["lon"])
+    geometry = np.full(len(frame), None, dtype=object)
+    geometry[located] = shapely.points(columns["lon"][located], columns["lat"][located])
     logger.info("Matched {:,} of {:,} addresses against the address points."
-                .format(int(frame["matched"].sum()), len(frame)))
+                .format(int(columns["matched"].sum()), len(frame)))
     return gpd.GeoDataFrame(frame, geometry=geometry, crs="EPSG:4326")
 
 
-def geocode(addresses: list, endpoint=None):
+class Geocoder:
+    """A geocoder against MORPC's regional address points that stays open between calls.
+
+    geocode_addresspoints() checks the index, opens it, matches and closes it again on every call,
+    which is nothing for one large batch but dominates a service geocoding a few addresses at a time.
+    A Geocoder does the setup once: it checks or builds the index when it is created and holds a pool
+    of read-only connections to it, each with the index mapped into memory, a page cache and a cache
+    of prepared statements, which stay warm from one call to the next. Its geocode() takes the
+    addresses and ZIP codes of geocode_addresspoints() and returns the same results.
+
+    It may be called from several threads at once. Each call takes a connection from the pool for as
+    long as it runs, so up to `connections` calls run at a time and the rest wait for one to be free.
+
+    Parameters
+    ----------
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize. The index
+        is built or refreshed from it, if needed, when the Geocoder is created. Not needed if
+        `indexPath` is given.
+    indexPath : str
+        Optional. Path to the geocoding index, used as it is. See build_geocode_index().
+    connections : int
+        Optional. Connections to hold open, and so calls to run at once. Defaults to 4.
+    mmapSize : int
+        Optional. Bytes of the index each connection maps into memory, which the operating system
+        shares between them. Defaults to 1 GiB, which covers the regional index.
+    cacheSize : int
+        Optional. KiB of pages each connection caches beyond the mapped ones. Defaults to 65,536.
+    statements : int
+        Optional. Prepared statements each connection keeps. Defaults to 256.
+    tolerance, batch, engine, cache, maxEdits, interpolate, maxGap
+        Optional. As for geocode_addresspoints(), for every call.
+
+    Attributes
+    ----------
+    indexPath : str
+        Path to the geocoding index.
+    calls, addresses : int
+        Calls to geocode() since the Geocoder was created, and addresses geocoded by them.
+    """
+
+    def __init__(self, resourcePath=None, indexPath=None, connections=4, mmapSize=2 ** 30,
+                 cacheSize=65536, statements=256, tolerance=500, batch=True, engine="sqlite", cache=None,
+                 maxEdits=2, interpolate=False, maxGap=100):
+        import collections
+        import queue
+
+        if engine not in ("sqlite", "columnar"):
+            logger.error("engine must be \"sqlite\" or \"columnar\".")
+            raise ValueError
+        if connections < 1:
+            logger.error("connections must be at least 1.")
+            raise ValueError
+
+        self.indexPath = indexPath if indexPath is not None else build_geocode_index(resourcePath)
+        self.mmapSize = mmapSize
+        self.cacheSize = cacheSize
+        self.statements = statements
+        self.options = {"tolerance": tolerance, "batch": batch, "engine": engine, "cache": cache,
+                        "maxEdits": maxEdits, "interpolate": interpolate, "maxGap": maxGap}
+        self.calls = 0
+        self.addresses = 0
+        self._latencies = collections.deque(maxlen=10000)
+        self._lock = threading.Lock()
+        self._pool = queue.LifoQueue()
+        for _ in range(connections):
+            self._pool.put(self._connect())
+        self._connections = connections
+        self._closed = False
+
+        connection = self._pool.get()
+        try:
+            self._version = (_addresspoints_cache_version(connection, tolerance, maxEdits, interpolate, maxGap)
+                             if cache is not None else None)
+        finally:
+            self._pool.put(connection)
+        self._columns = load_geocode_columns(self.indexPath) if engine == "columnar" else None
+
+    def _connect(self):
+        import sqlite3
+
+        connection = sqlite3.connect("file:{}?mode=ro".format(self.indexPath), uri=True,
+                                     check_same_thread=False, cached_statements=self.statements)
+        connection.execute("pragma mmap_size = {:d}".format(self.mmapSize))
+        connection.execute("pragma cache_size = {:d}".format(-self.cacheSize))
+        connection.execute("pragma temp_store = memory")
+        return connection
+
+    def geocode(self, addresses, zipcodes=None):
+        """Geocode street addresses, as geocode_addresspoints() does.
+
+        Parameters
+        ----------
+        addresses : list
+            Single-line street addresses ("1234 E MAIN ST").
+        zipcodes : list
+            Optional. ZIP codes parallel to `addresses`.
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            As geocode_addresspoints() returns. Its attrs["latency"] is the seconds the call took,
+            including any wait for a connection.
+        """
+        import time
+
+        start = time.perf_counter()
+        if self._closed:
+            logger.error("The Geocoder has been closed.")
+            raise RuntimeError("The Geocoder has been closed.")
+        connection = self._pool.get()
+        try:
+            if connection is None:
+                connection = self._connect()
+            results = _match_addresses(connection, self.indexPath, addresses, zipcodes,
+                                       version=self._version, columns=self._columns, **self.options)
+        except BaseException:
+            # A call that failed part way may leave its temporary tables behind, so its connection is
+            # closed rather than reused. It goes back to the pool as None, for the next call to draw it
+            # to reconnect, so that an index that cannot be opened now fails that call rather than
+            # leaving a closed connection in the pool.
+            if connection is not None:
+                connection.close()
+            connection = None
+            raise
+        finally:
+            self._pool.put(connection)
+        result = _addresspoints_frame(results)
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.addresses += len(addresses)
+            self._latencies.append(latency)
+        result.attrs["latency"] = latency
+        logger.debug("Geocoded {:,} addresses in {:.1f} ms.".format(len(addresses), latency * 1000))
+        return result
+
+    def stats(self):
+        """Return a dict of the calls made, the addresses geocoded, and the latency of the calls in
+        seconds: the mean, median, 95th percentile and maximum over the last 10,000 calls."""
+        import numpy as np
+
+        with self._lock:
+            latencies = np.array(self._latencies)
+            calls, addresses = self.calls, self.addresses
+        if not len(latencies):
+            return {"calls": calls, "addresses": addresses, "mean": None, "p50": None, "p95": None, "max": None}
+        return {"calls": calls, "addresses": addresses, "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)), "p95": float(np.percentile(latencies, 95)),
+                "max": float(latencies.max())}
+
+    def close(self):
+        """Close the connections to the index, once every call running has returned its own."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in range(self._connections):
+            connection = self._pool.get()
+            if connection is not None:
+                connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def reverse_geocode_addresspoints(points, resourcePath=None, indexPath=None, k=1, maxDistance=100,
+                                  batchSize=20000):
+    """Find the nearest of MORPC's regional address points to each of a set of points.
+
+    The reverse of geocode_addresspoints(): for GPS points such as crash locations or transit stops,
+    the auditor addresses nearest to them. It uses the same geocoding index, with the R*Tree of
+    address point locations that build_geocode_index(spatial=True) adds to it. Each batch of points is
+    one query, which finds the address points near each of them through the R*Tree and measures the
+    distance to each in SQLite, so that only the nearest come back.
+
+    The points of one building or campus that share an address are one address here, at the nearest
+    of them, so that the `k` nearest are `k` different addresses rather than `k` units of one. This
+    makes a `k` of more than 1 several times slower than the default, which needs no such grouping.
+
+    Parameters
+    ----------
+    points : geopandas.GeoDataFrame, geopandas.GeoSeries or list
+        The points to find addresses for. A GeoDataFrame or GeoSeries is reprojected to EPSG:4326 from
+        whatever it is in; a list of shapely Points is taken to be in EPSG:4326 already. Anything that
+        is not a point is left without an address.
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize. The index
+        is built, or the R*Tree added to it, if needed. Not needed if `indexPath` is given.
+    indexPath : str
+        Optional. Path to a geocoding index built with build_geocode_index(spatial=True).
+    k : int
+        Optional. Number of nearest addresses to find for each point. Defaults to 1.
+    maxDistance : float
+        Optional. Metres beyond which an address point is not considered near. Defaults to 100.
+    batchSize : int
+        Optional. Points per query. Defaults to 20,000.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        The points, with their columns and their index, joined to the addresses nearest them: one row
+        for each of up to `k` addresses per point, nearest first, or a single row with no address where
+        none is within `maxDistance`. The geometry is that of the points, in EPSG:4326. The address
+        columns are:
+
+        address       : the address, assembled from its components.
+        streetaddr, prefixdir, streetname, streettype, suffixdir, city, zip, county : its components.
+        addresspoint  : the location of the address point, in EPSG:4326.
+        distance      : metres from the point to it.
+        rank          : 1 for the nearest address to the point, 2 for the next, and so on.
+    """
+    import sqlite3
+    import numpy as np
+    import pandas as pd
+    import geopandas as gpd
+    import shapely
+
+    if isinstance(points, gpd.GeoDataFrame):
+        frame = points.to_crs("EPSG:4326") if points.crs is not None else points
+    else:
+        series = points if isinstance(points, gpd.GeoSeries) else gpd.GeoSeries(list(points), crs="EPSG:4326")
+        frame = gpd.GeoDataFrame(geometry=series.to_crs("EPSG:4326") if series.crs is not None else series)
+    if k < 1:
+        logger.error("k must be at least 1.")
+        raise ValueError
+
+    if indexPath is None:
+        indexPath = build_geocode_index(resourcePath, spatial=True)
+    index = sqlite3.connect("file:{}?mode=ro".format(indexPath), uri=True)
+    if not _has_location_index(index):
+        index.close()
+        logger.error("The geocoding index at {} has no spatial index.".format(indexPath))
+        raise RuntimeError("The geocoding index at {} has no spatial index. Add one with "
+                           "build_geocode_index(resourcePath, indexPath, spatial=True).".format(indexPath))
+
+    geometry = frame.geometry.to_numpy()
+    located = np.flatnonzero(shapely.get_type_id(geometry) == 0)
+    located = located[~shapely.is_empty(geometry[located])]
+    lon = shapely.get_x(geometry[located])
+    lat = shapely.get_y(geometry[located])
+
+    components = ["streetaddr", "prefixdir", "streetname", "streettype", "suffixdir", "city", "zip", "county"]
+    # Squared metres from each point to the address points the R*Tree finds near it, measured from
+    # the R*Tree's own copy of their locations to spare a lookup in addresspoints for each. It holds
+    # them in single precision, to within half a metre, so they are only used to pick the nearest;
+    # the distances returned are measured again from the address points themselves.
+    squared = """((r.minlon + r.maxlon) / 2 - q.lon) * q.scale * (((r.minlon + r.maxlon) / 2 - q.lon) * q.scale)
+        + ((r.minlat + r.maxlat) / 2 - q.lat) * 111320 * (((r.minlat + r.maxlat) / 2 - q.lat) * 111320)"""
+    near = """queries q join addresspoint_locations r on r.minlon <= q.maxlon and r.maxlon >= q.minlon
+        and r.minlat <= q.maxlat and r.maxlat >= q.minlat"""
+    if k == 1:
+        # The nearest address is that of the nearest address point, which SQLite picks out as it goes
+        # through each point's candidates, taking the rest of the row from the one min() picks. If it
+        # is beyond maxDistance, so is every other.
+        query = """select n.id, {}, a.lon, a.lat from (
+            select q.id, r.id as point, min({}) from {} group by q.id) n
+            join addresspoints a on a.rowid = n.point""".format(", ".join("a." + c for c in components), squared, near)
+        params = ()
+    else:
+        # The points of one building or campus are collapsed to the nearest of them, with the same
+        # rule, before they are ranked.
+        query = """select q.id, {}, a.lon, a.lat, min({}) as squared from {} join addresspoints a on a.rowid = r.id
+            where {} <= ?
+            group by q.id, a.streetaddr, a.prefixdir, a.streetname, a.streettype, a.suffixdir, a.zip
+            """.format(", ".join("a." + c for c in components), squared, near, squared)
+        params = ((maxDistance + 1) ** 2,)
+    found = []
+    index.execute("""create temp table queries (
+        id integer primary key, minlon real, maxlon real, minlat real, maxlat real, lon real, lat real,
+        scale real)""")
+    latitude = maxDistance / 111320
+    for start in range(0, len(located), batchSize):
+        stop = min(start + batchSize, len(located))
+        # Metres per degree of longitude at each point, as _separation() measures them. The box is
+        # widened by the cosine at its far edge, so that it takes in everything within the distance.
+        scale = 111320 * np.cos(np.radians(lat[start:stop]))
+        longitude = latitude / np.cos(np.radians(np.minimum(np.abs(lat[start:stop]) + latitude, 89)))
+        index.executemany("insert into queries values (?,?,?,?,?,?,?,?)", zip(
+            range(start, stop), (lon[start:stop] - longitude).tolist(), (lon[start:stop] + longitude).tolist(),
+            (lat[start:stop] - latitude).tolist(), (lat[start:stop] + latitude).tolist(),
+            lon[start:stop].tolist(), lat[start:stop].tolist(), scale.tolist()))
+        batch = pd.read_sql_query(query, index, params=params)
+        ids = batch["id"].to_numpy(int)
+        batch["distance"] = np.hypot((batch["lon"].to_numpy(float) - lon[ids]) * scale[ids - start],
+                                     (batch["lat"].to_numpy(float) - lat[ids]) * 111320)
+        found.append(batch.loc[batch["distance"] <= maxDistance, ["id"] + components + ["lon", "lat", "distance"]]
+                     .sort_values(["id", "distance"], kind="stable").groupby("id").head(k))
+        index.execute("delete from queries")
+        logger.info("Searched around {:,} of {:,} points.".format(stop, len(located)))
+    index.execute("drop table queries")
+    index.close()
+
+    nearest = (pd.concat(found, ignore_index=True) if found
+               else pd.DataFrame(columns=["id"] + components + ["lon", "lat", "distance"]))
+    nearest["rank"] = nearest.groupby("id").cumcount() + 1
+    nearest["address"] = [" ".join(part for part in parts if isinstance(part, str)) for parts in
+                          nearest[["streetaddr", "prefixdir", "streetname", "streettype", "suffixdir"]]
+                          .itertuples(index=False, name=None)]
+    nearest["addresspoint"] = shapely.points(nearest["lon"].to_numpy(float), nearest["lat"].to_numpy(float))
+    nearest["position"] = located[nearest["id"].to_numpy(int)]
+
+    # Every point is kept, in order, with one row for each address found for it or one row without.
+    rows = pd.DataFrame({"position": np.arange(len(frame))}).merge(
+        nearest[["position", "address"] + components + ["addresspoint", "distance", "rank"]],
+        on="position", how="left")
+    result = frame.iloc[rows["position"].to_numpy()].copy()
+    for column in rows.columns.drop("position"):
+        result[column] = rows[column].to_numpy()
+    result["addresspoint"] = gpd.GeoSeries(result["addresspoint"].to_numpy(), index=result.index, crs="EPSG:4326")
+    logger.info("Found addresses within {:,} m of {:,} of {:,} points.".format(
+        maxDistance, nearest["id"].nunique(), len(frame)))
+    return result
+
+
+def geocode(addresses: list, endpoint=None, cache=None, rate=None, concurrency=1):
     """
     Geocode a list of adresses.
 
@@ -665,6 +2223,19 @@ def geocode(addresses: list, endpoint=None):
     endpoint : str
         Optional: str of the endpoint. Used for running nominatim in local docker container, then change to "localhost:8080".
 
+    cache : GeocodeCache
+        Optional: answer addresses geocoded before by the same Nominatim instance from this cache, and add
+        those that were not. Against the public instance, which allows one request a second, this is
+        most of the run time of a repeated list.
+
+    rate : float
+        Optional: most requests a second. Defaults to None, which is one a second against the public
+        instance, its usage policy's limit, which this cannot raise, and no limit against a local one.
+
+    concurrency : int
+        Optional: requests in flight at once, for a local instance that can serve several. Against the
+        public instance the rate limit holds however many there are. Defaults to 1.
+
     Returns:
     --------
     pandas.DataFrame
@@ -674,6 +2245,7 @@ def geocode(addresses: list, endpoint=None):
     import pandas as pd, time
     from geopy.geocoders import Nominatim
     from geopy.extra.rate_limiter import RateLimiter
+    from geopy.location import Location
     from tqdm import tqdm
 
     tqdm.pandas()
@@ -684,32 +2256,192 @@ def geocode(addresses: list, endpoint=None):
         delay = 1
         logging.info(f"Fetching from default public nominatim instance.")
         geolocator = Nominatim(user_agent="morpc-py", timeout=10)
-
-        # Wrap with RateLimiter: min 1 sec between calls as per Nominatim policy
-        geocode = RateLimiter(geolocator.geocode, min_delay_seconds=delay)
-        
-        df["location"] = df["address"].progress_apply(geocode)
-        df["lat"] = df["location"].apply(lambda loc: loc.latitude if loc else None)
-        df["lon"] = df["location"].apply(lambda loc: loc.longitude if loc else None)
     else:
         delay = 0
         geolocator = Nominatim(domain=endpoint, scheme='http', user_agent="local-nominatim")
+    if rate is not None:
+        delay = max(delay, 1 / rate)
+
+    # Wrap with RateLimiter: min 1 sec between calls as per Nominatim policy. It is thread-safe, so the
+    # limit holds across concurrent requests.
+    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=delay) if delay else geolocator.geocode
+
+    # A cached location is stored as its parts and made a Location again, so that a cached row is
+    # indistinguishable from a fetched one. A None is a cached answer too: Nominatim found nothing.
+    # Each distinct address is looked up once, and its location copied to the addresses that repeat
+    # it, so that a repeated address costs nothing against the rate limit.
+    df["location"] = None
+    keys = df["address"].map(_free_text_key)
+    first = pd.Series(_first_occurrences(keys), index=df.index)
+    missing = first == df.index
+    if cache is not None:
+        version = endpoint if endpoint != None else "public"
+        cached = cache.get("nominatim", version, keys)
+        for position, key in keys.items():
+            if key in cached and missing[position]:
+                missing[position] = False
+                if cached[key] is not None:
+                    df.at[position, "location"] = Location(cached[key]["address"],
+                        (cached[key]["latitude"], cached[key]["longitude"]), cached[key]["raw"])
+
+    if missing.any() and concurrency > 1:
+        import concurrent.futures
+        # Set one at a time, since pandas would otherwise take each Location for a sequence to unpack.
+        located = df.loc[missing, "address"].astype(object)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for position, location in enumerate(tqdm(pool.map(geocode, located), total=len(located))):
+                located.iat[position] = location
+        df.loc[missing, "location"] = located
+    elif missing.any():
+        df.loc[missing, "location"] = df.loc[missing, "address"].progress_apply(geocode)
+    df["location"] = df["location"].to_numpy()[first.to_numpy()]
+    df["lat"] = df["location"].apply(lambda loc: loc.latitude if loc else None)
+    df["lon"] = df["location"].apply(lambda loc: loc.longitude if loc else None)
+
+    if cache is not None:
+        cache.put("nominatim", version, {
+            keys[position]: ({"address": loc.address, "latitude": loc.latitude,
+                              "longitude": loc.longitude, "raw": loc.raw} if loc else None)
+            for position, loc in df.loc[missing, "location"].items()})
+
+    return df
 
-        geocode = geolocator.geocode
 
-        df["location"] = df["address"].progress_apply(geocode)
-        df["lat"] = df["location"].apply(lambda loc: loc.latitude if loc else None)
-        df["lon"] = df["location"].apply(lambda loc: loc.longitude if loc else None)
+def _throttle(rate):
+    """Return a function that, called from any number of threads, returns no more than `rate` times a
+    second between them, waiting as long as it takes. None is no limit."""
+    import time
 
+    if rate is None:
+        return lambda: None
+    lock = threading.Lock()
+    following = [time.monotonic()]
 
+    def wait():
+        with lock:
+            now = time.monotonic()
+            slot = max(now, following[0])
+            following[0] = slot + 1 / rate
+        time.sleep(slot - now)
+    return wait
 
 
+CONST_GEOCODER_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+_GEOCODER_SESSIONS = {}
+_GEOCODER_SESSIONS_LOCK = threading.Lock()
+
+
+def _geocoder_session(endpoint, concurrency):
+    """Return the pooled HTTP session for an endpoint, created on first use.
+
+    The session is shared by every call to the same endpoint with the same concurrency, so that
+    connections are kept alive across calls as well as across the batches of one call.
+    """
+    import requests
+
+    with _GEOCODER_SESSIONS_LOCK:
+        session = _GEOCODER_SESSIONS.get((endpoint, concurrency))
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency,
+                                                    pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _GEOCODER_SESSIONS[(endpoint, concurrency)] = session
+        return session
+
+
+def _post_geocoder_batch(session, endpoint, payload, timeout):
+    """Post one batch to the geocoder service at `endpoint`, once.
+
+    Returns its results and None, or, where the batch could not be delivered, timed out, or was refused
+    with a status the service may recover from (CONST_GEOCODER_RETRY_STATUSES), None and the error, so
+    that the batch can be sent again. Any other error raises.
+    """
+    import requests
+
+    url = "{}/geocode/batch".format(endpoint)
+    try:
+        response = session.post(url, json=payload, timeout=timeout)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        return None, e
+    except requests.exceptions.RequestException as e:
+        logger.error("The geocoder at {} returned an error.".format(endpoint))
+        raise RuntimeError("The MORPC geocoder at {} returned an error: {}".format(endpoint, e))
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        if response.status_code not in CONST_GEOCODER_RETRY_STATUSES:
+            logger.error("The geocoder at {} returned an error.".format(endpoint))
+            raise RuntimeError("The MORPC geocoder at {} returned an error: {}".format(endpoint, e))
+        return None, e
+    return response.json()["results"], None
 
-    return df
+
+class _GeocoderReplicas:
+    """The endpoints query_geocoder() spreads its batches across, and how each of them is doing.
+
+    A batch goes to the endpoint with the fewest batches in flight, of those that are up and have a
+    connection free, so that a replica that answers faster is sent more. An endpoint that fails a batch
+    is rested for `backoff` seconds, doubled for each failure after it without a success between, and
+    the others take its batches meanwhile; once rested it is sent batches again. When every endpoint is
+    resting, a batch waits for the first to be back.
+    """
+
+    def __init__(self, endpoints, concurrency, backoff):
+        self.endpoints = endpoints
+        self.sessions = {endpoint: _geocoder_session(endpoint, concurrency) for endpoint in endpoints}
+        self.concurrency = concurrency
+        self.backoff = backoff
+        self.inFlight = dict.fromkeys(endpoints, 0)
+        self.sent = dict.fromkeys(endpoints, 0)
+        self.failures = dict.fromkeys(endpoints, 0)
+        self.failedAt = dict.fromkeys(endpoints)
+        self.restUntil = dict.fromkeys(endpoints, 0.0)
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for an endpoint to send a batch to. Returns it and the time it was chosen at."""
+        import time
+
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                up = [endpoint for endpoint in self.endpoints if self.restUntil[endpoint] <= now]
+                free = [endpoint for endpoint in up if self.inFlight[endpoint] < self.concurrency]
+                if free:
+                    endpoint = min(free, key=lambda endpoint: (self.inFlight[endpoint], self.sent[endpoint]))
+                    self.inFlight[endpoint] += 1
+                    self.sent[endpoint] += 1
+                    return endpoint, now
+                self.condition.wait(None if up else min(self.restUntil.values()) - now)
+
+    def release(self, endpoint, chosen, error):
+        """Record that the batch sent to `endpoint` at `chosen` has come back, having failed with
+        `error` unless it is None."""
+        import time
+
+        with self.condition:
+            self.inFlight[endpoint] -= 1
+            if error is None:
+                self.failures[endpoint] = 0
+            elif self.failedAt[endpoint] is None or chosen >= self.failedAt[endpoint]:
+                # The batches already in flight when an endpoint fails fail with it. That is one failure.
+                now = time.monotonic()
+                self.failures[endpoint] += 1
+                self.failedAt[endpoint] = now
+                rest = self.backoff * 2 ** (self.failures[endpoint] - 1)
+                self.restUntil[endpoint] = now + rest
+                if len(self.endpoints) > 1:
+                    logger.warning("The geocoder at {} failed ({}). Sending its batches to the others for {:,.1f} "
+                                   "seconds.".format(endpoint, error, rest))
+            self.condition.notify_all()
 
 
 def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, states=None,
-                   zipcodes=None, batchSize=500, timeout=60):
+                   zipcodes=None, batchSize=500, timeout=60, cache=None, concurrency=4, retries=3,
+                   backoff=1.0, rate=None):
     """Geocode street addresses with MORPC's self-hosted Pelias geocoder.
 
     Requires a running deployment of morpc-geocoder
@@ -719,6 +2451,11 @@ def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, sta
     first (clone, fill in docker/.env, run ./rebuild.sh) and pass its address as `endpoint`; nothing
     here starts, checks or falls back to anything else if it is not running.
 
+    Where several replicas of the stack are deployed, pass them all as `endpoint`. Each batch goes to
+    the replica with the fewest batches in flight, so that a faster one is sent more. A replica that
+    fails a batch is rested and its batch sent to another, so that the run carries on without it, and
+    it is sent batches again once rested. See _GeocoderReplicas.
+
     This is the fuzzy alternative to geocode_addresspoints(), which joins against the address points
     directly. That one matches only what a county auditor published, tier by tier, and abstains
     otherwise. This one adds full-text and typo-tolerant search and can interpolate a house number
@@ -735,9 +2472,9 @@ def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, sta
         Street addresses without the city, state or ZIP ("205 E CENTRAL AVE"). Supply those through
         the parallel parameters below, where they are known -- the service uses them to search more
         precisely, and packing them into this string instead makes the match worse, not better.
-    endpoint : str
-        Optional. Base URL of the geocoder service. Defaults to http://127.0.0.1:8000, where a local
-        deployment listens.
+    endpoint : str or list of str
+        Optional. Base URL of the geocoder service, or a list of the base URLs of its replicas.
+        Defaults to http://127.0.0.1:8000, where a local deployment listens.
     cities : list
         Optional. Cities parallel to `addresses`.
     states : list
@@ -745,10 +2482,26 @@ def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, sta
     zipcodes : list
         Optional. ZIP codes parallel to `addresses`.
     batchSize : int
-        Optional. Addresses per request. The service geocodes each batch concurrently; this only
-        bounds how much is in flight at once. Defaults to 500.
+        Optional. Addresses per request. The service geocodes each batch concurrently. Defaults to 500.
     timeout : float
         Optional. Seconds to wait for one batch. Defaults to 60.
+    cache : GeocodeCache
+        Optional. Answer addresses geocoded before by any of the endpoints from this cache, and add
+        those that were not, so that only new addresses are sent to the service.
+    concurrency : int
+        Optional. Batches in flight at once to each endpoint, over a pool of as many kept-alive
+        connections shared by every call to the same endpoint. A self-hosted deployment can take
+        several at a time; a shared one may not. Defaults to 4.
+    retries : int
+        Optional. Times a batch is sent again after a connection error, a timeout, or a status the
+        service may recover from (429, 500, 502, 503 or 504), before the run fails. With several
+        endpoints, it is sent to another one. Defaults to 3.
+    backoff : float
+        Optional. Seconds an endpoint that failed a batch is rested before it is sent another, doubled
+        for each failure after it without a success between. Defaults to 1.
+    rate : float
+        Optional. Most batches to send a second, however many are in flight, for a shared deployment
+        that asks for it. Defaults to None, which sends each as soon as a connection is free.
 
     Returns
     -------
@@ -766,11 +2519,13 @@ def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, sta
     Raises
     ------
     RuntimeError
-        If the service cannot be reached, or answers with an error.
+        If the service cannot be reached, or answers with an error, once a batch's retries are spent.
     """
+    import concurrent.futures
+    import requests
+    import numpy as np
     import pandas as pd
     import geopandas as gpd
-    import requests
     import shapely
 
     def parallel(values, name):
@@ -784,46 +2539,645 @@ def query_geocoder(addresses, endpoint="http://127.0.0.1:8000", cities=None, sta
     cities = parallel(cities, "cities")
     states = parallel(states, "states")
     zipcodes = parallel(zipcodes, "zipcodes")
+    endpoints = list(dict.fromkeys(url.rstrip("/") for url in ([endpoint] if isinstance(endpoint, str)
+                                                               else endpoint)))
+    if not endpoints:
+        logger.error("endpoint must name at least one geocoder.")
+        raise ValueError
 
-    url = "{}/geocode/batch".format(endpoint.rstrip("/"))
-    results = []
+    # The service's results are written into these columns as they arrive, rather than kept per address.
+    matched = np.zeros(len(addresses), dtype=bool)
+    longitude = np.full(len(addresses), np.nan)
+    latitude = np.full(len(addresses), np.nan)
+    fields = {field: np.full(len(addresses), None, dtype=object)
+              for field in ("confidence", "layer", "label", "housenumber", "note")}
+
+    def store(position, result):
+        matched[position] = result["matched"]
+        if result["matched"]:
+            longitude[position] = result["longitude"]
+            latitude[position] = result["latitude"]
+        for field, column in fields.items():
+            column[position] = result.get(field)
+
+    # Each distinct address is sent once, and its result copied to the addresses that repeat it.
+    keys = [_cache_key(_free_text_key(address), _free_text_key(city), _free_text_key(state),
+                       normalize_zip(zipcode))
+            for address, city, state, zipcode in zip(addresses, cities, states, zipcodes)]
+    first = _first_occurrences(keys)
+    cached = {}
+    if cache is not None:
+        for url in endpoints:
+            cached.update(cache.get("morpc-geocoder", url, [key for key in keys if key not in cached]))
+    missing = []
+    for position, key in enumerate(keys):
+        if first[position] != position:
+            continue
+        if key in cached:
+            store(position, cached[key])
+        else:
+            missing.append(position)
 
-    for start in range(0, len(addresses), batchSize):
-        stop = start + batchSize
+    def post(positions):
         payload = {"addresses": [
-            {"address": address, "city": city, "state": state, "zipcode": zipcode}
-            for address, city, state, zipcode
-            in zip(addresses[start:stop], cities[start:stop], states[start:stop],
-                   zipcodes[start:stop])]}
-
-        try:
-            response = requests.post(url, json=payload, timeout=timeout)
-            response.raise_for_status()
-        except requests.exceptions.ConnectionError:
-            logger.error("Could not reach the geocoder at {}.".format(endpoint))
+            {"address": addresses[position], "city": cities[position], "state": states[position],
+             "zipcode": zipcodes[position]}
+            for position in positions]}
+        for attempt in range(retries + 1):
+            if attempt:
+                logger.warning("Retrying a batch of {:,} addresses after: {}".format(len(positions), error))
+            url, chosen = replicas.acquire()
+            try:
+                throttle()
+                batchResults, error = _post_geocoder_batch(replicas.sessions[url], url, payload, timeout)
+            except BaseException:
+                replicas.release(url, chosen, None)
+                raise
+            replicas.release(url, chosen, error)
+            if error is None:
+                return positions, url, batchResults
+
+        if isinstance(error, requests.exceptions.ConnectionError):
+            logger.error("Could not reach the geocoder at {}.".format(url))
             raise RuntimeError(
                 "Could not reach the MORPC geocoder at {}. It is a Docker Compose stack that has to "
                 "be deployed and running before this function can be used -- see "
                 "https://github.com/morpc/morpc-geocoder. If it is deployed elsewhere, "
-                "pass its address as endpoint.".format(endpoint))
-        except requests.exceptions.RequestException as e:
-            logger.error("The geocoder at {} returned an error.".format(endpoint))
-            raise RuntimeError("The MORPC geocoder at {} returned an error: {}".format(endpoint, e))
-
-        results.extend(response.json()["results"])
-        logger.info("Geocoded {:,} of {:,} addresses.".format(len(results), len(addresses)))
-
+                "pass its address as endpoint.".format(url))
+        logger.error("The geocoder at {} returned an error.".format(url))
+        raise RuntimeError("The MORPC geocoder at {} returned an error: {}".format(url, error))
+
+    def collect(future):
+        positions, url, batchResults = future.result()
+        for position, result in zip(positions, batchResults):
+            store(position, result)
+        # Each batch is cached as it arrives, so that a run that fails part way keeps what it got.
+        if cache is not None:
+            cache.put("morpc-geocoder", url, {keys[position]: result
+                                              for position, result in zip(positions, batchResults)})
+        return len(positions)
+
+    replicas = _GeocoderReplicas(endpoints, concurrency, backoff)
+    throttle = _throttle(rate)
+    workers = concurrency * len(endpoints)
+    geocoded = 0
+    # Only a couple of batches per connection are queued ahead of what has been collected.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        inFlight = []
+        try:
+            for start in range(0, len(missing), batchSize):
+                inFlight.append(pool.submit(post, missing[start:start + batchSize]))
+                if len(inFlight) >= 2 * workers:
+                    geocoded += collect(inFlight.pop(0))
+                    logger.info("Geocoded {:,} of {:,} addresses.".format(geocoded, len(missing)))
+            while inFlight:
+                geocoded += collect(inFlight.pop(0))
+                logger.info("Geocoded {:,} of {:,} addresses.".format(geocoded, len(missing)))
+        finally:
+            for future in inFlight:
+                future.cancel()
+    sources = np.asarray(first, dtype=np.int64)
+    matched = matched[sources]
+    addressColumn = np.empty(len(addresses), dtype=object)
+    addressColumn[:] = list(addresses)
     frame = pd.DataFrame({
-        "address": addresses,
-        "matched": [r["matched"] for r in results],
-        "confidence": [r.get("confidence") for r in results],
-        "layer": [r.get("layer") for r in results],
-        "label": [r.get("label") for r in results],
-        "housenumber": [r.get("housenumber") for r in results],
-        "matchnote": [r.get("note") for r in results],
-    })
-    geometry = [shapely.Point(r["longitude"], r["latitude"]) if r["matched"] else None
-                for r in results]
+        "address": addressColumn,
+        "matched": matched,
+        "confidence": fields["confidence"][sources],
+        "layer": fields["layer"][sources],
+        "label": fields["label"][sources],
+        "housenumber": fields["housenumber"][sources],
+        "matchnote": fields["note"][sources],
+    }, copy=False).infer_objects()
+    geometry = np.full(len(addresses), None, dtype=object)
+    geometry[matched] = shapely.points(longitude[sources][matched], latitude[sources][matched])
+    if len(endpoints) > 1:
+        logger.info("Sent {} batches.".format(", ".join("{:,} to {}".format(replicas.sent[url], url)
+                                                        for url in endpoints)))
     logger.info("Matched {:,} of {:,} addresses against the MORPC geocoder."
                 .format(int(frame["matched"].sum()), len(frame)))
     return gpd.GeoDataFrame(frame, geometry=geometry, crs="EPSG:4326")
+
+
+# The confidence the geocoder service reports for each tier of geocode_addresspoints(), so that a
+# client of the service can rank its matches as it would Pelias's. They order the tiers by how much
+# of the address each one checked; they are not probabilities.
+CONST_GEOCODE_TIER_CONFIDENCE = {"exact": 1.0, "components": 0.9, "number_name": 0.8, "route_number": 0.8,
+                                 "fuzzy": 0.7, "interpolated": 0.6}
+
+
+def _geocoder_results(frame, zipcodes):
+    """Convert the results of Geocoder.geocode() to the results of the morpc-geocoder service."""
+    import pandas as pd
+
+    results = []
+    for row, zipcode in zip(frame.itertuples(index=False), zipcodes):
+        values = {column: (None if not isinstance(value, str) and pd.isna(value) else value)
+                  for column, value in row._asdict().items() if column != "geometry"}
+        if not row.matched:
+            results.append({"matched": False, "longitude": None, "latitude": None, "confidence": None,
+                            "layer": None, "label": None, "housenumber": None, "note": values["matchnote"],
+                            "matchtier": None})
+            continue
+        # The label names the place matched, so it is made of the street and ZIP of the address points
+        # found, which may differ from those of the query, and the house number, which may not.
+        street = " ".join(part for part in [values["streetaddr"], values["matchstreet"]] if part is not None)
+        zipcode = values["matchzip"] or normalize_zip(zipcode)
+        results.append({"matched": True, "longitude": row.geometry.x, "latitude": row.geometry.y,
+                        "confidence": CONST_GEOCODE_TIER_CONFIDENCE[row.matchtier], "layer": "address",
+                        "label": "{}, OH{}".format(street, " " + zipcode if zipcode else ""),
+                        "housenumber": values["streetaddr"], "note": None, "matchtier": row.matchtier})
+    return results
+
+
+def geocoder_server(resourcePath=None, indexPath=None, host="127.0.0.1", port=8000, **options):
+    """Create a local geocoding service answering as morpc-geocoder does, from the address points.
+
+    morpc-geocoder's POST /geocode/batch is answered by a Geocoder held open for as long as the
+    service runs, so that query_geocoder() and anything else that speaks to that service -- a
+    dashboard, a QA script, a program in another language -- can geocode against the address points
+    without importing morpc or deploying Pelias, in milliseconds a call once the index is warm. The
+    matching is that of geocode_addresspoints(): each address is matched with its ZIP code, and the
+    city and state are accepted but not used.
+
+    The service answers:
+
+    POST /geocode/batch : {"addresses": [{"address", "city", "state", "zipcode"}, ...]}, with
+                          {"results": [...]}, one result for each address, in order.
+    POST /geocode       : a single {"address", "city", "state", "zipcode"}, with its result alone.
+    GET  /geocode       : the same, as ?address=...&zipcode=...
+    GET  /health        : {"status": "ok", "index": ...} and the Geocoder's stats().
+
+    Each result carries the fields of morpc-geocoder's -- matched, longitude, latitude, confidence,
+    layer, label, housenumber and note -- and the tier that matched it, as matchtier. The confidence
+    is that of the tier, from CONST_GEOCODE_TIER_CONFIDENCE. A request that cannot be read is answered
+    with 422 and a {"detail"} saying why.
+
+    Parameters
+    ----------
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize. See
+        Geocoder.
+    indexPath : str
+        Optional. Path to the geocoding index. See Geocoder.
+    host : str
+        Optional. Address to listen on. Defaults to 127.0.0.1, which only this machine can reach.
+    port : int
+        Optional. Port to listen on, or 0 for any free one. Defaults to 8000, where query_geocoder()
+        looks by default.
+    **options
+        Passed on to Geocoder, such as `connections`, `tolerance` or `interpolate`.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        The service, listening but not yet serving. Call its serve_forever() to serve, from a thread
+        if the caller has other work to do, and its shutdown() and server_close() to stop. Its
+        `geocoder` attribute is the Geocoder, which server_close() closes. See serve_geocoder().
+    """
+    import http.server
+    import json
+    import urllib.parse
+
+    geocoder = Geocoder(resourcePath, indexPath, **options)
+
+    def geocode(requests):
+        addresses = [request.get("address") for request in requests]
+        zipcodes = [request.get("zipcode") for request in requests]
+        return _geocoder_results(geocoder.geocode(addresses, zipcodes=zipcodes), zipcodes)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        # Kept-alive connections, which query_geocoder() pools. Without Nagle's algorithm, which would
+        # otherwise hold the body back until the client acknowledged the headers, tens of milliseconds.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def answer(self, status, body):
+            body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def respond(self, method):
+            url = urllib.parse.urlsplit(self.path)
+            route = (method, url.path.rstrip("/"))
+            try:
+                payload = None
+                if method == "POST":
+                    payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "null")
+                if route == ("POST", "/geocode/batch"):
+                    if not isinstance(payload, dict) or not isinstance(payload.get("addresses"), list) or \
+                            not all(isinstance(request, dict) for request in payload["addresses"]):
+                        raise ValueError("expected {\"addresses\": [{\"address\": ...}, ...]}")
+                    self.answer(200, {"results": geocode(payload["addresses"])})
+                elif route == ("POST", "/geocode"):
+                    if not isinstance(payload, dict):
+                        raise ValueError("expected {\"address\": ...}")
+                    self.answer(200, geocode([payload])[0])
+                elif route == ("GET", "/geocode"):
+                    query = {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+                    self.answer(200, geocode([query])[0])
+                elif route == ("GET", "/health"):
+                    self.answer(200, dict({"status": "ok", "index": geocoder.indexPath}, **geocoder.stats()))
+                else:
+                    self.answer(404, {"detail": "no such endpoint: {} {}".format(method, url.path)})
+            except ValueError as e:
+                self.answer(422, {"detail": str(e)})
+            except Exception as e:
+                logger.exception("The geocoding service failed to answer {} {}.".format(method, url.path))
+                self.answer(500, {"detail": str(e)})
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_POST(self):
+            self.respond("POST")
+
+        def log_message(self, format, *args):
+            logger.debug("{} {}".format(self.address_string(), format % args))
+
+    class Server(http.server.ThreadingHTTPServer):
+        daemon_threads = True
+
+        def server_close(self):
+            super().server_close()
+            self.geocoder.close()
+
+    server = Server((host, port), Handler)
+    server.geocoder = geocoder
+    return server
+
+
+def serve_geocoder(resourcePath=None, indexPath=None, host="127.0.0.1", port=8000, **options):
+    """Run the local geocoding service of geocoder_server() until interrupted.
+
+    For example, from a shell:
+
+        python -c "import morpc; morpc.serve_geocoder('morpc-addresspoints-standardize.resource.json')"
+
+    after which query_geocoder(addresses) geocodes against it at its default endpoint.
+
+    Parameters are those of geocoder_server().
+    """
+    server = geocoder_server(resourcePath, indexPath, host=host, port=port, **options)
+    logger.info("Serving the geocoding index at {} on http://{}:{}".format(
+        server.geocoder.indexPath, *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+CONST_GEOCODE_BACKENDS = ["addresspoints", "morpc-geocoder", "nominatim"]
+
+
+def geocode_cascade(addresses, resourcePath=None, zipcodes=None, cities=None, states=None,
+                    backends=("addresspoints", "morpc-geocoder"), backendOptions=None, cache=None):
+    """Geocode street addresses with each backend in turn, sending each only what the ones before it
+    could not match.
+
+    The local address points match most of a typical list in a fraction of a second, offline; the
+    MORPC geocoder service and Nominatim are slower and rate limited, and are better kept for what the
+    address points cannot find. This runs geocode_addresspoints(), query_geocoder() and geocode() in
+    the order given by `backends`, each on the addresses every earlier one left unmatched, and
+    reports which of them matched each address.
+
+    Nominatim is not among the default backends: its public instance is a third-party service, and
+    addresses sent to it leave MORPC. Add "nominatim" to `backends`, with an `endpoint` in its
+    options to use a local instance instead.
+
+    Parameters
+    ----------
+    addresses : list
+        Street addresses without the city, state or ZIP ("205 E CENTRAL AVE").
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize, for the
+        "addresspoints" backend. Not needed if its options give an `indexPath`.
+    zipcodes, cities, states : list
+        Optional. ZIP codes, cities and states parallel to `addresses`. The address points use only
+        the ZIP code; Nominatim is sent all of them, joined to the address.
+    backends : list
+        Optional. The backends to try, in order: any of "addresspoints", "morpc-geocoder" and
+        "nominatim". Defaults to ("addresspoints", "morpc-geocoder").
+    backendOptions : dict
+        Optional. Keyword arguments for each backend's function, by backend name: for example
+        {"addresspoints": {"workers": 8}, "morpc-geocoder": {"endpoint": ..., "concurrency": 8,
+        "rate": 20}, "nominatim": {"endpoint": "localhost:8080", "concurrency": 4}}. Each backend
+        sets its own concurrency and rate limit this way.
+    cache : GeocodeCache
+        Optional. Passed on to every backend, each of which keeps its results apart.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        One row per input address, in input order, in EPSG:4326:
+
+        address    : the address as supplied.
+        matched    : bool, whether any backend returned a point.
+        backend    : the backend that matched the address, or None.
+        matchtier  : the tier that matched it, from the "addresspoints" backend.
+        confidence : the backend's confidence in the match, where it gives one. For the address
+                     points, that of the tier, from CONST_GEOCODE_TIER_CONFIDENCE.
+        label      : the address the backend matched, worth checking against the input.
+        matchnote  : for an address no backend matched, why each one did not.
+    """
+    import pandas as pd
+    import geopandas as gpd
+    import shapely
+
+    backends = list(backends)
+    backendOptions = backendOptions or {}
+    unknown = [backend for backend in backends + list(backendOptions) if backend not in CONST_GEOCODE_BACKENDS]
+    if unknown or len(set(backends)) != len(backends):
+        logger.error("backends must be distinct, each one of {}.".format(", ".join(CONST_GEOCODE_BACKENDS)))
+        raise ValueError
+
+    def parallel(values, name):
+        if values is None:
+            return [None] * len(addresses)
+        if len(values) != len(addresses):
+            logger.error("{} must be the same length as addresses.".format(name))
+            raise ValueError
+        return list(values)
+
+    addresses = list(addresses)
+    zipcodes = parallel(zipcodes, "zipcodes")
+    cities = parallel(cities, "cities")
+    states = parallel(states, "states")
+
+    results = [{"matched": False, "backend": None, "matchtier": None, "confidence": None, "label": None,
+                "matchnote": None, "longitude": None, "latitude": None} for _ in addresses]
+    notes = [[] for _ in addresses]
+    remaining = list(range(len(addresses)))
+    for backend in backends:
+        if not remaining:
+            break
+        options = backendOptions.get(backend, {})
+        subset = [addresses[position] for position in remaining]
+        subsetZipcodes = [zipcodes[position] for position in remaining]
+        if backend == "addresspoints":
+            found = _geocoder_results(geocode_addresspoints(subset, resourcePath, zipcodes=subsetZipcodes,
+                                                            cache=cache, **options), subsetZipcodes)
+        elif backend == "morpc-geocoder":
+            frame = query_geocoder(subset, cities=[cities[position] for position in remaining],
+                                   states=[states[position] for position in remaining], zipcodes=subsetZipcodes,
+                                   cache=cache, **options)
+            found = [{"matched": row.matched, "longitude": row.geometry.x if row.matched else None,
+                      "latitude": row.geometry.y if row.matched else None, "confidence": row.confidence,
+                      "label": row.label, "note": row.matchnote, "matchtier": None}
+                     for row in frame.itertuples(index=False)]
+        else:
+            queries = [", ".join(str(part) for part in (addresses[position], cities[position], states[position],
+                                                        zipcodes[position]) if part is not None and part == part)
+                       for position in remaining]
+            frame = geocode(queries, cache=cache, **options)
+            found = [{"matched": True, "longitude": location.longitude, "latitude": location.latitude,
+                      "confidence": None, "label": location.address, "note": None, "matchtier": None}
+                     if location is not None else {"matched": False, "note": "no result"}
+                     for location in frame["location"]]
+
+        for position, result in zip(remaining, found):
+            if result["matched"]:
+                results[position].update({field: result[field] for field in
+                                          ["matched", "longitude", "latitude", "confidence", "label", "matchtier"]})
+                results[position]["backend"] = backend
+            else:
+                notes[position].append("{}: {}".format(backend, result["note"]))
+        matched = sum(bool(result["matched"]) for result in found)
+        remaining = [position for position, result in zip(remaining, found) if not result["matched"]]
+        logger.info("Matched {:,} of {:,} addresses with {}; {:,} left.".format(
+            matched, len(found), backend, len(remaining)))
+
+    for position in remaining:
+        results[position]["matchnote"] = "; ".join(notes[position]) or None
+    frame = pd.DataFrame(results, columns=["matched", "backend", "matchtier", "confidence", "label", "matchnote",
+                                           "longitude", "latitude"])
+    frame.insert(0, "address", addresses)
+    frame["matched"] = frame["matched"].astype(bool)
+    frame["confidence"] = frame["confidence"].astype(float)
+    geometry = [shapely.Point(lon, lat) if matched else None
+                for lon, lat, matched in zip(frame["longitude"], frame["latitude"], frame["matched"])]
+    return gpd.GeoDataFrame(frame.drop(columns=["longitude", "latitude"]), geometry=geometry, crs="EPSG:4326")
+
+
+def _address_chunks(source, table, fields, chunkSize, skip):
+    """Read addresses from `source` in DataFrames of at most `chunkSize` rows, after the first `skip`.
+
+    `fields` maps "address", "zipcode", "city" and "state" to the source fields that carry them, or to
+    None where the source has none. Each DataFrame has those four columns, with nulls as None.
+    """
+    import itertools
+    import os
+    import sqlite3
+    import pandas as pd
+
+    columns = {name: field for name, field in fields.items() if field is not None}
+
+    def frame(data):
+        data = data.rename(columns={field: name for name, field in columns.items()})
+        data = data.reindex(columns=list(fields)).astype(object)
+        return data.where(data.notna(), None)
+
+    if isinstance(source, str) and table is None and os.path.splitext(source)[1].lower() == ".csv":
+        # Read as text, so that a ZIP code keeps its leading zero.
+        reader = pd.read_csv(source, usecols=list(columns.values()), dtype=str, chunksize=chunkSize,
+                             skiprows=range(1, skip + 1))
+        for data in reader:
+            yield frame(data)
+    elif isinstance(source, str):
+        if table is None:
+            logger.error("A source that is not a CSV file must be an iterable, or a SQLite database "
+                         "with a table.")
+            raise ValueError
+        connection = sqlite3.connect("file:{}?mode=ro".format(source), uri=True)
+        query = "select {} from \"{}\" order by rowid limit -1 offset ?".format(
+            ", ".join("\"{}\"".format(field) for field in columns.values()), table)
+        try:
+            for data in pd.read_sql_query(query, connection, params=(skip,), chunksize=chunkSize):
+                yield frame(data)
+        finally:
+            connection.close()
+    else:
+        records = itertools.islice(iter(source), skip, None)
+        while True:
+            chunk = list(itertools.islice(records, chunkSize))
+            if not chunk:
+                break
+            # A bare string is an address on its own; anything else is a record carrying the fields.
+            yield frame(pd.DataFrame([{columns["address"]: record} if isinstance(record, str) else record
+                                      for record in chunk]))
+
+
+def geocode_chunks(source, resourcePath=None, backend="addresspoints", table=None, addressField="address",
+                   zipField=None, cityField=None, stateField=None, chunkSize=50000, skip=0, **options):
+    """Geocode a long list of addresses a chunk at a time, yielding each chunk's results as it is done.
+
+    geocode_addresspoints() and query_geocoder() take the whole list at once and return one
+    GeoDataFrame, which for a statewide file of millions of addresses is more than a laptop holds.
+    This reads the addresses `chunkSize` at a time and geocodes each chunk with one of them, so that
+    memory is bounded by the chunk rather than by the file. To write the results to a file as they
+    are done, and to resume a run that was interrupted, see geocode_to_file().
+
+    Parameters
+    ----------
+    source : str or iterable
+        Where the addresses come from. A path to a CSV file; a path to a SQLite database, with
+        `table`; or an iterable of addresses, each either a string or a dict carrying the fields
+        below.
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize. Required by
+        the "addresspoints" backend unless `indexPath` is passed in `options`.
+    backend : str
+        Optional. "addresspoints" to geocode with geocode_addresspoints(), or "morpc-geocoder" to
+        geocode with query_geocoder(). Defaults to "addresspoints".
+    table : str
+        Optional. Table to read where `source` is a SQLite database.
+    addressField : str
+        Optional. Field of the source carrying the street address. Defaults to "address".
+    zipField, cityField, stateField : str
+        Optional. Fields of the source carrying the ZIP code, city and state. The "addresspoints"
+        backend uses only the ZIP code.
+    chunkSize : int
+        Optional. Addresses per chunk. Defaults to 50,000.
+    skip : int
+        Optional. Addresses at the start of the source to pass over, such as those geocoded by an
+        earlier run. Defaults to 0.
+    **options
+        Passed on to the backend, such as `indexPath`, `cache` or `endpoint`.
+
+    Yields
+    ------
+    geopandas.GeoDataFrame
+        The backend's results for each chunk, in source order, with an `inputrow` column first giving
+        each address's position in the source, counted from 0.
+    """
+    if backend not in ("addresspoints", "morpc-geocoder"):
+        logger.error("backend must be \"addresspoints\" or \"morpc-geocoder\".")
+        raise ValueError
+    if backend == "addresspoints" and options.get("indexPath") is None:
+        # Checked once here, rather than once per chunk.
+        options["indexPath"] = build_geocode_index(resourcePath)
+
+    fields = {"address": addressField, "zipcode": zipField, "city": cityField, "state": stateField}
+    done = skip
+    for chunk in _address_chunks(source, table, fields, chunkSize, skip):
+        if backend == "addresspoints":
+            result = geocode_addresspoints(chunk["address"].tolist(), resourcePath,
+                                           zipcodes=chunk["zipcode"].tolist(), **options)
+        else:
+            result = query_geocoder(chunk["address"].tolist(), cities=chunk["city"].tolist(),
+                                    states=chunk["state"].tolist(), zipcodes=chunk["zipcode"].tolist(),
+                                    **options)
+        result.insert(0, "inputrow", range(done, done + len(result)))
+        done += len(result)
+        logger.info("Geocoded {:,} addresses of the source.".format(done))
+        yield result
+
+
+def _written_rows(output, layer):
+    """Return the number of results already in a geocode_to_file() output, or 0 if there is none."""
+    import glob
+    import os
+
+    if os.path.splitext(output)[1].lower() == ".parquet":
+        import pyarrow.parquet as pq
+        parts = glob.glob(os.path.join(output, "part-*.parquet"))
+        return sum(pq.read_metadata(part).num_rows for part in parts)
+
+    import pyogrio
+    if not os.path.exists(output) or layer not in pyogrio.list_layers(output)[:, 0]:
+        return 0
+    return pyogrio.read_info(output, layer=layer)["features"]
+
+
+def geocode_to_file(source, output, resourcePath=None, layer="geocoded", resume=True, **options):
+    """Geocode a long list of addresses a chunk at a time, appending each chunk's results to a file.
+
+    The streaming counterpart of geocode_addresspoints() and query_geocoder() for lists too long to
+    hold in memory at once; see geocode_chunks(), which does the geocoding. Each chunk is written
+    whole or not at all, so a run that is interrupted can be resumed: it counts the results already
+    written and carries on from the address after them.
+
+    Resuming assumes the source is the one the interrupted run read, in the same order. Each result
+    carries its `inputrow`, its position in the source, which can be used to check.
+
+    Parameters
+    ----------
+    source : str or iterable
+        Where the addresses come from. See geocode_chunks().
+    output : str
+        Path to write the results to. A path ending ".gpkg" is a GeoPackage, to which each chunk is
+        appended as features of `layer`. A path ending ".parquet" is a directory of GeoParquet files,
+        one per chunk, named part-00000.parquet, part-00001.parquet and so on, which pandas, geopandas
+        and pyarrow all read as one dataset.
+    resourcePath : str
+        Path to the Frictionless resource file describing morpc-addresspoints-standardize. See
+        geocode_chunks().
+    layer : str
+        Optional. Layer to write to a GeoPackage. Defaults to "geocoded".
+    resume : bool
+        Optional. Carry on from the results already in `output`. If False, they are discarded and the
+        run starts from the beginning of the source. Defaults to True.
+    **options
+        Passed on to geocode_chunks(), such as `backend`, `table`, the field names or `chunkSize`, and
+        through it to the backend.
+
+    Returns
+    -------
+    int
+        The number of results in `output`, including those written by earlier runs.
+    """
+    import glob
+    import os
+    import shutil
+    import pandas as pd
+
+    extension = os.path.splitext(output)[1].lower()
+    if extension not in (".gpkg", ".parquet"):
+        logger.error("output must be a GeoPackage (.gpkg) or a directory of Parquet files (.parquet).")
+        raise ValueError
+
+    if not resume and extension == ".parquet" and os.path.exists(output):
+        shutil.rmtree(output)
+    # Without resuming, the first chunk replaces the layer, and any other layers are left as they are.
+    written = _written_rows(output, layer) if resume else 0
+    replace = not written
+    if written:
+        logger.info("Resuming after the {:,} results already in {}.".format(written, output))
+
+    if extension == ".parquet":
+        os.makedirs(output, exist_ok=True)
+        # A run that died while writing a part leaves its temporary file behind. It was never a part, so
+        # it is removed rather than counted.
+        for leftover in glob.glob(os.path.join(output, "_part-*.parquet.tmp")):
+            logger.info("Removing {}, left behind by an interrupted run.".format(leftover))
+            os.remove(leftover)
+        numbers = [int(match.group(1)) for match in
+                   (re.fullmatch(r"part-(\d+)\.parquet", name) for name in os.listdir(output)) if match]
+        part = max(numbers) + 1 if numbers else 0
+
+    for chunk in geocode_chunks(source, resourcePath, skip=written, **options):
+        # A column that is empty in one chunk would otherwise be written with a different type than
+        # the same column in the others.
+        for column in chunk.columns.drop(chunk.geometry.name):
+            if column in ("matchspread", "confidence"):
+                chunk[column] = chunk[column].astype(float)
+            elif chunk[column].dtype == object:
+                chunk[column] = chunk[column].astype(pd.StringDtype())
+        if extension == ".parquet":
+            # Written beside the others and renamed into place, so that a part is either whole or absent.
+            # The temporary name starts with "_" so that dataset readers skip it until then.
+            path = os.path.join(output, "part-{:05d}.parquet".format(part))
+            temporaryPath = os.path.join(output, "_part-{:05d}.parquet.tmp".format(part))
+            chunk.to_parquet(temporaryPath, index=False)
+            os.replace(temporaryPath, path)
+            part += 1
+        else:
+            chunk.to_file(output, layer=layer, driver="GPKG", engine="pyogrio", mode="w" if replace else "a")
+            replace = False
+        written += len(chunk)
+    return written
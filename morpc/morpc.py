@@ -1379,7 +1379,7 @@ def curl(url, archive_dir = './input_data', filename = None, return_filepath=Fal
 
 
 # Load spatial data
-def load_spatial_data(sourcePath, layerName=None, driverName=None, archiveDir=None, archiveFileName=None, geometryColumn="geom", targetCRS=None, verbose=True):
+def load_spatial_data(sourcePath, layerName=None, driverName=None, archiveDir=None, archiveFileName=None, geometryColumn="geom", targetCRS=None, columns=None, where=None, verbose=True):
     """Often we want to make a copy of some input data and work with the copy, for example to protect 
     the original data or to create an archival copy of it so that we can replicate the process later.  
     With tabular data this is simple, but with spatial data it can be tricky.  Shapefiles actually consist 
@@ -1418,6 +1418,12 @@ def load_spatial_data(sourcePath, layerName=None, driverName=None, archiveDir=No
         Optional. The coordinate reference system to reproject the geometry to, applied to all file types via
         to_crs(). If None (the default), the data's native CRS is returned without reprojection. SQLite WKB geometry
         carries no CRS information, so it is assumed to be "epsg:4326" on read.
+    columns : list of str
+        Optional. The names of the attribute columns to read. The geometry column is always read. If None (the default),
+        all columns are read.
+    where : str
+        Optional. A SQL WHERE clause (without the WHERE keyword) selecting the features to read, e.g. "\"COUNTY\" = 'Franklin'".
+        It is evaluated by the data source, so only the matching features are read. If None (the default), all features are read.
     verbose : bool
         Set verbose to False to reduce the text output from the function.
 
@@ -1468,19 +1474,26 @@ def load_spatial_data(sourcePath, layerName=None, driverName=None, archiveDir=No
         logger.info("Reading spatial data...")
     # Geopandas will throw an error if we attempt to specify a layer name when reading a Shapefile
     if(driverName == "ESRI Shapefile"):
-        gdf = gpd.read_file(sourcePath, layer=None, engine="pyogrio", fid_as_index=True)
+        gdf = gpd.read_file(sourcePath, layer=None, engine="pyogrio", fid_as_index=True, columns=columns, where=where)
     # SQLite databases are read via read_postgis, treating layerName as the table name and geometryColumn as the geometry column.
     # WKB geometry carries no CRS, so assume epsg:4326 on read.
     elif(driverName == "SQLite"):
         import sqlite3
+        if(columns == None):
+            selection = "*"
+        else:
+            selection = ", ".join('"{}"'.format(column) for column in [*columns, geometryColumn])
+        query = 'SELECT {} FROM "{}"'.format(selection, layerName)
+        if(where != None):
+            query = "{} WHERE {}".format(query, where)
         con = sqlite3.connect(sourcePath)
         try:
-            gdf = gpd.read_postgis('SELECT * FROM "{}"'.format(layerName), con, geom_col=geometryColumn, crs="epsg:4326")
+            gdf = gpd.read_postgis(query, con, geom_col=geometryColumn, crs="epsg:4326")
         finally:
             con.close()
     # Everything else
     else:
-        gdf = gpd.read_file(sourcePath, layer=layerName, engine="pyogrio", fid_as_index=True)
+        gdf = gpd.read_file(sourcePath, layer=layerName, engine="pyogrio", fid_as_index=True, columns=columns, where=where)
 
     # Reproject to the target CRS if one was specified; otherwise return the native CRS
     if(targetCRS != None):
@@ -3663,8 +3676,11 @@ def update_existing_table(newData, schema, existingData=None, sortColumns=None,
     logger.info("Extracting required fields in new data and reordering them as specified in the schema.")
     myNewData = myNewData.filter(items=schema.field_names, axis="columns")
 
+    # The same schema is applied to the new, existing and merged data, so compile it once.
+    castPlan = morpc.frictionless.compile_cast_plan(schema)
+
     logger.info("Casting new data to data types specified in schema.")
-    myNewData = morpc.frictionless.cast_field_types(myNewData, schema)
+    myNewData = castPlan.apply(myNewData)
     
     if(existingData is None):
         myExistingData = None
@@ -3683,7 +3699,7 @@ def update_existing_table(newData, schema, existingData=None, sortColumns=None,
         myNewData = myNewData.filter(items=schema.field_names, axis="columns")
         
         logger.info("Confirming existing data is cast as data types specified in schema.")
-        myExistingData = morpc.frictionless.cast_field_types(myExistingData, schema)
+        myExistingData = castPlan.apply(myExistingData)
 
         
     if(myExistingData is None):
@@ -3727,7 +3743,7 @@ def update_existing_table(newData, schema, existingData=None, sortColumns=None,
     outputData = outputData.filter(items=schema.field_names, axis="columns")
 
     logger.info("Casting merged data to data types specified in schema.")
-    outputData = morpc.frictionless.cast_field_types(outputData, schema)
+    outputData = castPlan.apply(outputData)
 
     if(sortColumns == "primary_key"):
         mySortColumns = schema.primary_key
@@ -0,0 +1,87 @@
+import json
+import sqlite3
+
+import pytest
+
+import morpc.benchmark
+
+
+def _rows(resourcePath):
+    connection = sqlite3.connect(resourcePath.replace(".resource.json", ".sqlite"))
+    rows = connection.execute("select * from points").fetchall()
+    connection.close()
+    return rows
+
+
+def test_synthetic_data_is_the_same_for_the_same_seed(tmp_path):
+    first, second, other = tmp_path / "first", tmp_path / "second", tmp_path / "other"
+    for directory in (first, second, other):
+        directory.mkdir()
+
+    rows = _rows(morpc.benchmark.synthetic_addresspoints(str(first), points=2000, seed=1))
+    assert rows == _rows(morpc.benchmark.synthetic_addresspoints(str(second), points=2000, seed=1))
+    assert rows != _rows(morpc.benchmark.synthetic_addresspoints(str(other), points=2000, seed=2))
+    # Every point, and a few records the build must skip.
+    assert 2000 < len(rows) < 2100
+
+    corpus = morpc.benchmark.synthetic_addresses(500, points=2000, seed=1)
+    assert corpus.equals(morpc.benchmark.synthetic_addresses(500, points=2000, seed=1))
+    assert set(corpus["tier"]) == set(morpc.benchmark.CONST_BENCHMARK_TIERS)
+    assert corpus["address"].str.contains(", OH 43").any()
+    assert corpus["address"].str.contains("APT |#|UNIT |STE ").any()
+
+
+def test_each_stage_is_measured_on_addresses_that_resolve_at_its_tier(tmp_path):
+    results = morpc.benchmark.benchmark_geocoding(points=3000, queries=400, repeat=1, directory=str(tmp_path))
+
+    assert list(results["stages"]) == morpc.benchmark.CONST_BENCHMARK_STAGES
+    for stage, figures in results["stages"].items():
+        assert figures["rate"] > 0 and figures["peak"] > 0, stage
+    for tier in morpc.benchmark.CONST_BENCHMARK_TIERS:
+        assert results["stages"][tier]["tiershare"] > 0.9, tier
+    assert results["meta"]["points"] == 3000
+    json.dumps(results)
+
+
+def test_stages_can_be_chosen_and_memory_left_unmeasured(tmp_path):
+    results = morpc.benchmark.benchmark_geocoding(points=1000, queries=100, repeat=2, memory=False,
+                                                  stages=["parse_address", "query_geocoder"])
+    assert list(results["stages"]) == ["parse_address", "query_geocoder"]
+    assert results["stages"]["query_geocoder"]["peak"] is None
+
+    with pytest.raises(ValueError):
+        morpc.benchmark.benchmark_geocoding(stages=["parse_everything"])
+
+
+def _results(rates, peaks, points=1000):
+    return {"meta": {"points": points, "queries": 100, "seed": 0},
+            "stages": {stage: {"records": 100, "seconds": 100 / rate, "rate": rate, "peak": peak}
+                       for stage, rate, peak in zip(["exact", "fuzzy", "mixed"], rates, peaks)}}
+
+
+def test_a_slower_or_larger_stage_is_a_regression():
+    comparison = morpc.benchmark.compare_benchmarks(_results([950, 500, 1000], [100, 100, 150]),
+                                                    _results([1000, 1000, 1000], [100, 100, 100]))
+    assert comparison["regressed"].to_dict() == {"exact": False, "fuzzy": True, "mixed": True}
+    assert comparison.loc["fuzzy", "ratechange"] == pytest.approx(-0.5)
+    assert comparison.loc["mixed", "peakchange"] == pytest.approx(0.5)
+
+    comparison = morpc.benchmark.compare_benchmarks(_results([950, 500, 1000], [100, 100, 150]),
+                                                    _results([1000, 1000, 1000], [100, 100, 100]), tolerance=0.6)
+    assert not comparison["regressed"].any()
+
+
+def test_comparison_warns_of_different_data(caplog):
+    morpc.benchmark.compare_benchmarks(_results([1000] * 3, [100] * 3), _results([1000] * 3, [100] * 3, points=5))
+    assert "different data (points)" in caplog.text
+
+
+def test_the_command_line_fails_on_a_regression(tmp_path):
+    output = str(tmp_path / "results.json")
+    arguments = ["--points", "1000", "--queries", "100", "--repeat", "1", "--stages", "parse_address"]
+    assert morpc.benchmark.main(arguments + ["--output", output]) == 0
+
+    baseline = json.load(open(output))
+    baseline["stages"]["parse_address"]["rate"] *= 10
+    json.dump(baseline, open(output, "w"))
+    assert morpc.benchmark.main(arguments + ["--baseline", output]) == 1
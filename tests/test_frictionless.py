@@ -1,5 +1,6 @@
 import sqlite3
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -238,6 +239,303 @@ def test_load_data_nonspatial_sqlite_returns_plain_dataframe(tmp_path):
     assert data["name"].tolist() == ["alice", "bob"]
 
 
+# --- CSV engines ---
+
+CSV_SCHEMA_YAML = """\
+fields:
+  - name: id
+    type: integer
+  - name: households
+    type: integer
+  - name: share
+    type: number
+  - name: name
+    type: string
+  - name: updated
+    type: date
+  - name: active
+    type: boolean
+"""
+
+
+def _build_csv(dirpath, text, schemaYaml=CSV_SCHEMA_YAML):
+    """Create a CSV file plus resource/schema sidecars in dirpath. Returns the resource path."""
+    (dirpath / "data.csv").write_text(text)
+    (dirpath / "data.schema.yaml").write_text(schemaYaml)
+    resourcePath = dirpath / "data.resource.yaml"
+    resourcePath.write_text("name: tracts\ntype: table\npath: data.csv\nformat: csv\nschema: data.schema.yaml\n")
+    return resourcePath
+
+
+def test_load_csv_engines_agree(tmp_path):
+    resourcePath = _build_csv(tmp_path, (
+        "id,households,share,name,updated,active,note\n"
+        "1,10,0.5,Franklin,2024-01-31,true,a\n"
+        "2,,1e-3,None,2024-02-29,false,\n"
+        "3,30,,Licking,,,\"two\nlines\"\n"
+    ))
+    for forceInt64 in [False, True]:
+        data, resource, schema = load_data(str(resourcePath), forceInt64=forceInt64)
+        expected, resource, schema = load_data(str(resourcePath), forceInt64=forceInt64, engine="pandas")
+        pd.testing.assert_frame_equal(data, expected)
+    assert data["households"].dtype == "Int64"
+    assert data["name"].isna().tolist() == [False, True, False]
+
+
+def test_load_csv_falls_back_to_cast_field_types(tmp_path):
+    # pyarrow will not cast "2.0" to an integer, so the column goes through cast_field_types(), which can.
+    resourcePath = _build_csv(tmp_path, "id,name\n1.0,alice\n2.0,bob\n", SCHEMA_YAML)
+    with pytest.raises(RuntimeError):
+        load_data(str(resourcePath))
+    data, resource, schema = load_data(str(resourcePath), forceInteger=True)
+    assert data["id"].tolist() == [1, 2]
+
+    # A file the pyarrow reader cannot read like pandas does is read with pandas.
+    resourcePath = _build_csv(tmp_path, "id,name\n1,alice\n2\n", SCHEMA_YAML)
+    data, resource, schema = load_data(str(resourcePath))
+    assert data["id"].tolist() == [1, 2]
+
+
+def test_load_data_as_arrow(tmp_path):
+    import pyarrow as pa
+
+    resourcePath = _build_csv(tmp_path, "id,households,share,name,updated,active\n1,10,0.5,Franklin,2024-01-31,true\n")
+    data, resource, schema = load_data(str(resourcePath), asArrow=True)
+    assert isinstance(data, pa.Table)
+    assert data.schema.field("households").type == pa.int64()
+    assert data.schema.field("name").type == pa.string()
+    assert data.column("active").to_pylist() == [True]
+
+    data, resource, schema = load_data(str(_build_sqlite(tmp_path)), asArrow=True)
+    assert data.column("name").to_pylist() == ["alice", "bob"]
+
+    with pytest.raises(ValueError):
+        load_data(str(resourcePath), engine="polars")
+
+
+# --- load_data: columns and where ---
+
+def test_load_csv_columns_and_where(tmp_path):
+    resourcePath = _build_csv(tmp_path, (
+        "id,households,share,name,updated,active\n"
+        "1,10,0.5,Franklin,2024-01-31,true\n"
+        "2,,0.25,Delaware,2024-02-29,false\n"
+        "3,30,,Franklin,2024-03-31,\n"
+    ))
+    for engine in ["pyarrow", "pandas"]:
+        data, resource, schema = load_data(str(resourcePath), engine=engine, columns=["share", "id"],
+                                           where=[("name", "==", "Franklin"), ("households", ">", 5)])
+        assert list(data.columns) == ["share", "id"]
+        assert data["id"].tolist() == [1, 3]
+
+        # A null value meets no condition, "!=" included.
+        data, resource, schema = load_data(str(resourcePath), engine=engine, where=[("households", "!=", 10)])
+        assert data["id"].tolist() == [3]
+
+        # Conditions on a field cast by cast_field_types() are evaluated after casting.
+        data, resource, schema = load_data(str(resourcePath), engine=engine, columns=["id"], where=[("active", "in", [False])])
+        assert data["id"].tolist() == [2]
+
+    with pytest.raises(RuntimeError):
+        load_data(str(resourcePath), columns=["id", "county"])
+    with pytest.raises(ValueError):
+        load_data(str(resourcePath), where=[("id", "~", 1)])
+
+
+def test_load_sqlite_columns_and_where_are_pushed_down(tmp_path):
+    resourcePath = _build_sqlite_camel(tmp_path, table="people")
+    # The schema names a field the table lacks, but only the selected fields are cast.
+    (tmp_path / "data.schema.yaml").write_text(CAMEL_SCHEMA_YAML + "  - name: missingField\n    type: string\n")
+    data, resource, schema = load_data(str(resourcePath), tableName="people", columns=["fullName"],
+                                       where=[("personId", "in", [2, 3]), ("fullName", "!=", "o'brien")])
+    assert list(data.columns) == ["fullName"]
+    assert data["fullName"].tolist() == ["bob"]
+
+
+def test_load_spatial_sqlite_columns_and_where(tmp_path):
+    import geopandas as gpd
+
+    resourcePath = _build_spatial_sqlite_resource(tmp_path, table="parcels")
+    data, resource, schema = load_data(str(resourcePath), columns=["id"], where=[("id", ">=", 2)])
+    assert isinstance(data, gpd.GeoDataFrame)
+    assert list(data.columns) == ["id", "geometry"]
+    assert data["id"].tolist() == [2]
+
+
+# --- load_data: chunks ---
+
+def test_load_csv_in_chunks(tmp_path):
+    rows = ["{},{},0.5,County {},2024-01-31,true".format(i, i * 10, i % 3) for i in range(10)]
+    resourcePath = _build_csv(tmp_path, "id,households,share,name,updated,active\n" + "\n".join(rows) + "\n")
+    chunks, resource, schema = load_data(str(resourcePath), chunkSize=4)
+    chunks = list(chunks)
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    data, resource, schema = load_data(str(resourcePath), forceInt64=True)
+    pd.testing.assert_frame_equal(pd.concat(chunks), data)
+
+    chunks, resource, schema = load_data(str(resourcePath), chunkSize=4, columns=["id"], where=[("name", "==", "County 0")])
+    chunks = list(chunks)
+    assert [chunk.index.tolist() for chunk in chunks] == [[0, 1], [2], [3]]
+    assert pd.concat(chunks)["id"].tolist() == [0, 3, 6, 9]
+
+    with pytest.raises(ValueError):
+        load_data(str(resourcePath), chunkSize=4, cacheDir=str(tmp_path / "cache"))
+
+
+def test_load_csv_in_chunks_keeps_integer_dtypes_stable(tmp_path):
+    rows = ["{},{},0.5,County {},2024-01-31,true".format(i, "" if i == 5 else i * 10, i % 3) for i in range(8)]
+    resourcePath = _build_csv(tmp_path, "id,households,share,name,updated,active\n" + "\n".join(rows) + "\n")
+    chunks, resource, schema = load_data(str(resourcePath), chunkSize=4)
+    chunks = list(chunks)
+    assert [chunk["households"].isna().any() for chunk in chunks] == [False, True]
+    assert [str(chunk["households"].dtype) for chunk in chunks] == ["Int64", "Int64"]
+    assert [str(chunk["id"].dtype) for chunk in chunks] == ["Int64", "Int64"]
+
+
+def test_load_sqlite_in_chunks(tmp_path):
+    resourcePath = _build_sqlite_camel(tmp_path, table="people")
+    chunks, resource, schema = load_data(str(resourcePath), tableName="people", chunkSize=1, where=[("personId", ">", 0)])
+    chunks = list(chunks)
+    assert [list(chunk.columns) for chunk in chunks] == [["personId", "fullName"]] * 2
+    assert [chunk["fullName"].tolist() for chunk in chunks] == [["alice"], ["bob"]]
+
+
+def test_load_spatial_sqlite_in_chunks(tmp_path):
+    import geopandas as gpd
+
+    resourcePath = _build_spatial_sqlite_resource(tmp_path, table="parcels")
+    chunks, resource, schema = load_data(str(resourcePath), chunkSize=1, targetCRS="epsg:3735")
+    chunks = list(chunks)
+    assert len(chunks) == 2
+    assert all(isinstance(chunk, gpd.GeoDataFrame) and chunk.crs == "epsg:3735" for chunk in chunks)
+    assert list(chunks[1].columns) == ["id", "geometry"]
+
+
+# --- load_data cache ---
+
+def test_load_data_cache_is_keyed_by_data_schema_and_options(tmp_path, caplog):
+    resourcePath = _build_csv(tmp_path, "id,households,share,name,updated,active\n1,,0.5,Franklin,2024-01-31,true\n")
+    cacheDir = str(tmp_path / "cache")
+    caplog.set_level("INFO")
+    data, resource, schema = load_data(str(resourcePath), cacheDir=cacheDir)
+    cached, resource, schema = load_data(str(resourcePath), cacheDir=cacheDir)
+    assert "Loaded cast data from cache" in caplog.text
+    pd.testing.assert_frame_equal(cached, data)
+
+    caplog.clear()
+    data, resource, schema = load_data(str(resourcePath), cacheDir=cacheDir, forceInt64=True)
+    assert "Loaded cast data from cache" not in caplog.text
+
+    (tmp_path / "data.csv").write_text("id,households,share,name,updated,active\n2,,0.5,Franklin,2024-01-31,true\n")
+    data, resource, schema = load_data(str(resourcePath), cacheDir=cacheDir)
+    assert data["id"].tolist() == [2]
+    assert len(list((tmp_path / "cache").iterdir())) == 3
+
+
+def test_load_data_cache_restores_spatial_data(tmp_path):
+    import geopandas as gpd
+
+    resourcePath = _build_spatial_sqlite_resource(tmp_path, table="parcels")
+    data, resource, schema = load_data(str(resourcePath), cacheDir=str(tmp_path / "cache"))
+    cached, resource, schema = load_data(str(resourcePath), cacheDir=str(tmp_path / "cache"))
+    assert isinstance(cached, gpd.GeoDataFrame)
+    assert cached.crs == data.crs
+    assert cached.equals(data)
+
+
+def test_load_data_cache_eviction_and_invalidation(tmp_path):
+    from morpc.frictionless import clear_load_data_cache
+
+    cacheDir = tmp_path / "cache"
+    resourcePath = _build_csv(tmp_path, "id,households,share,name,updated,active\n1,,0.5,Franklin,2024-01-31,true\n")
+    load_data(str(resourcePath), cacheDir=str(cacheDir))
+    load_data(str(resourcePath), cacheDir=str(cacheDir), forceInt64=True)
+    assert len(list(cacheDir.iterdir())) == 2
+
+    # Files that are not cache entries are never evicted or cleared.
+    pd.DataFrame({"a": [1]}).to_parquet(cacheDir / "results.parquet")
+    pd.DataFrame({"a": [1]}).to_parquet(cacheDir / "tracts-0123456789abcdef0123456789abcdef.parquet")
+
+    # Only the entry just written fits.
+    load_data(str(resourcePath), cacheDir=str(cacheDir), forceInteger=True, cacheMaxBytes=1)
+    assert len(list(cacheDir.glob("*.morpc-cache.parquet"))) == 1
+
+    (tmp_path / "other").mkdir()
+    assert clear_load_data_cache(str(cacheDir), resourcePath=str(_build_sqlite(tmp_path / "other"))) == 0
+    assert clear_load_data_cache(str(cacheDir), resourcePath=str(resourcePath)) == 1
+    assert clear_load_data_cache(str(cacheDir)) == 0
+    assert sorted(path.name for path in cacheDir.iterdir()) == ["results.parquet", "tracts-0123456789abcdef0123456789abcdef.parquet"]
+
+
+# --- cast plans ---
+
+# The dtypes and values cast_field_types() gave before it was compiled into a plan, which the plan must
+# reproduce exactly, quirks included.
+CAST_PLAN_CASES = [
+    ("integer", pd.Series(["1", "2"], dtype="str"), {}, "int64", [1, 2]),
+    ("integer", pd.Series(["1", ""], dtype="str"), {}, "Int64", [1, None]),
+    ("integer", pd.Series(["1", "2"], dtype="str"), {"forceInt64": True}, "Int64", [1, 2]),
+    ("integer", pd.Series([1.0, 2.0]), {}, "int64", [1, 2]),
+    ("integer", pd.Series([1.0, np.nan]), {}, "Int64", [1, None]),
+    ("integer", pd.Series(["1.0", "1.5"], dtype="str"), {"forceInteger": True}, "Int64", [1, 2]),
+    # A float column that "int" accepts is truncated rather than rounded.
+    ("integer", pd.Series([1.0, 1.5]), {"forceInteger": True}, "int64", [1, 1]),
+    ("integer", pd.Series([1, 2], dtype="Int32"), {}, "int64", [1, 2]),
+    ("integer", pd.Series([1, None], dtype="Int32"), {}, "Int64", [1, None]),
+    ("number", pd.Series(["0.5", ""], dtype="str"), {}, "float64", [0.5, np.nan]),
+    ("number", pd.Series(["0.5", "x"], dtype="str"), {"forceNumber": True}, "float64", [0.5, np.nan]),
+    # A null is filled with the string "false", which is then cast as a non-empty string is.
+    ("boolean", pd.Series(["true", "false", None], dtype="str"), {}, "bool", [True, False, True]),
+    ("boolean", pd.Series(["true", "0"], dtype=object), {}, "bool", [True, False]),
+    ("boolean", pd.Series([1.0, np.nan]), {"nullBoolValue": True}, "bool", [True, True]),
+    ("boolean", pd.Series([True, False]), {}, "bool", [True, False]),
+    ("any", pd.Series([1, "a", None], dtype=object), {}, "string", ["1", "a", None]),
+    ("string", pd.Series(["a", None], dtype="str"), {}, "string", ["a", None]),
+    ("year", pd.Series(["2024", "x"], dtype="str"), {}, "float64", [2024.0, np.nan]),
+]
+
+
+@pytest.mark.parametrize("fieldType, values, options, dtype, expected", CAST_PLAN_CASES)
+def test_cast_plan_matches_cast_field_types(fieldType, values, options, dtype, expected):
+    import frictionless
+
+    from morpc.frictionless import cast_field_types, compile_cast_plan
+
+    schema = frictionless.Schema.from_descriptor({"fields": [{"name": "x", "type": fieldType}]})
+    data = pd.DataFrame({"x": values})
+    expected = pd.Series(expected, dtype=dtype, name="x")
+    pd.testing.assert_series_equal(compile_cast_plan(schema, **options).apply(data)["x"], expected)
+    pd.testing.assert_series_equal(cast_field_types(data, schema, **options)["x"], expected)
+
+
+def test_cast_plan_casts_integers_by_the_nulls_in_each_chunk():
+    import frictionless
+
+    from morpc.frictionless import compile_cast_plan
+
+    schema = frictionless.Schema.from_descriptor({"fields": [{"name": "id", "type": "integer"}]})
+    data = pd.DataFrame({"id": ["1", "2", None, "4"]}, dtype="str")
+    plan = compile_cast_plan(schema)
+    # The first chunk has no nulls, so its integers are "int"; the last has one, so they are "Int64".
+    assert plan.apply(data.iloc[:2])["id"].dtype == "int64"
+    assert plan.apply(data)["id"].dtype == "Int64"
+    assert plan.dtypes["id"] == "Int64"
+
+
+def test_cast_plan_raises_as_cast_field_types_does():
+    import frictionless
+
+    from morpc.frictionless import compile_cast_plan
+
+    schema = frictionless.Schema.from_descriptor({"fields": [{"name": "id", "type": "integer"}]})
+    data = pd.DataFrame({"id": ["1.5", "2"]}, dtype="str")
+    with pytest.raises(RuntimeError):
+        compile_cast_plan(schema).apply(data)
+    assert compile_cast_plan(schema, forceInteger=True).apply(data)["id"].tolist() == [2, 2]
+    with pytest.raises(RuntimeError):
+        compile_cast_plan(schema).apply(pd.DataFrame({"other": [1]}))
+
+
 # --- create_package ---
 
 def test_create_package_writes_created_as_an_iso8601_string(tmp_path):
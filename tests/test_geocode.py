@@ -40,6 +40,162 @@ def index(tmp_path):
     return path
 
 
+@pytest.fixture
+def source(tmp_path):
+    """A miniature morpc-addresspoints-standardize: a Frictionless resource describing a SQLite table
+    of raw, unnormalized records with WKB geometry, for exercising build_geocode_index()."""
+    import json
+    import shapely
+
+    connection = sqlite3.connect(str(tmp_path / "points.sqlite"))
+    connection.execute("""create table points (streetaddr text, streetname text, streettype text,
+        prefixdir text, suffixdir text, city text, zip text, county text, GEOMETRY blob)""")
+    connection.executemany("insert into points values (?,?,?,?,?,?,?,?,?)", [
+        ("290", "High", "Street", "West", None, "Ostrander", "43061.0", "Delaware",
+         shapely.Point(-83.21639, 40.26325).wkb),
+        ("01013", "STATE ROUTE 37", None, None, "E", "Sunbury", "43074", "Knox",
+         shapely.Point(-82.86, 40.24).wkb),
+        # No location, and no street name: neither can be indexed.
+        ("10", "MAIN", "ST", None, None, "Delaware", "43015", "Delaware", None),
+        ("12", None, "ST", None, None, "Delaware", "43015", "Delaware", shapely.Point(-83.0, 40.0).wkb),
+    ] * 3)
+    connection.commit()
+    connection.close()
+
+    path = tmp_path / "points.resource.json"
+    path.write_text(json.dumps({"name": "points", "path": "points.sqlite", "format": "sqlite",
+                                "hash": "release-1", "dialect": {"sql": {"table": "points"}}}))
+    return str(path)
+
+
+def test_build_normalizes_the_reference_side(source, tmp_path):
+    path = morpc.build_geocode_index(source, workers=1)
+    assert path == str(tmp_path / "points.geocodeindex.sqlite")
+    connection = sqlite3.connect(path)
+    rows = connection.execute("select * from addresspoints order by streetaddr").fetchall()
+    meta = dict(connection.execute("select key, value from meta").fetchall())
+    connection.close()
+
+    assert len(rows) == 6
+    assert rows[0] == ("1013", "SR 37", None, None, "E", "SUNBURY", "43074", "Knox", -82.86, 40.24, "37")
+    assert rows[-1] == ("290", "HIGH", "ST", "W", None, "OSTRANDER", "43061", "Delaware",
+                        -83.21639, 40.26325, None)
+    assert meta["sourcehash"] == "release-1"
+    assert meta["version"] == str(morpc.CONST_GEOCODE_INDEX_VERSION)
+
+
+def test_build_tabulates_the_house_numbers_of_each_street(source, tmp_path):
+    path = morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    numbers = connection.execute("select * from housenumbers order by number").fetchall()
+    connection.close()
+    assert numbers == [("HIGH", "43061", 0, 290, -83.21639, 40.26325),
+                       ("SR 37", "43074", 1, 1013, -82.86, 40.24)]
+
+    # An index that is otherwise current but lacks the table has it added.
+    connection = sqlite3.connect(path)
+    connection.execute("drop table housenumbers")
+    connection.commit()
+    connection.close()
+    morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    assert connection.execute("select count(*) from housenumbers").fetchone() == (2,)
+    connection.close()
+
+
+def test_build_in_worker_processes_writes_the_same_index(source, tmp_path):
+    serial = morpc.build_geocode_index(source, indexPath=str(tmp_path / "serial.sqlite"), workers=1)
+    parallel = morpc.build_geocode_index(source, indexPath=str(tmp_path / "parallel.sqlite"), workers=2)
+    query = "select * from addresspoints order by streetaddr, county"
+    assert (sqlite3.connect(serial).execute(query).fetchall()
+            == sqlite3.connect(parallel).execute(query).fetchall())
+
+
+def test_build_leaves_nothing_behind_but_the_index(source, tmp_path):
+    morpc.build_geocode_index(source, workers=1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "points.geocodeindex.sqlite", "points.resource.json", "points.sqlite"]
+
+
+def test_build_reuses_a_current_index_unless_forced(source, tmp_path):
+    path = morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    connection.execute("delete from addresspoints")
+    connection.commit()
+    connection.close()
+
+    # Current: reused as it stands.
+    morpc.build_geocode_index(source, workers=1)
+    assert sqlite3.connect(path).execute("select count(*) from addresspoints").fetchone()[0] == 0
+
+    morpc.build_geocode_index(source, workers=1, force=True)
+    assert sqlite3.connect(path).execute("select count(*) from addresspoints").fetchone()[0] == 6
+
+
+def test_a_new_release_rebuilds_only_the_counties_it_changed(source, tmp_path):
+    import json
+    import shapely
+    path = morpc.build_geocode_index(source, workers=1)
+    # Mark what is in the index now, so that it shows which counties were rebuilt and which kept.
+    connection = sqlite3.connect(path)
+    connection.execute("update addresspoints set city = 'KEPT'")
+    connection.commit()
+    connection.close()
+
+    # The next release moves Knox's points and drops Delaware's altogether.
+    connection = sqlite3.connect(str(tmp_path / "points.sqlite"))
+    connection.execute("update points set GEOMETRY = ? where county = 'Knox'", (shapely.Point(-82.5, 40.5).wkb,))
+    connection.execute("insert into points values ('5', 'Main', 'St', NULL, NULL, 'Marion', '43302', "
+                       "'Marion', ?)", (shapely.Point(-83.1, 40.6).wkb,))
+    connection.execute("delete from points where county = 'Delaware'")
+    connection.commit()
+    connection.close()
+    descriptor = json.loads(open(source).read())
+    descriptor["hash"] = "release-2"
+    open(source, "w").write(json.dumps(descriptor))
+
+    morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    rows = connection.execute("select county, city, lon from addresspoints order by county").fetchall()
+    partitions = dict(connection.execute("select county, hash from partitions").fetchall())
+    meta = dict(connection.execute("select key, value from meta").fetchall())
+    connection.close()
+
+    assert rows == [("Knox", "SUNBURY", -82.5)] * 3 + [("Marion", "MARION", -83.1)]
+    assert sorted(partitions) == ["Knox", "Marion"]
+    assert meta["sourcehash"] == "release-2"
+
+
+def test_an_unchanged_county_is_kept_as_it_is(source, tmp_path):
+    import json
+    path = morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    connection.execute("update addresspoints set city = 'KEPT'")
+    connection.commit()
+    connection.close()
+
+    descriptor = json.loads(open(source).read())
+    descriptor["hash"] = "release-2"
+    open(source, "w").write(json.dumps(descriptor))
+    morpc.build_geocode_index(source, workers=1)
+
+    cities = sqlite3.connect(path).execute("select distinct city from addresspoints").fetchall()
+    assert cities == [("KEPT",)]
+
+
+def test_a_new_normalization_rebuilds_every_county(source, tmp_path):
+    path = morpc.build_geocode_index(source, workers=1)
+    connection = sqlite3.connect(path)
+    connection.execute("update addresspoints set city = 'KEPT'")
+    connection.execute("update meta set value = '0' where key = 'version'")
+    connection.commit()
+    connection.close()
+
+    morpc.build_geocode_index(source, workers=1)
+    cities = sqlite3.connect(path).execute("select distinct city from addresspoints order by city").fetchall()
+    assert cities == [("OSTRANDER",), ("SUNBURY",)]
+
+
 def test_match_reports_the_exact_tier(index):
     result = morpc.geocode_addresspoints(["290 W High St"], "unused", zipcodes=["43061"], indexPath=index)
     assert result.loc[0, "matched"]
@@ -61,6 +217,25 @@ def test_units_of_one_building_return_their_centre(index):
     assert result.loc[0, "geometry"].x == pytest.approx(-82.9205)
 
 
+@pytest.mark.parametrize("options", [{}, {"batch": False}, {"engine": "columnar"}])
+def test_a_tier_with_many_candidates_is_summarized_not_listed(index, options):
+    # A thousand units of one building, spread a few metres apart around a known centre.
+    connection = sqlite3.connect(index)
+    connection.executemany("insert into addresspoints values (?,?,?,?,?,?,?,?,?,?,?)", [
+        ("500", "TOWER", "DR", None, None, "COLUMBUS", "43215", "Franklin",
+         -83.0 + (unit % 10 - 4.5) * 1e-5, 40.0 + (unit // 100 - 4.5) * 1e-5, None)
+        for unit in range(1000)])
+    connection.commit()
+    connection.close()
+
+    result = morpc.geocode_addresspoints(["500 TOWER DR"], "unused", indexPath=index, **options)
+    assert result.loc[0, "matched"]
+    assert result.loc[0, "matchcount"] == 1000
+    assert result.loc[0, "matchspread"] == pytest.approx(12.6, abs=0.1)
+    assert result.loc[0, "geometry"].x == pytest.approx(-83.0)
+    assert result.loc[0, "geometry"].y == pytest.approx(40.0)
+
+
 def test_genuinely_ambiguous_addresses_are_not_guessed(index):
     # The same address on two streets 60 km apart, with no ZIP to tell them apart.
     result = morpc.geocode_addresspoints(["3000 BETHEL RD"], "unused", indexPath=index)
@@ -92,6 +267,325 @@ def test_results_are_returned_in_input_order_and_projected(index):
     assert result.crs == "EPSG:4326"
 
 
+@pytest.mark.parametrize("addresses", [[], ["", "ST RT 314 NORTH"]])
+def test_results_have_the_same_columns_when_nothing_is_located(index, addresses):
+    result = morpc.geocode_addresspoints(addresses, "unused", indexPath=index)
+    located = morpc.geocode_addresspoints(["290 W High St"], "unused", indexPath=index)
+    assert list(result.columns) == list(located.columns)
+    assert len(result) == len(addresses)
+    assert result["geometry"].isna().all()
+
+
+@pytest.mark.parametrize("options", [{}, {"batch": False}, {"engine": "columnar"}])
+def test_a_repeated_address_is_matched_once(index, monkeypatch, options):
+    import importlib
+    module = importlib.import_module("morpc.geocode")
+    matched = []
+    for name in ["_match_batch", "_match_each", "_match_columns"]:
+        original = getattr(module, name)
+        monkeypatch.setattr(module, name, lambda data, pending, records, tolerance, original=original:
+                            matched.append(len(pending)) or original(data, pending, records, tolerance))
+
+    addresses = ["290 W High St", "999 NOWHERE RD", "290 w high st apt 2", "290 W HIGH ST", "999 Nowhere Rd"]
+    zipcodes = ["43061", None, "43061", None, None]
+    result = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index, **options)
+
+    # The third repeats the first but for its unit; the fourth differs in its ZIP and is matched itself.
+    assert matched == [3]
+    assert list(result["address"]) == addresses
+    assert result.loc[2, "unitnum"] == "2"
+    assert result.loc[2, "geometry"].equals(result.loc[0, "geometry"])
+    assert result.loc[[0, 2], ["matched", "matchtier", "matchcount"]].nunique().eq(1).all()
+    assert result.loc[4, "matchnote"] == result.loc[1, "matchnote"]
+
+
+def test_batch_and_per_address_matching_agree(index):
+    # The batch matcher restates the tiers as joins. Every outcome the fixture can produce -- each
+    # tier, a centre, an ambiguity and each kind of miss -- must come out of it exactly as it comes
+    # out of the per-address queries, in the same order.
+    addresses = ["290 W High St", "290 W High", "1150 COLONY DRIVE", "3000 BETHEL RD", "3000 BETHEL RD",
+                 "844 US 42 N", "284 CR 32", "284 SR 32", "999 NOWHERE RD", "ST RT 314 NORTH", "",
+                 "290 W High St"]
+    zipcodes = ["43061", "43061", "43081", None, "43311", None, None, None, None, None, None, "43081"]
+    batch = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index)
+    single = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index,
+                                         batch=False)
+    assert list(batch.columns) == list(single.columns)
+    assert batch.drop(columns="geometry").equals(single.drop(columns="geometry"))
+    assert list(batch.geometry.isna()) == list(single.geometry.isna())
+    assert batch.geometry.geom_equals_exact(single.geometry, 1e-9)[batch["matched"]].all()
+
+
+def test_columnar_and_sqlite_matching_agree(index):
+    addresses = ["290 W High St", "290 W High", "1150 COLONY DRIVE", "3000 BETHEL RD", "3000 BETHEL RD",
+                 "844 US 42 N", "284 CR 32", "284 SR 32", "999 NOWHERE RD", "ST RT 314 NORTH", ""]
+    zipcodes = ["43061", "43061", "43081", None, "43311", None, None, None, None, None, None]
+    columnar = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index,
+                                           engine="columnar")
+    sqlite = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index)
+    assert list(columnar.columns) == list(sqlite.columns)
+    assert columnar.drop(columns="geometry").equals(sqlite.drop(columns="geometry"))
+    assert columnar.geometry.geom_equals_exact(sqlite.geometry, 1e-9)[sqlite["matched"]].all()
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "columnar"])
+def test_matching_in_worker_processes_is_the_same_as_in_one(index, engine, tmp_path):
+    import pandas as pd
+
+    # The first shard holds nothing that parses, so its records carry no parsed components at all.
+    addresses = ["", "ST RT 314 NORTH", None, "", "", "", ""] + [
+        "290 W High St", "1150 COLONY DRIVE", "3000 BETHEL RD", "3000 BETHEL RD", "844 US 42 N", "284 CR 32",
+        "284 SR 32", "999 NOWHERE RD", "290 W High"] * 5
+    zipcodes = [None] * 7 + ["43061", "43081", None, "43311", None, None, None, None, "43061"] * 5
+    serial = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index, engine=engine)
+    cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+    sharded = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index, engine=engine,
+                                          cache=cache, workers=2)
+    pd.testing.assert_frame_equal(sharded, serial)
+    # Each worker matched its own shard, each distinct address in it once, and cached the results.
+    assert cache.misses > 0
+    again = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index, engine=engine,
+                                        cache=cache, workers=2)
+    pd.testing.assert_frame_equal(again, serial)
+    assert cache.stats()["entries"].sum() == 9
+
+
+def test_columnar_index_is_exported_again_when_the_index_changes(index):
+    connection = sqlite3.connect(index)
+    connection.execute("create table meta (key text primary key, value text)")
+    connection.execute("insert into meta values ('sourcehash', 'a'), ('version', '1')")
+    connection.commit()
+
+    assert len(morpc.load_geocode_columns(index)) == 8
+    # Same metadata: the file is reused rather than exported again, whatever the table holds now.
+    connection.execute("delete from addresspoints where county = 'Logan'")
+    connection.commit()
+    assert len(morpc.load_geocode_columns(index)) == 8
+    # A new release of the source moves the hash on, and the copy follows it.
+    connection.execute("update meta set value = 'b' where key = 'sourcehash'")
+    connection.commit()
+    connection.close()
+    assert len(morpc.load_geocode_columns(index)) == 5
+
+
+@pytest.fixture
+def fuzzyIndex(index):
+    """The index fixture with the street name index of the "fuzzy" tier, as
+    build_geocode_index(fuzzy=True) adds it, and streets that a misspelling could be confused with."""
+    from morpc.geocode import _index_street_names
+
+    connection = sqlite3.connect(index)
+    connection.executemany("insert into addresspoints values (?,?,?,?,?,?,?,?,?,?,?)", [
+        ("500", "SUMMIT", "ST", None, None, "COLUMBUS", "43201", "Franklin", -82.99800, 39.99000, None),
+        ("500", "SUMNER", "ST", None, None, "COLUMBUS", "43215", "Franklin", -83.01000, 39.97000, None),
+        ("75", "16TH", "AVE", "E", None, "COLUMBUS", "43201", "Franklin", -83.00000, 40.00000, None),
+        ("12", "WOODLAND", "AVE", None, None, "COLUMBUS", "43203", "Franklin", -82.96000, 39.97000, None),
+        ("12", "WOODLAWN", "AVE", None, None, "NEWARK", "43055", "Licking", -82.40000, 40.06000, None),
+    ])
+    _index_street_names(connection)
+    connection.commit()
+    connection.close()
+    return index
+
+
+@pytest.mark.parametrize("options", [{}, {"batch": False}, {"engine": "columnar"}])
+def test_a_misspelled_street_name_is_matched_as_its_own_tier(fuzzyIndex, options):
+    result = morpc.geocode_addresspoints(["500 SUMIT ST", "290 W HIHG ST", "500 SUMMIT ST"], "unused",
+                                         indexPath=fuzzyIndex, **options)
+    assert list(result["matchtier"]) == ["fuzzy", "fuzzy", "exact"]
+    assert result["matched"].all()
+    assert result["matchnote"].isna().all()
+    assert result.geometry[0].equals(result.geometry[2])
+    assert list(result["matchstreet"]) == ["SUMMIT ST", "W HIGH ST", "SUMMIT ST"]
+
+
+def test_the_fuzzy_tier_is_bounded(fuzzyIndex):
+    result = morpc.geocode_addresspoints(
+        # Two edits in a name too short for them; a digit; a name the index holds; a wrong ZIP.
+        ["500 SMIT ST", "75 E 15TH AVE", "501 SUMMIT ST", "500 SUMIT ST"], "unused",
+        zipcodes=[None, None, None, "43215"], indexPath=fuzzyIndex)
+    assert not result["matched"].any()
+    assert result["matchtier"].isna().all()
+    assert (result["matchnote"] == "no address point matches this house number and street name").all()
+
+
+def test_the_fuzzy_tier_does_not_guess_between_equally_near_names(fuzzyIndex):
+    result = morpc.geocode_addresspoints(["12 WOODLANE AVE", "12 WOODLAN AVE"], "unused", indexPath=fuzzyIndex)
+    assert list(result["matched"]) == [True, False]
+    assert (result.loc[1, "matchtier"], result.loc[1, "matchcount"]) == ("fuzzy", 2)
+    assert "match equally well" in result.loc[1, "matchnote"]
+
+
+def test_the_fuzzy_tier_needs_the_street_name_index_and_can_be_turned_off(index, fuzzyIndex):
+    assert not morpc.geocode_addresspoints(["290 W HIHG ST"], "unused", indexPath=fuzzyIndex,
+                                           maxEdits=0).loc[0, "matched"]
+    connection = sqlite3.connect(index)
+    connection.execute("drop table streetname_trigrams")
+    connection.commit()
+    connection.close()
+    assert not morpc.geocode_addresspoints(["290 W HIHG ST"], "unused", indexPath=index).loc[0, "matched"]
+
+
+def test_build_adds_the_street_name_index_and_keeps_it(source, tmp_path):
+    import json
+    indexPath = str(tmp_path / "index.sqlite")
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1)
+    assert not morpc.geocode_addresspoints(["290 W HIHG ST"], source, indexPath=indexPath).loc[0, "matched"]
+
+    # Asked for on an index that is otherwise current, it is added without rebuilding.
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1, fuzzy=True)
+    result = morpc.geocode_addresspoints(["290 W HIHG ST"], source, indexPath=indexPath)
+    assert result.loc[0, "matchtier"] == "fuzzy"
+
+    # A new release keeps it.
+    descriptor = json.loads(open(source).read())
+    descriptor["hash"] = "release-2"
+    open(source, "w").write(json.dumps(descriptor))
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1)
+    connection = sqlite3.connect(indexPath)
+    names = [name for (name,) in connection.execute("select streetname from streetnames order by 1")]
+    connection.close()
+    assert names == ["HIGH", "SR 37"]
+
+
+@pytest.fixture
+def numberedIndex(index):
+    """The index fixture with a street of known house numbers either side of some that have no point,
+    and the house number table of the "interpolated" tier, as build_geocode_index() writes it."""
+    from morpc.geocode import _index_house_numbers
+
+    connection = sqlite3.connect(index)
+    connection.executemany("insert into addresspoints values (?,?,?,?,?,?,?,?,?,?,?)", [
+        (number, "MAIN", "ST", None, None, "DELAWARE", "43015", "Delaware", lon, lat, None)
+        for number, lon, lat in [
+            ("100", -83.0000, 40.0000), ("120", -83.0000, 40.0010), ("120", -83.0002, 40.0010),
+            ("101", -83.0003, 40.0000), ("400", -83.0000, 40.0100), ("420", -83.0000, 40.0200),
+            ("440", -83.5000, 40.0200), ("12A", -83.9000, 40.9000)]])
+    _index_house_numbers(connection)
+    connection.commit()
+    connection.close()
+    return index
+
+
+@pytest.mark.parametrize("options", [{}, {"batch": False}, {"engine": "columnar"}])
+def test_a_missing_house_number_is_interpolated_between_its_neighbours(numberedIndex, options):
+    result = morpc.geocode_addresspoints(["110 MAIN ST", "105 MAIN ST", "100 MAIN ST"], "unused",
+                                         zipcodes=["43015"] * 3, indexPath=numberedIndex, interpolate=True,
+                                         **options)
+    assert list(result["matchtier"].fillna("none")) == ["interpolated", "none", "exact"]
+    row = result.iloc[0]
+    assert (row["matched"], row["matchcount"]) == (True, 2)
+    assert result.loc[[0, 2], "matchnote"].isna().all()
+    # A quarter of the way from 100 to 120, whose two points are averaged first.
+    assert row.geometry.x == pytest.approx(-83.00005)
+    assert row.geometry.y == pytest.approx(40.0005)
+    assert row["matchspread"] == 111.6
+    assert (row["matchstreet"], row["matchzip"]) == ("MAIN ST", "43015")
+
+
+def test_interpolation_is_bounded(numberedIndex):
+    result = morpc.geocode_addresspoints(
+        # Asked for without a ZIP; a gap of more than 100 numbers; neighbours further apart than the
+        # tolerance; and a number with nothing beyond it.
+        ["110 MAIN ST", "300 MAIN ST", "430 MAIN ST", "460 MAIN ST"], "unused",
+        zipcodes=[None, "43015", "43015", "43015"], indexPath=numberedIndex, interpolate=True)
+    assert not result["matched"].any()
+    assert result["matchtier"].isna().all()
+    wider = morpc.geocode_addresspoints(["300 MAIN ST"], "unused", zipcodes=["43015"], indexPath=numberedIndex,
+                                        interpolate=True, maxGap=300, tolerance=2000)
+    assert wider.loc[0, "matchtier"] == "interpolated"
+
+
+@pytest.mark.parametrize("options", [{}, {"engine": "columnar"}])
+def test_a_house_number_with_non_ascii_digits_is_not_interpolated(numberedIndex, options):
+    result = morpc.geocode_addresspoints(["110² MAIN ST", "\u0661\u0661\u0660 MAIN ST", "110 MAIN ST"], "unused",
+                                         zipcodes=["43015"] * 3, indexPath=numberedIndex, interpolate=True,
+                                         **options)
+    assert list(result["matchtier"].fillna("none")) == ["none", "none", "interpolated"]
+
+
+def test_interpolation_is_opt_in(numberedIndex):
+    result = morpc.geocode_addresspoints(["110 MAIN ST"], "unused", zipcodes=["43015"], indexPath=numberedIndex)
+    assert not result.loc[0, "matched"]
+
+
+@pytest.fixture
+def spatialIndex(index):
+    """The index fixture with the R*Tree of reverse_geocode_addresspoints(), as
+    build_geocode_index(spatial=True) adds it."""
+    from morpc.geocode import _index_locations
+
+    connection = sqlite3.connect(index)
+    _index_locations(connection)
+    connection.commit()
+    connection.close()
+    return index
+
+
+def test_reverse_geocoding_finds_the_nearest_address(spatialIndex):
+    import geopandas as gpd
+    import shapely
+    points = gpd.GeoDataFrame({"stop": ["a", "b", "c", "d"]}, index=[10, 11, 12, 13], geometry=[
+        # 11 m north of 290 W High St; between the two units of 1150 Colony Dr; in a field; nowhere.
+        shapely.Point(-83.21639, 40.26335), shapely.Point(-82.92050, 40.12025),
+        shapely.Point(-83.5, 40.5), None], crs="EPSG:4326")
+    result = morpc.reverse_geocode_addresspoints(points, indexPath=spatialIndex)
+
+    assert list(result.index) == [10, 11, 12, 13]
+    assert list(result["stop"]) == ["a", "b", "c", "d"]
+    assert list(result["address"].fillna("none")) == ["290 W HIGH ST", "1150 COLONY DR", "none", "none"]
+    assert result.loc[10, "distance"] == pytest.approx(11.1, abs=0.1)
+    assert result.loc[10, "zip"] == "43061"
+    assert result.loc[10, "addresspoint"].equals(shapely.Point(-83.21639, 40.26325))
+    assert result.geometry.equals(points.geometry)
+    assert result.crs == "EPSG:4326"
+
+
+def test_reverse_geocoding_finds_the_k_nearest_different_addresses(spatialIndex):
+    import shapely
+    # The two units of 1150 Colony Dr are one address, so the second nearest is some way off.
+    result = morpc.reverse_geocode_addresspoints([shapely.Point(-82.92050, 40.12025)], indexPath=spatialIndex,
+                                                 k=3, maxDistance=20000)
+    assert list(result["address"]) == ["1150 COLONY DR", "3000 BETHEL RD"]
+    assert list(result["rank"]) == [1, 2]
+    assert result["distance"].is_monotonic_increasing
+
+
+def test_reverse_geocoding_reprojects_the_points(spatialIndex):
+    import geopandas as gpd
+    import shapely
+    points = gpd.GeoSeries([shapely.Point(-83.21639, 40.26335)], crs="EPSG:4326").to_crs("EPSG:3735")
+    result = morpc.reverse_geocode_addresspoints(points, indexPath=spatialIndex, batchSize=1)
+    assert result.loc[0, "address"] == "290 W HIGH ST"
+    assert result.geometry[0].equals_exact(shapely.Point(-83.21639, 40.26335), 1e-9)
+
+
+def test_reverse_geocoding_needs_the_spatial_index(index):
+    import shapely
+    with pytest.raises(RuntimeError, match="spatial=True"):
+        morpc.reverse_geocode_addresspoints([shapely.Point(-83.2, 40.2)], indexPath=index)
+
+
+def test_build_adds_the_spatial_index_and_keeps_it(source, tmp_path):
+    import json
+    import shapely
+    indexPath = str(tmp_path / "index.sqlite")
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1)
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1, spatial=True)
+    result = morpc.reverse_geocode_addresspoints([shapely.Point(-82.86, 40.24)], indexPath=indexPath)
+    assert result.loc[0, "address"] == "1013 SR 37 E"
+
+    # A new release keeps it, and it covers the points as refreshed.
+    descriptor = json.loads(open(source).read())
+    descriptor["hash"] = "release-2"
+    open(source, "w").write(json.dumps(descriptor))
+    morpc.build_geocode_index(source, indexPath=indexPath, workers=1)
+    connection = sqlite3.connect(indexPath)
+    assert connection.execute("""select count(*) from addresspoints a
+        join addresspoint_locations r on r.id = a.rowid""").fetchone() == (6,)
+    connection.close()
+
+
 def test_canonical_street_types_pass_through():
     for value in ["RD", "DR", "ST", "AVE", "CT", "LN", "BLVD", "XING", "TRCE"]:
         assert morpc.normalize_street_type(value) == value
@@ -362,81 +856,466 @@ def test_short_route_prefixes_do_not_capture_ordinary_names():
     assert parsed["streettype"] == "ST"
 
 
+class TestGeocoder:
+    """A Geocoder holds the index open between calls, and answers exactly as geocode_addresspoints() does."""
+
+    addresses = ["290 W High St", "1150 COLONY DRIVE", "3000 BETHEL RD", "844 US 42 N", "999 NOWHERE RD", ""]
+    zipcodes = ["43061", None, None, None, None, None]
+
+    @pytest.mark.parametrize("engine", ["sqlite", "columnar"])
+    def test_results_are_those_of_geocode_addresspoints(self, index, engine):
+        expected = morpc.geocode_addresspoints(self.addresses, "unused", zipcodes=self.zipcodes, indexPath=index,
+                                               engine=engine)
+        with morpc.Geocoder(indexPath=index, engine=engine) as geocoder:
+            for _ in range(2):
+                result = geocoder.geocode(self.addresses, zipcodes=self.zipcodes)
+                assert result.drop(columns="geometry").equals(expected.drop(columns="geometry"))
+                assert result.geometry.geom_equals_exact(expected.geometry, 1e-9)[expected["matched"]].all()
+                assert result.attrs["latency"] > 0
+            stats = geocoder.stats()
+        assert (stats["calls"], stats["addresses"]) == (2, 12)
+        assert 0 < stats["p50"] <= stats["p95"] <= stats["max"]
+
+    def test_calls_from_many_threads_share_the_connections(self, index):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with morpc.Geocoder(indexPath=index, connections=2) as geocoder:
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(lambda _: geocoder.geocode(self.addresses, zipcodes=self.zipcodes),
+                                            range(40)))
+            assert geocoder.stats()["calls"] == 40
+        for result in results:
+            assert result["matchtier"].tolist() == results[0]["matchtier"].tolist()
+        assert results[0]["matched"].tolist() == [True, True, False, True, False, False]
+
+    def test_a_failed_call_does_not_spoil_its_connection(self, index, monkeypatch):
+        import importlib
+        geocode = importlib.import_module("morpc.geocode")
+
+        with morpc.Geocoder(indexPath=index, connections=1) as geocoder:
+            resolve = geocode._resolve_tier
+            monkeypatch.setattr(geocode, "_resolve_tier", lambda *args: 1 / 0)
+            with pytest.raises(ZeroDivisionError):
+                geocoder.geocode(["290 W High St"])
+            # The failed call left its temporary table behind, on a connection since replaced.
+            monkeypatch.setattr(geocode, "_resolve_tier", resolve)
+            assert geocoder.geocode(["290 W High St"]).loc[0, "matched"]
+
+    def test_a_connection_that_cannot_be_replaced_is_retried_by_the_next_call(self, index, monkeypatch):
+        import importlib
+        geocode = importlib.import_module("morpc.geocode")
+
+        def unopenable():
+            raise sqlite3.OperationalError("unable to open database file")
+
+        with morpc.Geocoder(indexPath=index, connections=1) as geocoder:
+            monkeypatch.setattr(geocode, "_resolve_tier", lambda *args: 1 / 0)
+            monkeypatch.setattr(geocoder, "_connect", unopenable)
+            with pytest.raises(ZeroDivisionError):
+                geocoder.geocode(["290 W High St"])
+            with pytest.raises(sqlite3.OperationalError):
+                geocoder.geocode(["290 W High St"])
+            # Once the index can be opened again, the next call reconnects.
+            monkeypatch.undo()
+            assert geocoder.geocode(["290 W High St"]).loc[0, "matched"]
+
+    def test_a_closed_geocoder_refuses_calls(self, index):
+        geocoder = morpc.Geocoder(indexPath=index)
+        geocoder.close()
+        geocoder.close()
+        with pytest.raises(RuntimeError):
+            geocoder.geocode(["290 W High St"])
+
+
+class TestGeocodeChunks:
+    """Geocoding a chunk at a time must give exactly what geocoding the whole list at once gives, from
+    every kind of source, and a run interrupted part way must resume where it stopped."""
+
+    addresses = ["290 W High St", "1150 COLONY DRIVE", "3000 BETHEL RD", "999 NOWHERE RD", "844 US 42 N",
+                 "290 W High", "", "3000 BETHEL RD"]
+    zipcodes = ["43061", None, "43311", None, None, "43061", None, None]
+
+    def expected(self, index):
+        expected = morpc.geocode_addresspoints(self.addresses, "unused", zipcodes=self.zipcodes,
+                                               indexPath=index)
+        expected.insert(0, "inputrow", range(len(expected)))
+        return expected
+
+    @staticmethod
+    def concat(chunks):
+        import pandas as pd
+        return pd.concat(chunks, ignore_index=True)
+
+    def assert_same(self, result, expected):
+        assert list(result.columns) == list(expected.columns)
+        assert result.drop(columns="geometry").astype(str).equals(expected.drop(columns="geometry").astype(str))
+        assert list(result.geometry.isna()) == list(expected.geometry.isna())
+        assert result.geometry.geom_equals_exact(expected.geometry, 1e-9)[expected["matched"]].all()
+
+    def test_an_iterable_is_geocoded_a_chunk_at_a_time(self, index):
+        records = [{"address": address, "zip": zipcode}
+                   for address, zipcode in zip(self.addresses, self.zipcodes)]
+        chunks = list(morpc.geocode_chunks(iter(records), indexPath=index, zipField="zip", chunkSize=3))
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+        self.assert_same(self.concat(chunks), self.expected(index))
+
+    def test_bare_strings_are_addresses(self, index):
+        chunks = list(morpc.geocode_chunks(self.addresses, indexPath=index, chunkSize=5, skip=2))
+        assert [list(chunk["inputrow"]) for chunk in chunks] == [[2, 3, 4, 5, 6], [7]]
+        assert list(self.concat(chunks)["address"]) == self.addresses[2:]
+
+    def test_a_csv_file_is_read_a_chunk_at_a_time(self, index, tmp_path):
+        import pandas as pd
+        path = str(tmp_path / "addresses.csv")
+        pd.DataFrame({"id": range(8), "street": self.addresses, "zip": self.zipcodes}).to_csv(path, index=False)
+        chunks = list(morpc.geocode_chunks(path, indexPath=index, addressField="street", zipField="zip",
+                                           chunkSize=3))
+
+        expected = self.expected(index)
+        # An empty CSV field reads back as null rather than as the empty string.
+        expected.loc[6, "address"] = None
+        self.assert_same(self.concat(chunks), expected)
+
+    def test_a_sqlite_table_is_read_a_chunk_at_a_time(self, index, tmp_path):
+        path = str(tmp_path / "addresses.sqlite")
+        connection = sqlite3.connect(path)
+        connection.execute("create table permits (address text, zip text)")
+        connection.executemany("insert into permits values (?, ?)", zip(self.addresses, self.zipcodes))
+        connection.commit()
+        connection.close()
+        chunks = list(morpc.geocode_chunks(path, indexPath=index, table="permits", zipField="zip", chunkSize=3,
+                                           skip=1))
+
+        self.assert_same(self.concat(chunks), self.expected(index).iloc[1:].reset_index(drop=True))
+
+    def test_a_path_that_is_neither_is_rejected(self, index):
+        with pytest.raises(ValueError):
+            next(morpc.geocode_chunks("addresses.txt", indexPath=index))
+
+    @pytest.mark.parametrize("name", ["geocoded.gpkg", "geocoded.parquet"])
+    def test_an_interrupted_run_resumes_after_the_last_chunk_written(self, index, tmp_path, name):
+        import geopandas as gpd
+        output = str(tmp_path / name)
+
+        def interrupted():
+            yield from self.addresses[:5]
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            morpc.geocode_to_file(interrupted(), output, indexPath=index, chunkSize=2)
+        assert len(gpd.read_file(output) if name.endswith(".gpkg") else gpd.read_parquet(output)) == 4
+
+        assert morpc.geocode_to_file(self.addresses, output, indexPath=index, chunkSize=2) == 8
+        result = gpd.read_file(output) if name.endswith(".gpkg") else gpd.read_parquet(output)
+        assert list(result["inputrow"]) == list(range(8))
+        expected = morpc.geocode_addresspoints(self.addresses, "unused", indexPath=index)
+        assert list(result["matched"]) == list(expected["matched"])
+        assert result.geometry.geom_equals_exact(expected.geometry, 1e-9)[expected["matched"]].all()
+
+    def test_a_part_left_half_written_is_discarded_on_resume(self, index, tmp_path):
+        import os
+        import geopandas as gpd
+        output = str(tmp_path / "geocoded.parquet")
+        morpc.geocode_to_file(self.addresses[:2], output, indexPath=index, chunkSize=2)
+        # What a run killed while writing its second part leaves behind.
+        with open(os.path.join(output, "_part-00001.parquet.tmp"), "wb") as f:
+            f.write(b"PAR1 truncated")
+
+        assert morpc.geocode_to_file(self.addresses, output, indexPath=index, chunkSize=2) == 8
+        assert sorted(os.listdir(output)) == ["part-{:05d}.parquet".format(part) for part in range(4)]
+        assert list(gpd.read_parquet(output)["inputrow"]) == list(range(8))
+
+    @pytest.mark.parametrize("name", ["geocoded.gpkg", "geocoded.parquet"])
+    def test_a_run_not_resumed_starts_again(self, index, tmp_path, name):
+        output = str(tmp_path / name)
+        morpc.geocode_to_file(self.addresses, output, indexPath=index, chunkSize=3)
+        assert morpc.geocode_to_file(self.addresses[:2], output, indexPath=index, resume=False) == 2
+        assert morpc.geocode_to_file(self.addresses[:2], output, indexPath=index) == 2
+
+
+class TestGeocodeCache:
+    """A result is served from the cache only to the backend and version that produced it, and the
+    matching or the service is skipped for everything the cache answers."""
+
+    def test_a_repeated_address_is_answered_without_matching(self, index, tmp_path):
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        first = morpc.geocode_addresspoints(["290 W High St", "999 NOWHERE RD"], "unused",
+                                            zipcodes=["43061", None], indexPath=index, cache=cache)
+
+        # Empty the index: anything still found must have come from the cache.
+        connection = sqlite3.connect(index)
+        connection.execute("delete from addresspoints")
+        connection.commit()
+        connection.close()
+
+        # A unit and a change of case do not change what the address matches.
+        second = morpc.geocode_addresspoints(["290 w high st apt 2", "999 NOWHERE RD", "1150 COLONY DRIVE"],
+                                             "unused", zipcodes=["43061", None, None], indexPath=index,
+                                             cache=cache)
+        assert second.loc[0, "matched"]
+        assert second.loc[0, "geometry"].equals(first.loc[0, "geometry"])
+        assert second.loc[0, "unitnum"] == "2"
+        assert second.loc[1, "matchnote"] == first.loc[1, "matchnote"]
+        assert not second.loc[2, "matched"]
+        assert (cache.hits, cache.misses) == (2, 3)
+
+    def test_a_result_is_not_served_at_a_different_tolerance(self, index, tmp_path):
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        morpc.geocode_addresspoints(["3000 BETHEL RD"], "unused", indexPath=index, cache=cache)
+        result = morpc.geocode_addresspoints(["3000 BETHEL RD"], "unused", indexPath=index, cache=cache,
+                                             tolerance=100000)
+        assert result.loc[0, "matched"]
+        assert cache.hits == 0
+
+    def test_results_from_an_earlier_index_version_are_removed(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = morpc.GeocodeCache(path)
+        cache.put("addresspoints", "v0:release:500", {"290|W|HIGH|ST||43061": {"matched": True}})
+        cache.put("morpc-geocoder", "http://127.0.0.1:8000", {"290 W HIGH ST|||": {"matched": True}})
+        cache.close()
+
+        stats = morpc.GeocodeCache(path).stats().set_index("backend")["entries"]
+        assert stats.to_dict() == {"morpc-geocoder": 1}
+
+    def test_least_recently_used_results_are_evicted_beyond_the_limit(self, tmp_path):
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"), maxEntries=2)
+        cache.put("test", "1", {"a": 1})
+        cache.put("test", "1", {"b": 2})
+        cache.get("test", "1", ["a"])
+        cache.put("test", "1", {"c": 3})
+        assert cache.get("test", "1", ["a", "b", "c"]) == {"a": 1, "c": 3}
+
+    def test_results_older_than_the_limit_are_not_served(self, tmp_path):
+        import time
+        path = str(tmp_path / "cache.sqlite")
+        morpc.GeocodeCache(path).put("test", "1", {"a": 1})
+        time.sleep(0.05)
+        assert morpc.GeocodeCache(path, maxAge=0.01).get("test", "1", ["a"]) == {}
+        assert morpc.GeocodeCache(path).stats()["entries"].sum() == 0
+
+    def test_hits_and_misses_are_totalled_across_sessions(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        morpc.GeocodeCache(path).put("test", "1", {"a": 1})
+        morpc.GeocodeCache(path).get("test", "1", ["a", "b"])
+        morpc.GeocodeCache(path).get("test", "1", ["a"])
+        stats = morpc.GeocodeCache(path).stats().iloc[0]
+        assert (stats["backend"], stats["entries"], stats["hits"], stats["misses"]) == ("test", 1, 2, 1)
+
+    def test_clear(self, tmp_path):
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        cache.put("test", "1", {"a": 1})
+        cache.put("other", "1", {"a": 1})
+        cache.clear("test")
+        assert cache.get("test", "1", ["a"]) == {}
+        cache.clear()
+        assert cache.get("other", "1", ["a"]) == {}
+
+    def test_nominatim_is_asked_only_for_new_addresses(self, monkeypatch, tmp_path):
+        pytest.importorskip("geopy")
+        pytest.importorskip("tqdm")
+        from geopy.geocoders import Nominatim
+        from geopy.location import Location
+        asked = []
+
+        def fake_geocode(self, query, **kwargs):
+            asked.append(query)
+            return Location(query, (40.0, -83.0), {"place_id": 1}) if "HIGH" in query.upper() else None
+
+        monkeypatch.setattr(Nominatim, "geocode", fake_geocode)
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        morpc.geocode(["290 W High St", "nowhere"], endpoint="localhost:8080", cache=cache)
+        frame = morpc.geocode(["290 w high st", "nowhere", "17 North St"], endpoint="localhost:8080",
+                              cache=cache)
+
+        assert asked == ["290 W High St", "nowhere", "17 North St"]
+        assert frame.loc[0, "lat"] == 40.0
+        assert frame.loc[1, "lat"] != frame.loc[1, "lat"]
+        assert frame.loc[0, "location"].raw == {"place_id": 1}
+
+    def test_nominatim_is_asked_once_for_a_repeated_address(self, monkeypatch):
+        pytest.importorskip("geopy")
+        pytest.importorskip("tqdm")
+        from geopy.geocoders import Nominatim
+        from geopy.location import Location
+        asked = []
+
+        def fake_geocode(self, query, **kwargs):
+            asked.append(query)
+            return Location(query, (40.0, -83.0), {}) if "HIGH" in query.upper() else None
+
+        monkeypatch.setattr(Nominatim, "geocode", fake_geocode)
+        frame = morpc.geocode(["290 W High St", "nowhere", "290 w high st", "Nowhere"],
+                              endpoint="localhost:8080")
+
+        assert asked == ["290 W High St", "nowhere"]
+        assert list(frame["address"]) == ["290 W High St", "nowhere", "290 w high st", "Nowhere"]
+        assert frame.loc[2, "lat"] == 40.0
+        assert frame.loc[3, "location"] is None
+
+
+class TestSeriesParity:
+    """The Series counterparts of the normalization functions must return exactly what the scalar
+    functions return element by element, or the index and the queries normalized through them would
+    drift apart. Checked over the cases the scalar tests pin down, and over a seeded mix of the tokens
+    that exercise every branch, including non-string and non-ASCII values."""
+
+    TOKENS = ["290", "01013", "1013.0", "407.5", "5684-5704", "4410,4412", "2397/2401", "-9", "0", "00",
+              "#", "#300", "#300.", ".#7", "APT", "Apt.", "STE", "suite", "UNIT", "7", "B", "N", "NORTH",
+              "s.", "West", "NE", "HIGH", "High", "ST", "Street", "RD", "road", "AVE", "WY", "TR", "BL",
+              "STATE", "ROUTE", "RT", "SR", "US", "HWY", "HIGHWAY", "COUNTY", "C.R.", "OH", "OH-104",
+              "104", "32", "42", "I-270", "INTERSTATE", "MARION-BUCYRUS", ",", "Columbus,", "43223",
+              "Ohio", "(visitor", "entrance)", "43061.0", "43015-1234", "..", "\u00df", "\u00bd",
+              "\u00b2", "\t", "\u00a0", "", "1,000", "ST.", "4A", "C"]
+
+    @classmethod
+    def corpus(cls):
+        import random
+        generator = random.Random(20260707)
+        values = [None, float("nan"), 290, 43015.0, b"290", "", " ", "."] + cls.TOKENS
+        for _ in range(3000):
+            tokens = [generator.choice(cls.TOKENS) for _ in range(generator.randint(1, 7))]
+            values.append(generator.choice([" ", "  ", ", ", ""]).join(tokens))
+        return values
+
+    @pytest.mark.parametrize("name", ["normalize_street_type", "normalize_directional",
+                                      "normalize_house_number", "normalize_street_name",
+                                      "route_number", "normalize_zip"])
+    def test_normalization(self, name):
+        values = self.corpus()
+        expected = [getattr(morpc, name)(value) for value in values]
+        assert getattr(morpc, name + "_series")(values).tolist() == expected
+
+    def test_parse_address(self):
+        values = self.corpus()
+        parsed = morpc.parse_address_series(values)
+        for value, row in zip(values, parsed.to_dict("records")):
+            expected = morpc.parse_address(value)
+            assert row == (expected or dict.fromkeys(row)), value
+
+    def test_index_and_nulls_are_kept(self):
+        import pandas as pd
+        values = pd.Series(["Road", None, "Road"], index=[10, 20, 30])
+        result = morpc.normalize_street_type_series(values)
+        assert list(result.index) == [10, 20, 30]
+        assert result.tolist() == ["RD", None, "RD"]
+        assert result.dtype == object
+
+    def test_empty_input(self):
+        assert morpc.normalize_zip_series([]).tolist() == []
+        assert len(morpc.parse_address_series([])) == 0
+
+
 class TestQueryGeocoder:
-    """query_geocoder() is a client for the morpc-geocoder service, so these stub the
-    service and check what is sent, what comes back, and what happens when it is not running."""
+    """query_geocoder() is a client for the morpc-geocoder service, so these run a stand-in for the
+    service on a local port and check what is sent, what comes back, and what happens when it is not
+    running or fails."""
 
     @staticmethod
-    def result(matched=True, lon=-83.056948, lat=40.300645, housenumber="205"):
+    def result(matched=True, lon=-83.056948, lat=40.300645, housenumber="205", label=None):
         if not matched:
             return {"matched": False, "longitude": None, "latitude": None, "confidence": None,
                     "layer": None, "label": None, "housenumber": None,
                     "note": "no confident Pelias match"}
         return {"matched": True, "longitude": lon, "latitude": lat, "confidence": 1.0,
-                "layer": "address", "label": "205 E Central Ave, Delaware, OH",
+                "layer": "address", "label": label or "205 E Central Ave, Delaware, OH",
                 "housenumber": housenumber, "note": None}
 
-    def service(self, monkeypatch, results, status=200, error=None):
-        """Stand in for a deployed geocoder. Records each request on the returned list."""
-        import requests
-        posted = []
-
-        class Response:
-            def __init__(self, payload):
-                self.payload = payload
-
-            def raise_for_status(self):
-                if status != 200:
-                    raise requests.exceptions.HTTPError("{} Server Error".format(status))
-
-            def json(self):
-                count = len(self.payload["addresses"])
-                return {"results": results[:count] if len(results) >= count else results}
-
-        def fake_post(url, json=None, timeout=None):
-            if error is not None:
-                raise error
-            posted.append({"url": url, "json": json, "timeout": timeout})
-            return Response(json)
-
-        monkeypatch.setattr(requests, "post", fake_post)
-        return posted
-
-    def test_sends_components_alongside_each_address(self, monkeypatch):
-        posted = self.service(monkeypatch, [self.result()])
-        morpc.query_geocoder(["205 E CENTRAL AVE"], cities=["Delaware"], states=["OH"],
-                                     zipcodes=["43015"])
-
-        assert posted[0]["url"] == "http://127.0.0.1:8000/geocode/batch"
+    @pytest.fixture
+    def service(self):
+        """Start a stand-in for a deployed geocoder. Answers each batch with the first results of
+        `results`, or with `results(address)` for each address where it is callable, after failing the
+        first `failures` requests with 503. Records each request on the returned list, and the most
+        requests it was serving at once on its `peak` attribute."""
+        import http.server
+        import json
+        import threading
+        import time
+
+        servers = []
+
+        class Posted(list):
+            peak = 0
+
+        def start(results, status=200, failures=0, delay=0):
+            posted = Posted()
+            lock = threading.Lock()
+            inFlight = [0]
+
+            class Handler(http.server.BaseHTTPRequestHandler):
+                protocol_version = "HTTP/1.1"
+
+                def do_POST(self):
+                    payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                    with lock:
+                        posted.append({"path": self.path, "json": payload})
+                        failing = len(posted) <= failures
+                        inFlight[0] += 1
+                        posted.peak = max(posted.peak, inFlight[0])
+                    time.sleep(delay)
+                    addresses = [a["address"] for a in payload["addresses"]]
+                    if callable(results):
+                        answer = [results(address) for address in addresses]
+                    else:
+                        answer = results[:len(addresses)] if len(results) >= len(addresses) else results
+                    body = json.dumps({"results": answer}).encode()
+                    with lock:
+                        inFlight[0] -= 1
+                    self.send_response(503 if failing else status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+            return "http://127.0.0.1:{}".format(server.server_address[1]), posted
+
+        yield start
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_sends_components_alongside_each_address(self, service):
+        endpoint, posted = service([self.result()])
+        morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint, cities=["Delaware"], states=["OH"],
+                             zipcodes=["43015"])
+
+        assert posted[0]["path"] == "/geocode/batch"
         assert posted[0]["json"]["addresses"] == [
             {"address": "205 E CENTRAL AVE", "city": "Delaware", "state": "OH",
              "zipcode": "43015"}]
 
-    def test_components_are_optional(self, monkeypatch):
-        posted = self.service(monkeypatch, [self.result()])
-        morpc.query_geocoder(["205 E CENTRAL AVE"])
+    def test_components_are_optional(self, service):
+        endpoint, posted = service([self.result()])
+        morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint + "/")
 
+        assert posted[0]["path"] == "/geocode/batch"
         assert posted[0]["json"]["addresses"] == [
             {"address": "205 E CENTRAL AVE", "city": None, "state": None, "zipcode": None}]
 
-    def test_returns_a_geodataframe_in_input_order(self, monkeypatch):
-        self.service(monkeypatch, [self.result(), self.result(matched=False), self.result()])
-        frame = morpc.query_geocoder(["a", "b", "c"])
+    def test_returns_a_geodataframe_in_input_order(self, service):
+        endpoint, _ = service([self.result(), self.result(matched=False), self.result()])
+        frame = morpc.query_geocoder(["a", "b", "c"], endpoint=endpoint)
 
         assert list(frame["address"]) == ["a", "b", "c"]
         assert list(frame["matched"]) == [True, False, True]
         assert frame.crs == "EPSG:4326"
 
-    def test_an_unmatched_address_has_no_geometry_but_keeps_its_note(self, monkeypatch):
-        self.service(monkeypatch, [self.result(matched=False)])
-        frame = morpc.query_geocoder(["nowhere"])
+    def test_an_unmatched_address_has_no_geometry_but_keeps_its_note(self, service):
+        endpoint, _ = service([self.result(matched=False)])
+        frame = morpc.query_geocoder(["nowhere"], endpoint=endpoint)
 
         assert frame.geometry.iloc[0] is None
         assert frame["matchnote"].iloc[0] == "no confident Pelias match"
 
-    def test_a_matched_address_carries_the_point_and_the_reporting_fields(self, monkeypatch):
-        self.service(monkeypatch, [self.result()])
-        row = morpc.query_geocoder(["205 E CENTRAL AVE"]).iloc[0]
+    def test_a_matched_address_carries_the_point_and_the_reporting_fields(self, service):
+        endpoint, _ = service([self.result()])
+        row = morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint).iloc[0]
 
         assert (row.geometry.x, row.geometry.y) == (-83.056948, 40.300645)
         assert row["confidence"] == 1.0
@@ -444,27 +1323,264 @@ class TestQueryGeocoder:
         assert row["housenumber"] == "205"
         assert row["matchnote"] is None
 
-    def test_a_long_list_is_split_into_batches(self, monkeypatch):
-        posted = self.service(monkeypatch, [self.result()] * 3)
-        frame = morpc.query_geocoder(["a", "b", "c"], batchSize=2)
+    def test_a_long_list_is_split_into_batches(self, service):
+        endpoint, posted = service([self.result()] * 3)
+        frame = morpc.query_geocoder(["a", "b", "c"], endpoint=endpoint, batchSize=2, concurrency=1)
 
         assert [len(p["json"]["addresses"]) for p in posted] == [2, 1]
         assert len(frame) == 3
 
-    def test_a_parallel_list_of_the_wrong_length_is_rejected(self, monkeypatch):
-        self.service(monkeypatch, [self.result()])
+    def test_batches_are_in_flight_at_once_and_come_back_in_input_order(self, service):
+        endpoint, posted = service(lambda address: self.result(label=address), delay=0.2)
+        addresses = ["{} MAIN ST".format(number) for number in range(40)]
+        frame = morpc.query_geocoder(addresses, endpoint=endpoint, batchSize=5, concurrency=4)
+
+        assert len(posted) == 8
+        assert posted.peak == 4
+        assert list(frame["label"]) == addresses
+
+    def test_a_failed_batch_is_retried(self, service):
+        endpoint, posted = service([self.result()], failures=2)
+        frame = morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint, backoff=0)
+
+        assert len(posted) == 3
+        assert frame["matched"].iloc[0]
+
+    def test_a_batch_that_keeps_failing_fails_the_run_once_its_retries_are_spent(self, service):
+        endpoint, posted = service([self.result()], failures=10)
+
+        with pytest.raises(RuntimeError, match="returned an error"):
+            morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint, retries=2, backoff=0)
+        assert len(posted) == 3
+
+    def test_a_request_the_service_rejects_is_not_retried(self, service):
+        endpoint, posted = service([self.result()], status=422)
+
+        with pytest.raises(RuntimeError, match="returned an error"):
+            morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint, backoff=0)
+        assert len(posted) == 1
+
+    def test_a_cache_sends_only_new_addresses(self, service, tmp_path):
+        endpoint, posted = service([self.result(), self.result(matched=False)])
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        morpc.query_geocoder(["205 E CENTRAL AVE", "nowhere"], endpoint=endpoint, zipcodes=["43015", None],
+                             cache=cache)
+        frame = morpc.query_geocoder(["205 e central ave", "1 New St", "nowhere"], endpoint=endpoint,
+                                     zipcodes=["43015-1234", None, None], cache=cache)
+
+        assert [[a["address"] for a in p["json"]["addresses"]] for p in posted] == [
+            ["205 E CENTRAL AVE", "nowhere"], ["1 New St"]]
+        assert list(frame["matched"]) == [True, True, False]
+        assert frame["matchnote"].iloc[2] == "no confident Pelias match"
+
+    def test_a_repeated_address_is_sent_once(self, service):
+        endpoint, posted = service(lambda address: self.result(label=address))
+        frame = morpc.query_geocoder(["205 E CENTRAL AVE", "1 MAIN ST", "205 e  central ave", "1 MAIN ST"],
+                                     endpoint=endpoint, zipcodes=["43015", None, "43015", "43016"])
+
+        assert [a["address"] for a in posted[0]["json"]["addresses"]] == [
+            "205 E CENTRAL AVE", "1 MAIN ST", "1 MAIN ST"]
+        assert list(frame["label"]) == ["205 E CENTRAL AVE", "1 MAIN ST", "205 E CENTRAL AVE", "1 MAIN ST"]
+
+    def test_a_source_can_be_geocoded_in_chunks(self, service):
+        endpoint, posted = service(lambda address: self.result(label=address))
+        records = [{"street": "{} MAIN ST".format(number), "city": "Delaware"} for number in range(5)]
+        chunks = list(morpc.geocode_chunks(records, backend="morpc-geocoder", endpoint=endpoint,
+                                           addressField="street", cityField="city", chunkSize=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [a["city"] for p in posted for a in p["json"]["addresses"]] == ["Delaware"] * 5
+        assert [label for chunk in chunks for label in chunk["label"]] == [r["street"] for r in records]
+
+    def test_a_parallel_list_of_the_wrong_length_is_rejected(self):
         with pytest.raises(ValueError):
             morpc.query_geocoder(["a", "b"], zipcodes=["43015"])
 
-    def test_an_unreachable_service_says_it_has_to_be_deployed(self, monkeypatch):
-        import requests
-        self.service(monkeypatch, [], error=requests.exceptions.ConnectionError("refused"))
+    def test_an_unreachable_service_says_it_has_to_be_deployed(self):
+        import socket
+
+        # A port that was free a moment ago, so that nothing is listening on it.
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
 
         with pytest.raises(RuntimeError, match="morpc-geocoder"):
-            morpc.query_geocoder(["205 E CENTRAL AVE"])
+            morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint="http://127.0.0.1:{}".format(port),
+                                 retries=1, backoff=0)
 
-    def test_an_erroring_service_is_reported_rather_than_returning_empty(self, monkeypatch):
-        self.service(monkeypatch, [self.result()], status=500)
+    def test_an_erroring_service_is_reported_rather_than_returning_empty(self, service):
+        endpoint, _ = service([self.result()], status=500)
+
+        with pytest.raises(RuntimeError, match="returned an error"):
+            morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=endpoint, retries=0)
+
+    def test_batches_are_sent_no_faster_than_the_rate(self, service):
+        import time
+
+        endpoint, posted = service([self.result()])
+        start = time.monotonic()
+        morpc.query_geocoder(["a", "b", "c", "d", "e"], endpoint=endpoint, batchSize=1, rate=20)
+        assert len(posted) == 5
+        assert time.monotonic() - start >= 4 / 20
+
+    def test_batches_are_spread_across_replicas_by_their_load(self, service):
+        slow, slowPosted = service(lambda address: self.result(label=address), delay=0.2)
+        fast, fastPosted = service(lambda address: self.result(label=address), delay=0.02)
+        addresses = ["{} MAIN ST".format(number) for number in range(20)]
+        frame = morpc.query_geocoder(addresses, endpoint=[slow, fast + "/"], batchSize=1, concurrency=1)
+
+        assert len(slowPosted) + len(fastPosted) == 20
+        assert 0 < len(slowPosted) < len(fastPosted)
+        assert slowPosted.peak == fastPosted.peak == 1
+        assert list(frame["label"]) == addresses
+
+    def test_a_failing_replica_hands_its_batches_to_the_others(self, service):
+        failing, failingPosted = service([self.result()], failures=1000)
+        healthy, healthyPosted = service(lambda address: self.result(label=address))
+        addresses = ["{} MAIN ST".format(number) for number in range(10)]
+        frame = morpc.query_geocoder(addresses, endpoint=[failing, healthy], batchSize=1, concurrency=2,
+                                     retries=1, backoff=60)
+
+        # Only the batches sent before it first failed went to it. It is resting for the rest of the run.
+        assert len(failingPosted) <= 2
+        assert len(healthyPosted) == 10
+        assert frame["matched"].all()
+
+    def test_an_unreachable_replica_is_left_out(self, service):
+        import socket
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            unreachable = "http://127.0.0.1:{}".format(probe.getsockname()[1])
+        healthy, healthyPosted = service(lambda address: self.result(label=address))
+        frame = morpc.query_geocoder(["a", "b", "c"], endpoint=[unreachable, healthy], batchSize=1,
+                                     concurrency=1, retries=1, backoff=60)
+
+        assert len(healthyPosted) == 3
+        assert list(frame["label"]) == ["a", "b", "c"]
+
+    def test_the_run_fails_when_every_replica_does(self, service):
+        first, firstPosted = service([self.result()], failures=1000)
+        second, secondPosted = service([self.result()], failures=1000)
 
         with pytest.raises(RuntimeError, match="returned an error"):
-            morpc.query_geocoder(["205 E CENTRAL AVE"])
+            morpc.query_geocoder(["205 E CENTRAL AVE"], endpoint=[first, second], retries=3, backoff=0)
+        assert len(firstPosted) + len(secondPosted) == 4
+        assert firstPosted and secondPosted
+
+    def test_a_cache_answers_what_any_replica_geocoded(self, service, tmp_path):
+        first, firstPosted = service(lambda address: self.result(label=address))
+        second, secondPosted = service(lambda address: self.result(label=address))
+        cache = morpc.GeocodeCache(str(tmp_path / "cache.sqlite"))
+        morpc.query_geocoder(["1 MAIN ST"], endpoint=second, cache=cache)
+        frame = morpc.query_geocoder(["1 MAIN ST", "2 MAIN ST"], endpoint=[first, second], cache=cache)
+
+        # The first replica geocodes the new address; the second is not asked for the one it already did.
+        assert [a["address"] for p in firstPosted for a in p["json"]["addresses"]] == ["2 MAIN ST"]
+        assert [a["address"] for p in secondPosted for a in p["json"]["addresses"]] == ["1 MAIN ST"]
+        assert list(frame["label"]) == ["1 MAIN ST", "2 MAIN ST"]
+
+    def test_the_cascade_sends_each_backend_only_what_the_last_could_not_match(self, index, service,
+                                                                                monkeypatch):
+        pytest.importorskip("geopy")
+        pytest.importorskip("tqdm")
+        from geopy.geocoders import Nominatim
+        from geopy.location import Location
+
+        endpoint, posted = service(lambda address: self.result(matched=address == "205 E CENTRAL AVE"))
+        asked = []
+
+        def fake_geocode(self, query, **kwargs):
+            asked.append(query)
+            return Location("Somewhere, Ohio", (40.0, -83.0), {}) if query.startswith("17") else None
+
+        monkeypatch.setattr(Nominatim, "geocode", fake_geocode)
+        frame = morpc.geocode_cascade(
+            ["290 W High St", "205 E CENTRAL AVE", "17 NORTH ST", "999 NOWHERE RD"],
+            zipcodes=["43061", None, None, None], cities=[None, "Delaware", "Columbus", None],
+            backends=["addresspoints", "morpc-geocoder", "nominatim"],
+            backendOptions={"addresspoints": {"indexPath": index},
+                            "morpc-geocoder": {"endpoint": endpoint, "concurrency": 1},
+                            "nominatim": {"endpoint": "localhost:8080", "concurrency": 2}})
+
+        assert [a["address"] for request in posted for a in request["json"]["addresses"]] == [
+            "205 E CENTRAL AVE", "17 NORTH ST", "999 NOWHERE RD"]
+        assert sorted(asked) == ["17 NORTH ST, Columbus", "999 NOWHERE RD"]
+        assert frame["backend"].fillna("").tolist() == ["addresspoints", "morpc-geocoder", "nominatim", ""]
+        assert frame["matched"].tolist() == [True, True, True, False]
+        assert frame["matchtier"].fillna("").tolist()[:2] == ["exact", ""]
+        assert frame["label"].tolist()[1:3] == ["205 E Central Ave, Delaware, OH", "Somewhere, Ohio"]
+        assert (frame.geometry.iloc[2].x, frame.geometry.iloc[2].y) == (-83.0, 40.0)
+        assert frame["matchnote"].iloc[3] == ("addresspoints: no address point matches this house number and "
+                                              "street name; morpc-geocoder: no confident Pelias match; "
+                                              "nominatim: no result")
+
+    def test_the_cascade_stops_once_everything_is_matched(self, index):
+        # No service is running at the default endpoint, and none is asked.
+        frame = morpc.geocode_cascade(["290 W High St"], zipcodes=["43061"],
+                                      backendOptions={"addresspoints": {"indexPath": index}})
+        assert frame["backend"].tolist() == ["addresspoints"]
+
+    def test_the_cascade_knows_its_backends(self):
+        with pytest.raises(ValueError):
+            morpc.geocode_cascade(["290 W High St"], backends=["addresspoints", "google"])
+        with pytest.raises(ValueError):
+            morpc.geocode_cascade(["290 W High St"], backends=["addresspoints", "addresspoints"])
+
+
+class TestGeocoderServer:
+    """The local service answers as morpc-geocoder does, so that query_geocoder() can use it."""
+
+    @pytest.fixture
+    def server(self, index):
+        import threading
+
+        server = morpc.geocoder_server(indexPath=index, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield "http://127.0.0.1:{}".format(server.server_address[1])
+        server.shutdown()
+        server.server_close()
+
+    def test_query_geocoder_gets_the_matches_of_geocode_addresspoints(self, index, server):
+        addresses = ["290 W High St", "1150 COLONY DRIVE", "3000 BETHEL RD", "999 NOWHERE RD", ""]
+        zipcodes = ["43061", None, None, None, None]
+        expected = morpc.geocode_addresspoints(addresses, "unused", zipcodes=zipcodes, indexPath=index)
+        frame = morpc.query_geocoder(addresses, endpoint=server, zipcodes=zipcodes, batchSize=2)
+
+        assert frame["matched"].tolist() == expected["matched"].tolist()
+        assert frame.geometry.geom_equals_exact(expected.geometry, 1e-9)[expected["matched"]].all()
+        assert frame["confidence"].tolist()[:2] == [morpc.CONST_GEOCODE_TIER_CONFIDENCE[tier]
+                                                    for tier in expected["matchtier"][:2]]
+        assert frame["label"].tolist()[:2] == ["290 W HIGH ST, OH 43061", "1150 COLONY DR, OH 43081"]
+        assert frame["housenumber"].tolist()[:2] == ["290", "1150"]
+        assert frame["matchnote"].tolist()[2:] == expected["matchnote"].tolist()[2:]
+
+    def test_a_label_names_the_street_matched_rather_than_the_one_asked_for(self, fuzzyIndex, server):
+        import requests
+
+        results = requests.post(server + "/geocode/batch", json={"addresses": [
+            {"address": "500 SUMIT ST"}, {"address": "290 HIGH AVE"}]}).json()["results"]
+        assert [result["matchtier"] for result in results] == ["fuzzy", "components"]
+        assert [result["label"] for result in results] == ["500 SUMMIT ST, OH 43201", "290 W HIGH ST, OH 43061"]
+
+    def test_a_single_address_is_answered_alone(self, server):
+        import requests
+
+        posted = requests.post(server + "/geocode", json={"address": "290 W High St", "zipcode": "43061"}).json()
+        fetched = requests.get(server + "/geocode", params={"address": "290 W High St", "zipcode": "43061"}).json()
+        assert posted == fetched
+        assert (posted["matched"], posted["matchtier"], posted["longitude"]) == (True, "exact", -83.21639)
+
+    def test_health_reports_the_calls_served(self, index, server):
+        import requests
+
+        requests.get(server + "/geocode", params={"address": "290 W High St"})
+        health = requests.get(server + "/health").json()
+        assert (health["status"], health["index"], health["calls"]) == ("ok", index, 1)
+
+    def test_a_request_that_cannot_be_read_is_refused(self, server):
+        import requests
+
+        assert requests.post(server + "/geocode/batch", json={"address": "290 W High St"}).status_code == 422
+        assert requests.post(server + "/geocode/batch", data="not json").status_code == 422
+        assert requests.get(server + "/geocode/single").status_code == 404